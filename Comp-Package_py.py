@@ -1,26 +1,78 @@
+import io
 import os
 import sys
 import time
 import shutil
 import argparse
 import configparser
-from typing import List, Set, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Set, Dict, Any, TextIO
 from pathlib import Path
-from setuptools import setup
-from setuptools.extension import Extension
-from Cython.Build import cythonize
-from Cython.Distutils import build_ext
+import uuid
+import errno
 import platform
+import tempfile
+import threading
+from build_manifest import BuildManifest
+from system_resources import get_available_memory, get_mount_fstype
+from process_runner import run_process, build_env, format_command, format_usage, ProcessCancelled, ProcessTimeout
+import build_daemon
 
 TOOL_NAME = "Python 3 项目编译与发行版打包工具"
 VERSION = "0.5.0"
 
 
+MEMORY_FS_TYPES = {'tmpfs', 'ramfs'}
+# 生成的C++源码、目标文件和PyInstaller中间文件约为Python源码体积的数十倍
+WORKSPACE_SIZE_FACTOR = 40
+# 编译器在子进程中写满磁盘时只能从其输出或剩余空间判断，返回码本身不区分原因
+NO_SPACE_MESSAGES = ('No space left on device', 'There is not enough space on the disk')
+WORKSPACE_MIN_FREE = 64 * 1024 * 1024
+
+
+# Cython 编译器内部有全局状态，同一进程中的多个构建需要依次执行 cythonize
+_CYTHONIZE_LOCK = threading.Lock()
+
+# C/C++ 编译在独立进程中执行，编译器相关的环境变量只对该进程生效
+SETUP_SCRIPT_TEMPLATE = """
+from setuptools import setup
+from setuptools.extension import Extension
+
+setup(
+    name='compiled_modules',
+    ext_modules=[
+        Extension(name, sources=[source], extra_compile_args={extra_compile_args!r}, language='c++')
+        for name, source in {modules!r}
+    ],
+    script_args=['build_ext', '--inplace', '--parallel', '{jobs}'],
+)
+"""
+
+
 def show_tool_info():
     print(f"\n{TOOL_NAME} v{VERSION}")
     print("="*50 + "\n")
 
 
+def benchmark_workspace(path: str, file_count: int = 500, file_size: int = 4096) -> float:
+    """在指定目录中测量大量小文件的创建、读取和删除耗时（秒）"""
+    payload = os.urandom(file_size)
+    bench_dir = tempfile.mkdtemp(prefix='projectcompiler-bench-', dir=path)
+    start_time = time.perf_counter()
+    try:
+        for i in range(file_count):
+            with open(os.path.join(bench_dir, f'{i}.tmp'), 'wb') as f:
+                f.write(payload)
+        for i in range(file_count):
+            with open(os.path.join(bench_dir, f'{i}.tmp'), 'rb') as f:
+                f.read()
+        for i in range(file_count):
+            os.remove(os.path.join(bench_dir, f'{i}.tmp'))
+        return time.perf_counter() - start_time
+    finally:
+        shutil.rmtree(bench_dir, ignore_errors=True)
+
+
 cwd = os.getcwd()
 
 
@@ -29,20 +81,28 @@ class CompilerConfig:
         'General': {
             'clean_temp': 'true',
             'compiler_path': '',
-            'confirm_before_compile': 'true'
+            'confirm_before_compile': 'true',
+            'workspace': 'auto',            # 构建工作区: auto(内存充足时使用tmpfs)/disk/自定义目录
+            'workspace_min_free_mb': '1024',  # 使用内存工作区时至少保留的可用内存
+            # 构建结束后额外测量小文件读写开销，估算内存工作区节省的时间
+            'report_workspace_savings': 'false',
+            'step_timeout': '0'  # 单个编译或打包进程的时限（秒），超时终止整个进程树，0 为不限制
         },
         'Cython': {
             'compiler': 'auto',
             'optimization_level': '-O2',
             'language_level': '3',
             'unix_compiler': 'gcc',
-            'windows_compiler': 'msvc'
+            'windows_compiler': 'msvc',
+            'jobs': 'auto'  # 并行编译扩展模块的进程数，auto 为CPU核数
         },
         'PyInstaller': {
             'console': 'true',
             'one_file': 'false',  # 修改默认值为false
             'icon_path': '',
-            'additional_data': ''
+            'additional_data': '',
+            'multi_entry_mode': 'collect',  # 多入口打包方式: collect(共享COLLECT)/separate(并行独立打包)
+            'parallel_builds': 'auto'       # separate 模式下同时运行的 PyInstaller 进程数
         }
     }
 
@@ -73,24 +133,79 @@ class CompilerConfig:
 
 
 class ProjectCompiler:
-    def __init__(self, project_path: str | Path, main_file: str, config: CompilerConfig = None) -> None:
+    def __init__(self, project_path: str | Path, main_file: str | List[str], config: CompilerConfig = None,
+                 output: TextIO = None, cancel_event: threading.Event = None) -> None:
         if not Path(project_path).exists():
             raise ValueError(f"项目路径不存在: {project_path}")
-        if not main_file.endswith('.py'):
-            raise ValueError("主入口文件必须是Python文件")
+        main_files = [main_file] if isinstance(main_file, str) else list(main_file)
+        if not main_files:
+            raise ValueError("至少需要一个主入口文件")
+        for file in main_files:
+            if not file.endswith('.py'):
+                raise ValueError("主入口文件必须是Python文件")
         self.project_path = os.path.abspath(project_path)
-        self.main_file = main_file
+        # 多个入口共享同一次 Cython 编译，main_file 保留为第一个入口以兼容旧接口
+        self.main_files = main_files
+        self.main_file = main_files[0]
         self.project_name = self._extract_project_name()
 
         self.build_dir = os.path.join(self.project_path, 'build', self.project_name)
         self.dist_dir = os.path.join(self.project_path, 'dist', self.project_name)
         self.temp_dir = os.path.join(self.project_path, 'temp', self.project_name)
+        self.workspace_root = None  # 为 None 时工作区位于项目目录中
+        self.disk_full = False  # 子进程输出中出现过磁盘空间不足的错误
 
         self.config = config or CompilerConfig()
+        # 输出流为 None 时使用调用时的 sys.stdout，并发构建应各自传入独立的输出流
+        self.output = output
+        # 被设置时终止正在运行的编译进程树，用于从界面停止构建
+        self.cancel_event = cancel_event
+        self.step_timeout = float(self.config.config['General'].get('step_timeout', '0')) or None
+        # 子进程使用的环境变量，为 None 时使用当前进程的环境；守护进程中设置为提交任务的客户端的环境
+        self.base_env: Dict[str, str] | None = None
+        # 记录本次构建创建的临时目录和编译产物，清理时只删除这些条目
+        self.manifest = BuildManifest(BuildManifest.default_path('cython', self.project_path), output=output)
 
         self.platform = platform.system().lower()
         self.compiler_settings = self._get_platform_compiler_settings()
 
+    def log(self, *args, **kwargs):
+        print(*args, file=self.output or sys.stdout, **kwargs)
+
+    def _check_cancelled(self):
+        if self.cancel_event and self.cancel_event.is_set():
+            raise ProcessCancelled("操作已取消")
+
+    def _run_step(self, command: List[str], cwd: str, env: Dict[str, str] = None) -> int:
+        """运行一个编译或打包子进程，应用取消和超时设置并报告其资源占用"""
+        self._check_cancelled()
+        self.log(f"执行命令: {format_command(command)}")
+        usage = {}
+        if env is None and self.base_env is not None:
+            env = build_env(base=self.base_env)
+        result = run_process(command, cwd=cwd, env=env, output=self.output, line_callback=self._check_disk_full,
+                             cancel_event=self.cancel_event, resource_usage=usage, timeout=self.step_timeout)
+        if usage:
+            self.log(f"子进程 {os.path.basename(command[0])}: {format_usage(usage)}")
+        return result
+
+    def _check_disk_full(self, line: str):
+        if any(message in line for message in NO_SPACE_MESSAGES):
+            self.disk_full = True
+
+    def _workspace_exhausted(self, error: Exception) -> bool:
+        """编译失败是否由内存工作区空间耗尽引起"""
+        if not self.workspace_root or isinstance(error, (ProcessCancelled, ProcessTimeout)):
+            return False
+        if isinstance(error, OSError):
+            return error.errno == errno.ENOSPC
+        if self.disk_full:
+            return True
+        try:
+            return shutil.disk_usage(self.workspace_root).free < WORKSPACE_MIN_FREE
+        except OSError:
+            return False
+
     def _extract_project_name(self) -> str:
         path = Path(self.project_path)
         project_name = path.name
@@ -101,6 +216,12 @@ class ProjectCompiler:
     def _get_suggested_output_name(self) -> str:
         return self.project_name
 
+    def _get_entry_name(self, main_file: str) -> str:
+        """单入口沿用项目名，多入口时以入口文件名区分各个可执行文件"""
+        if len(self.main_files) == 1:
+            return self.project_name
+        return Path(main_file).stem
+
     def _get_platform_compiler_settings(self) -> dict:
         settings = {
             'extra_compile_args': [self.config.config['Cython']['optimization_level']]
@@ -121,22 +242,111 @@ class ProjectCompiler:
 
         return settings
 
+    def _estimate_workspace_size(self) -> int:
+        source_size = 0
+        for root, _, files in os.walk(self.project_path):
+            for file in files:
+                if file.endswith('.py'):
+                    try:
+                        source_size += os.path.getsize(os.path.join(root, file))
+                    except OSError:
+                        pass
+        return source_size * WORKSPACE_SIZE_FACTOR
+
+    def _find_memory_workspace(self, required: int) -> str | None:
+        """查找剩余空间和可用内存都足够的 tmpfs 目录"""
+        candidates = ['/dev/shm', os.environ.get('XDG_RUNTIME_DIR', '')]
+        available_memory = get_available_memory()
+        if available_memory is None:
+            return None
+        for candidate in candidates:
+            if not candidate or not os.path.isdir(candidate) or not os.access(candidate, os.W_OK):
+                continue
+            if get_mount_fstype(candidate) not in MEMORY_FS_TYPES:
+                continue
+            # tmpfs 中的数据占用物理内存，两者都需满足
+            if shutil.disk_usage(candidate).free >= required and available_memory >= required:
+                return candidate
+        return None
+
+    def select_workspace(self) -> str | None:
+        """根据配置选择构建工作区，返回工作区根目录；使用项目目录时返回 None"""
+        setting = self.config.config['General'].get('workspace', 'auto').strip()
+        if setting in ('', 'disk'):
+            return None
+
+        min_free = int(self.config.config['General'].get('workspace_min_free_mb', '1024')) * 1024 * 1024
+        required = self._estimate_workspace_size() + min_free
+
+        if setting == 'auto':
+            base_dir = self._find_memory_workspace(required)
+            if not base_dir:
+                self.log("内存工作区空间不足或不可用，使用项目目录作为工作区")
+                return None
+        else:
+            base_dir = os.path.abspath(os.path.expanduser(setting))
+            try:
+                os.makedirs(base_dir, exist_ok=True)
+            except OSError as e:
+                self.log(f"警告: 无法使用工作区 {base_dir}: {e}，改用项目目录")
+                return None
+            if not os.access(base_dir, os.W_OK):
+                self.log(f"警告: 工作区 {base_dir} 不可写，改用项目目录")
+                return None
+
+        return os.path.join(base_dir, f'projectcompiler-{self.project_name}-{os.getpid()}-{uuid.uuid4().hex[:8]}')
+
+    def use_workspace(self, workspace_root: str | None):
+        """切换临时目录和PyInstaller工作目录的位置，最终产物仍写回项目目录"""
+        self.workspace_root = workspace_root
+        if workspace_root:
+            self.temp_dir = os.path.join(workspace_root, 'temp', self.project_name)
+            self.build_dir = os.path.join(workspace_root, 'build', self.project_name)
+            self.manifest.makedirs(workspace_root)
+            self.manifest.save()
+            self.log(f"构建工作区: {workspace_root}")
+        else:
+            self.temp_dir = os.path.join(self.project_path, 'temp', self.project_name)
+            self.build_dir = os.path.join(self.project_path, 'build', self.project_name)
+
+    def _report_workspace_savings(self):
+        """按工作区内的文件数量和实测的单文件开销，估算相比项目目录节省的时间"""
+        if not self.config.config['General'].getboolean('report_workspace_savings', fallback=False):
+            return
+        if not self.workspace_root or not os.path.isdir(self.workspace_root):
+            return
+        file_count = sum(len(files) for _, _, files in os.walk(self.workspace_root))
+        try:
+            disk_dir = os.path.join(self.project_path, 'temp')
+            self.manifest.makedirs(disk_dir)
+            bench_count = 200
+            workspace_time = benchmark_workspace(self.workspace_root, bench_count)
+            disk_time = benchmark_workspace(disk_dir, bench_count)
+        except OSError as e:
+            self.log(f"警告: 无法测量工作区性能: {e}")
+            return
+        saved = (disk_time - workspace_time) / bench_count * file_count
+        self.log(f"\n工作区共写入 {file_count} 个文件；小文件操作 项目目录 {disk_time / bench_count * 1000:.2f}ms/个，"
+              f"工作区 {workspace_time / bench_count * 1000:.2f}ms/个，估算节省约 {max(saved, 0):.1f}秒")
+
     def collect_python_files(self) -> Set[str]:
         python_files = set()
-        main_file_path = os.path.join(self.project_path, self.main_file)
+        main_file_paths = {os.path.normpath(os.path.join(self.project_path, main_file))
+                           for main_file in self.main_files}
 
         for root, _, files in os.walk(self.project_path):
             for file in files:
                 if file.endswith('.py') and not file.startswith('__'):
                     file_path = os.path.join(root, file)
-                    if file_path!= main_file_path:
+                    if os.path.normpath(file_path) not in main_file_paths:
                         python_files.add(file_path)
 
         return python_files
 
     def create_cython_files(self, python_files: Set[str]) -> List[str]:
         cython_files = []
-        os.makedirs(self.temp_dir, exist_ok=True)
+        self.manifest.makedirs(self.temp_dir)
+        self.manifest.save()
 
         for py_file in python_files:
             relative_path = os.path.relpath(py_file, self.project_path)
@@ -149,72 +359,85 @@ class ProjectCompiler:
 
         return cython_files
 
+    def _get_compiler_env(self) -> Dict[str, str]:
+        """生成C编译子进程的环境变量，不修改当前进程的 os.environ"""
+        overrides = {}
+        if self.compiler_settings.get('compiler_path'):
+            if self.platform == 'windows':
+                overrides['VS100COMNTOOLS'] = self.compiler_settings['compiler_path']
+            else:
+                overrides['CC'] = self.compiler_settings['compiler_path']
+                overrides['CXX'] = self.compiler_settings['compiler_path']
+        return build_env(overrides, self.base_env)
+
     def build_extensions(self, cython_files: List[str]):
+        # 只在编译时导入，连接守护进程或只查看配置时不必承担约0.6秒的导入开销
+        from setuptools.extension import Extension
+        from Cython.Build import cythonize
         try:
             extensions = []
-            original_dir = os.getcwd()
-
-            try:
-                os.chdir(str(self.temp_dir))
-
-                for pyx_file in cython_files:
-                    relative_path = os.path.relpath(pyx_file, self.temp_dir)
-                    module_name = os.path.splitext(relative_path)[0].replace(os.sep, '.')
-
-                    ext = Extension(
-                        module_name,
-                        sources=[pyx_file],
-                        extra_compile_args=self.compiler_settings['extra_compile_args'],
-                        language='c++',
-                    )
-                    extensions.append(ext)
-
-                if self.platform == 'windows':
-                    if self.compiler_settings.get('compiler_path'):
-                        os.environ['VS100COMNTOOLS'] = self.compiler_settings['compiler_path']
-                else:
-                    if self.compiler_settings.get('compiler_path'):
-                        os.environ['CC'] = self.compiler_settings['compiler_path']
-                        os.environ['CXX'] = self.compiler_settings['compiler_path']
-
-                print("开始编译...")
-                setup(
-                    name='compiled_modules',
-                    ext_modules=cythonize(
-                        extensions,
-                        compiler_directives={
-                            'language_level': '3',
-                            'boundscheck': False,
-                            'wraparound': False,
-                            'cdivision': True,  # 使用C除法
-                            'infer_types': True,  # 类型推断优化
-                            'nonecheck': False,  # 禁用None检查
-                        }
-                    ),
-                    script_args=['build_ext', '--inplace']
+            for pyx_file in cython_files:
+                relative_path = os.path.relpath(pyx_file, self.temp_dir)
+                module_name = os.path.splitext(relative_path)[0].replace(os.sep, '.')
+
+                ext = Extension(
+                    module_name,
+                    sources=[pyx_file],
+                    extra_compile_args=self.compiler_settings['extra_compile_args'],
+                    language='c++',
+                )
+                extensions.append(ext)
+
+            self._check_cancelled()
+            self.log("开始编译...")
+            # 源文件使用绝对路径，生成的C++文件位于各自的.pyx旁边，不依赖当前工作目录
+            with _CYTHONIZE_LOCK:
+                ext_modules = cythonize(
+                    extensions,
+                    quiet=True,
+                    compiler_directives={
+                        'language_level': '3',
+                        'boundscheck': False,
+                        'wraparound': False,
+                        'cdivision': True,  # 使用C除法
+                        'infer_types': True,  # 类型推断优化
+                        'nonecheck': False,  # 禁用None检查
+                    }
                 )
 
-           # 新增：将编译后的文件移动到项目目录
-                print("移动编译后的文件到项目目录...")
-                for root, _, files in os.walk(self.temp_dir):
-                    for file in files:
-                        if file.endswith(('.pyd', '.so')):  # Windows用pyd，Linux/Mac用so
-                            src_file = os.path.join(root, file)
-                            # 计算相对路径，保持目录结构
-                            rel_path = os.path.relpath(root, self.temp_dir)
-                            dst_dir = os.path.join(self.project_path, rel_path)
-                            os.makedirs(dst_dir, exist_ok=True)
-                            dst_file = os.path.join(dst_dir, file)
-                            shutil.copy2(src_file, dst_file)
-                            print(f"已移动: {os.path.relpath(dst_file, self.project_path)}")
-
-            finally:
-                os.chdir(original_dir)
+            modules = [(ext.name, os.path.relpath(ext.sources[0], self.temp_dir)) for ext in ext_modules]
+            setup_script = os.path.join(self.temp_dir, 'setup_build.py')
+            with open(setup_script, 'w', encoding='utf-8') as f:
+                f.write(SETUP_SCRIPT_TEMPLATE.format(
+                    extra_compile_args=self.compiler_settings['extra_compile_args'],
+                    modules=modules,
+                    jobs=self._get_compile_jobs(),
+                ))
+
+            result = self._run_step([sys.executable, setup_script], self.temp_dir, self._get_compiler_env())
+            if result != 0:
+                raise RuntimeError(f"C/C++ 编译失败 (返回码 {result})")
+
+            # 将编译后的文件移动到项目目录
+            self.log("移动编译后的文件到项目目录...")
+            for root, dirs, files in os.walk(self.temp_dir):
+                if root == self.temp_dir and 'build' in dirs:
+                    dirs.remove('build')  # setuptools 的中间目录，其中的扩展模块已复制到源码旁
+                for file in files:
+                    if file.endswith(('.pyd', '.so')):  # Windows用pyd，Linux/Mac用so
+                        src_file = os.path.join(root, file)
+                        # 计算相对路径，保持目录结构
+                        rel_path = os.path.relpath(root, self.temp_dir)
+                        dst_dir = os.path.join(self.project_path, rel_path)
+                        self.manifest.makedirs(dst_dir)
+                        dst_file = os.path.join(dst_dir, file)
+                        self.manifest.copy_file(src_file, dst_file)
+                        self.log(f"已移动: {os.path.relpath(dst_file, self.project_path)}")
+            self.manifest.save()
 
         except Exception as e:
-            print(f"编译错误: {str(e)}")
-            print(f"当前工作目录: {os.getcwd()}")
-            print(f"临时目录: {self.temp_dir}")
+            self.log(f"编译错误: {str(e)}")
+            self.log(f"临时目录: {self.temp_dir}")
             raise
 
     def collect_resource_files(self) -> List[tuple]:
@@ -236,7 +459,12 @@ class ProjectCompiler:
         
         return resource_files
 
-    def create_pyinstaller_spec(self):
+    def create_pyinstaller_spec(self, main_files: List[str] = None, spec_name: str = 'project',
+                                collect_name: str = None) -> str:
+        """生成PyInstaller规范文件，多个入口共享一个COLLECT"""
+        main_files = main_files or self.main_files
+        collect_name = collect_name or self.project_name
+
         # 收集资源文件
         resource_files = self.collect_resource_files()
         
@@ -252,12 +480,37 @@ class ProjectCompiler:
         # 转换资源文件列表为PyInstaller格式
         datas_str = repr([(src, os.path.dirname(dst) or '.') for src, dst in resource_files])
         binaries_str = repr(binaries)
-        
-        spec_content = f"""
+
+        spec_content = """
 # -*- mode: python ; coding: utf-8 -*-
+"""
+        collect_items = []
+        for index, main_file in enumerate(main_files):
+            spec_content += self._create_entry_spec(index, main_file, binaries_str, datas_str)
+            collect_items.append(f'exe_{index}')
+        for index in range(len(main_files)):
+            collect_items.extend([f'a_{index}.binaries', f'a_{index}.zipfiles', f'a_{index}.datas'])
+
+        # COLLECT 会按目标路径去重，多个入口共用的扩展模块和资源只保留一份
+        spec_content += f"""
+coll = COLLECT(
+    {(',' + chr(10) + '    ').join(collect_items)},
+    strip=False,
+    upx=True,
+    upx_exclude=[],
+    name='{collect_name}'
+)
+"""
+        spec_file = os.path.join(self.project_path, f'{spec_name}.spec')
+        with open(spec_file, 'w') as f:
+            f.write(spec_content)
+        return spec_file
 
-a = Analysis(
-    [r'{self.main_file}'],
+    def _create_entry_spec(self, index: int, main_file: str, binaries_str: str, datas_str: str) -> str:
+        """生成单个入口的 Analysis/PYZ/EXE 片段"""
+        return f"""
+a_{index} = Analysis(
+    [r'{main_file}'],
     pathex=[r'{self.project_path}'],
     binaries={binaries_str},
     datas={datas_str},
@@ -270,22 +523,22 @@ a = Analysis(
 )
 
 # 删除所有.py和.pyc文件
-for d in a.datas.copy():
+for d in a_{index}.datas.copy():
     if d[0].endswith(('.py', '.pyc', '.pyo')):
-        a.datas.remove(d)
+        a_{index}.datas.remove(d)
 
 # 删除所有Python模块的.py和.pyc文件
-for d in a.pure.copy():
-    if d[0] + '.py' in [x[0] for x in a.pure]:
-        a.pure.remove(d)
-
-pyz = PYZ(a.pure)
-exe = EXE(
-    pyz,
-    a.scripts,
+for d in a_{index}.pure.copy():
+    if d[0] + '.py' in [x[0] for x in a_{index}.pure]:
+        a_{index}.pure.remove(d)
+
+pyz_{index} = PYZ(a_{index}.pure)
+exe_{index} = EXE(
+    pyz_{index},
+    a_{index}.scripts,
     [],
     exclude_binaries=True,
-    name='{self.project_name}',
+    name='{self._get_entry_name(main_file)}',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
@@ -297,126 +550,261 @@ exe = EXE(
     codesign_identity=None,
     entitlements_file=None,
 )
-coll = COLLECT(
-    exe,
-    a.binaries,
-    a.zipfiles,
-    a.datas,
-    strip=False,
-    upx=True,
-    upx_exclude=[],
-    name='{self.project_name}'
-)
 """
-        spec_file = os.path.join(self.project_path, 'project.spec')
-        with open(spec_file, 'w') as f:
-            f.write(spec_content)
-        return spec_file
+
+    def _get_compile_jobs(self) -> int:
+        value = self.config.config['Cython'].get('jobs', 'auto')
+        if value == 'auto':
+            return os.cpu_count() or 1
+        return max(1, int(value))
+
+    def _get_parallel_builds(self) -> int:
+        value = self.config.config['PyInstaller'].get('parallel_builds', 'auto')
+        if value == 'auto':
+            return max(1, min(len(self.main_files), os.cpu_count() or 1))
+        return max(1, int(value))
+
+    def get_output_dirs(self) -> List[str]:
+        """返回PyInstaller打包后的输出目录"""
+        dist_root = os.path.join(self.project_path, 'dist')
+        mode = self.config.config['PyInstaller'].get('multi_entry_mode', 'collect')
+        if len(self.main_files) > 1 and mode == 'separate':
+            return [os.path.join(dist_root, self._get_entry_name(m)) for m in self.main_files]
+        return [self.dist_dir]
+
+    def _run_pyinstaller(self, spec_file: str, workpath: str = None) -> int:
+        """在项目目录中运行PyInstaller，输出目录固定为项目的 dist 目录"""
+        command = ['pyinstaller', '--noconfirm', spec_file,
+                   '--distpath', os.path.join(self.project_path, 'dist')]
+        if workpath:
+            command += ['--workpath', workpath]
+        return self._run_step(command, self.project_path)
+
+    def package_entries(self) -> Dict[str, float]:
+        """打包所有入口，返回各次PyInstaller运行的耗时"""
+        mode = self.config.config['PyInstaller'].get('multi_entry_mode', 'collect')
+        if len(self.main_files) == 1 or mode != 'separate':
+            self.log("4. 创建PyInstaller规范文件...")
+            spec_file = self.create_pyinstaller_spec()
+
+            self.log("5. 使用PyInstaller打包...")
+            start_time = time.time()
+            result = self._run_pyinstaller(spec_file, self.build_dir if self.workspace_root else None)
+            if result != 0:
+                raise RuntimeError(f"PyInstaller 打包失败 (返回码 {result})")
+            return {self.project_name: time.time() - start_time}
+
+        self.log("4. 为每个入口创建PyInstaller规范文件...")
+        spec_files = {}
+        for main_file in self.main_files:
+            entry_name = self._get_entry_name(main_file)
+            spec_files[entry_name] = self.create_pyinstaller_spec(
+                [main_file], spec_name=f'project_{entry_name}', collect_name=entry_name)
+
+        jobs = self._get_parallel_builds()
+        self.log(f"5. 使用PyInstaller并行打包 ({len(spec_files)} 个入口, {jobs} 个并行任务)...")
+
+        def run_pyinstaller(item):
+            entry_name, spec_file = item
+            start_time = time.time()
+            # 每个规范文件名不同，PyInstaller 的工作目录 build/<spec名> 也互不冲突
+            workpath = os.path.join(self.build_dir, entry_name) if self.workspace_root else None
+            result = self._run_pyinstaller(spec_file, workpath)
+            if result != 0:
+                self.log(f"入口 {entry_name} 打包失败 (返回码 {result})")
+            return entry_name, time.time() - start_time, result
+
+        # 等所有入口都结束后再报告失败，其他入口的输出仍然完整
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(run_pyinstaller, spec_files.items()))
+        failed = [entry_name for entry_name, _, result in results if result != 0]
+        if failed:
+            raise RuntimeError(f"PyInstaller 打包失败的入口: {', '.join(failed)}")
+        return {entry_name: elapsed for entry_name, elapsed, _ in results}
+
+    def _report_batch_savings(self, compile_time: float, package_times: Dict[str, float], total_time: float):
+        """估算与逐个入口顺序构建相比节省的时间"""
+        if len(self.main_files) == 1:
+            return
+        # 顺序构建时每个入口都要重新执行一次 Cython 编译和 PyInstaller 打包
+        sequential_time = compile_time * len(self.main_files) + sum(package_times.values())
+        saved_time = sequential_time - total_time
+        self.log(f"\n多入口构建: {len(self.main_files)} 个入口，共享编译阶段用时 {compile_time:.1f}秒")
+        for entry_name, elapsed in package_times.items():
+            self.log(f"  打包 {entry_name}: {elapsed:.1f}秒")
+        self.log(f"顺序构建估算用时: {sequential_time:.1f}秒，实际用时: {total_time:.1f}秒，"
+              f"节省约 {max(saved_time, 0):.1f}秒")
 
     def compile_project(self):
         self._show_config()
         
         # 添加重要警告信息
-        print("\n!!! 重要提示 !!!")
-        print("=" * 50)
-        print("为确保编译后程序正常运行，请确保：")
-        print("1. 核心逻辑代码放在主入口文件引用的子模块中")
-        print("2. 在主入口文件中导入所有子模块需要的外部库")
-        print("3. 避免在子模块中直接导入外部库")
-        print("=" * 50)
+        self.log("\n!!! 重要提示 !!!")
+        self.log("=" * 50)
+        self.log("为确保编译后程序正常运行，请确保：")
+        self.log("1. 核心逻辑代码放在主入口文件引用的子模块中")
+        self.log("2. 在主入口文件中导入所有子模块需要的外部库")
+        self.log("3. 避免在子模块中直接导入外部库")
+        self.log("=" * 50)
         
         # 修改确认逻辑，检查配置中的confirm_before_compile
         if self.config.config['General'].getboolean('confirm_before_compile'):
             if not input("\n我已经确认了以上事项 (y/N): ").lower() == 'y':
-                print("取消编译")
+                self.log("取消编译")
                 return
             
             # 第二次确认也应该被跳过
             if not self._confirm_compile():
-                print("取消编译")
+                self.log("取消编译")
                 return
 
         start_time = time.time()
 
         try:
-            print("1. 收集Python文件...")
-            python_files = self.collect_python_files()
-
-            print("2. 创建Cython文件...")
-            cython_files = self.create_cython_files(python_files)
-
-            print("3. 编译扩展模块...")
-            self.build_extensions(cython_files)
-
-            print("4. 创建PyInstaller规范文件...")
-            spec_file = self.create_pyinstaller_spec()
-
-            print("5. 使用PyInstaller打包...")
-            os.system(f"pyinstaller {spec_file}")
+            self.use_workspace(self.select_workspace())
+            try:
+                self._compile_extensions()
+            except (OSError, RuntimeError) as e:
+                if not self._workspace_exhausted(e):
+                    raise
+                # 内存工作区空间耗尽时回退到项目目录重新编译
+                self.log("警告: 内存工作区空间不足，改用项目目录重新编译...")
+                shutil.rmtree(self.workspace_root, ignore_errors=True)
+                self.disk_full = False
+                self.use_workspace(None)
+                self._compile_extensions()
+            compile_time = time.time() - start_time
+
+            package_times = self.package_entries()
+            self._report_workspace_savings()
 
             if self.config.config['General'].getboolean('clean_temp'):
-                print("6. 清理临时文件...")
+                self.log("6. 清理临时文件...")
                 self.cleanup()
             else:
-                print("跳过清理临时文件...")
+                self.log("跳过清理临时文件...")
 
             total_time = time.time() - start_time
             minutes = int(total_time // 60)
             seconds = total_time % 60
 
-            print(f"\n编译完成！总用时: {minutes}分{seconds:.1f}秒")
-            print("请检查PyInstaller输出以防发行版打包过程出错。如果成功，输出文件在 dist 目录中。")
+            self._report_batch_savings(compile_time, package_times, total_time)
+            self.log(f"\n编译完成！总用时: {minutes}分{seconds:.1f}秒")
+            self.log("请检查PyInstaller输出以防发行版打包过程出错。如果成功，输出文件在 dist 目录中。")
 
         except Exception as e:
-            print(f"编译过程中出错: {str(e)}")
+            self.log(f"编译过程中出错: {str(e)}")
             self.cleanup()
             raise
 
+    def _compile_extensions(self):
+        self.log("1. 收集Python文件...")
+        python_files = self.collect_python_files()
+
+        self._check_cancelled()
+        self.log("2. 创建Cython文件...")
+        cython_files = self.create_cython_files(python_files)
+
+        self._check_cancelled()
+        self.log("3. 编译扩展模块...")
+        self.build_extensions(cython_files)
+
     def _show_config(self):
-        print("\n=== 当前配置 ===")
+        self.log("\n=== 当前配置 ===")
         for section in self.config.config.sections():
-            print(f"\n[{section}]")
+            self.log(f"\n[{section}]")
             for key, value in self.config.config[section].items():
-                print(f"{key} = {value}")
-        print("\n")
+                self.log(f"{key} = {value}")
+        self.log("\n")
 
     def _confirm_compile(self) -> bool:
         return input("确认执行编译? (y/N): ").lower() == 'y'
 
     def cleanup(self):
-        """清理临时文件和已复制的编译文件"""
-        dirs_to_clean = [self.temp_dir]
-        
-        # 如果设置了清理临时文件，也清理项目目录中的pyd/so文件
-        if self.config.config['General'].getboolean('clean_temp'):
-            print("清理编译生成的文件...")
-            for root, _, files in os.walk(self.project_path):
-                for file in files:
-                    if file.endswith(('.pyd', '.so')):
-                        try:
-                            os.remove(os.path.join(root, file))
-                        except Exception as e:
-                            print(f"警告: 无法删除文件 {file}: {e}")
+        """按构建清单清理临时目录和已复制的编译文件，项目中原有的pyd/so不受影响"""
+        self.log("清理编译生成的文件...")
+        removed = self.manifest.cleanup()
+        self.log(f"已清理 {removed} 个构建产物")
+
+
+def stress_test(project_path: str, main_files: List[str], count: int, config: CompilerConfig = None) -> bool:
+    """在同一进程中并发运行 count 个构建，检查各构建互不干扰且未修改进程全局状态"""
+    config = config or CompilerConfig()
+    config.config['General']['confirm_before_compile'] = 'false'
+    cwd_before = os.getcwd()
+    env_before = dict(os.environ)
+    stdout_before = sys.stdout
+    stress_root = tempfile.mkdtemp(prefix='projectcompiler-stress-')
+    project_name = Path(os.path.abspath(project_path)).name
+
+    def run_build(index: int):
+        # 每个构建使用独立的项目副本和输出流
+        copy_path = os.path.join(stress_root, f'{project_name}_{index}')
+        shutil.copytree(project_path, copy_path,
+                        ignore=shutil.ignore_patterns('build', 'dist', 'temp', '__pycache__'))
+        output = io.StringIO()
+        start_time = time.time()
+        try:
+            compiler = ProjectCompiler(copy_path, main_files, config, output=output)
+            compiler.compile_project()
+            success = all(os.path.isdir(d) for d in compiler.get_output_dirs())
+        except Exception as e:
+            output.write(f"错误: {e}\n")
+            success = False
+        return index, success, time.time() - start_time, output.getvalue()
+
+    print(f"并发运行 {count} 个构建...")
+    start_time = time.time()
+    try:
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            results = list(executor.map(run_build, range(count)))
+    finally:
+        shutil.rmtree(stress_root, ignore_errors=True)
+
+    all_passed = True
+    for index, success, elapsed, log in results:
+        print(f"构建 #{index}: {'成功' if success else '失败'} ({elapsed:.1f}秒)")
+        if not success:
+            all_passed = False
+            print(log)
+
+    state_checks = {
+        '工作目录': os.getcwd() == cwd_before,
+        '环境变量': dict(os.environ) == env_before,
+        '标准输出': sys.stdout is stdout_before,
+    }
+    for name, unchanged in state_checks.items():
+        print(f"{name}: {'未改变' if unchanged else '被修改'}")
+        all_passed = all_passed and unchanged
 
-        for dir_path in dirs_to_clean:
-            if os.path.exists(dir_path):
-                shutil.rmtree(dir_path)
+    print(f"\n压力测试{'通过' if all_passed else '失败'}，总用时 {time.time() - start_time:.1f}秒")
+    return all_passed
 
 
 def main():
     show_tool_info()
     parser = argparse.ArgumentParser(description=f'ProjectCompiler 中一个用于编译、打包 Python 3 项目的全平台开发者实用工具。')
     parser.add_argument('project_path', nargs='?', help='项目路径')
-    parser.add_argument('main_file', nargs='?', help='主入口文件')
+    parser.add_argument('main_file', nargs='*', help='主入口文件，可指定多个以共享一次编译')
     parser.add_argument('--output', '-o', help='输出文件名')
     parser.add_argument('--yes', '-y', action='store_true', help='自动确认所有提示')
 
     parser.add_argument('--config', action='store_true', help='配置模式')
     parser.add_argument('--general_clean_temp', type=bool, help='是否清理临时文件')
     parser.add_argument('--general_compiler_path', help='编译器路径')
+    parser.add_argument('--general_workspace', help='构建工作区: auto/disk/目录路径')
+    parser.add_argument('--general_report_workspace_savings', choices=['true', 'false'],
+                        help='构建后测量并估算内存工作区节省的时间')
+    parser.add_argument('--benchmark-workspace', action='store_true', help='比较内存工作区与项目目录的小文件读写性能')
+    parser.add_argument('--stress-test', type=int, metavar='N', help='在同一进程中并发运行N个构建以检查并发安全性')
+    parser.add_argument('--no-daemon', action='store_true', help='不使用构建守护进程，始终在本进程中构建')
     parser.add_argument('--pyinstaller_output_name', help='输出文件名')
     parser.add_argument('--pyinstaller_console', type=bool, help='是否显示控制台')
     parser.add_argument('--pyinstaller_one_file', type=bool, help='是否打包为单文件')
+    parser.add_argument('--pyinstaller_multi_entry_mode', choices=['collect', 'separate'],
+                        help='多入口打包方式: collect 共享一个COLLECT / separate 并行独立打包')
+    parser.add_argument('--pyinstaller_parallel_builds', help='separate 模式下并行的 PyInstaller 进程数')
+    parser.add_argument('--cython_jobs', help='并行编译扩展模块的进程数 (auto 或数字)')
 
     args = parser.parse_args()
     config = CompilerConfig()
@@ -425,6 +813,17 @@ def main():
         _interactive_config(config)
         return
 
+    if args.benchmark_workspace:
+        _benchmark_workspace(args.project_path or cwd)
+        return
+
+    if args.stress_test:
+        if not args.project_path or not args.main_file:
+            print("错误: 压力测试需要指定项目路径和主入口文件")
+            sys.exit(1)
+        config.update_from_args(vars(args))
+        sys.exit(0 if stress_test(args.project_path, args.main_file, args.stress_test, config) else 1)
+
     if not all([args.project_path, args.main_file, args.output]):
         print("=== 交互模式 ===")
         _interactive_input(args)
@@ -434,12 +833,53 @@ def main():
         compiler = ProjectCompiler(args.project_path, args.main_file, config)
         if args.yes:
             compiler.config.config['General']['confirm_before_compile'] = 'false'
+        if not args.no_daemon and build_daemon.is_running():
+            _compile_with_daemon(compiler)
+            return
         compiler.compile_project()
     except Exception as e:
         print(f"错误: {str(e)}")
         sys.exit(1)
 
 
+def _benchmark_workspace(project_path: str):
+    """比较项目目录与可用的 tmpfs 工作区在小文件读写上的耗时"""
+    locations = {'项目目录': os.path.abspath(project_path)}
+    for candidate in ['/dev/shm', os.environ.get('XDG_RUNTIME_DIR', '')]:
+        if candidate and os.path.isdir(candidate) and get_mount_fstype(candidate) in MEMORY_FS_TYPES:
+            locations[candidate] = candidate
+
+    file_count = 2000
+    results = {}
+    for name, path in locations.items():
+        try:
+            results[name] = benchmark_workspace(path, file_count)
+            print(f"{name}: {file_count} 个小文件 {results[name]:.3f}秒")
+        except OSError as e:
+            print(f"{name}: 无法测试 ({e})")
+
+    disk_time = results.pop('项目目录', None)
+    for name, elapsed in results.items():
+        if disk_time:
+            print(f"{name} 相比项目目录快 {disk_time / elapsed:.1f} 倍，每千个文件节省 {(disk_time - elapsed) / file_count * 1000:.2f}秒")
+
+
+def _compile_with_daemon(compiler: ProjectCompiler):
+    """守护进程运行时由其执行构建，本进程只负责确认和输出日志"""
+    if compiler.config.config['General'].getboolean('confirm_before_compile'):
+        if not compiler._confirm_compile():
+            print("取消编译")
+            return
+    print("检测到构建守护进程，提交构建任务...")
+    ok = build_daemon.submit_job('cython', compiler.project_path, compiler.main_files,
+                                 compiler.config.get_config_dict())
+    if ok is None:
+        print("构建守护进程不可用，改为本地构建")
+        compiler.compile_project()
+    elif not ok:
+        sys.exit(1)
+
+
 def _interactive_config(config: CompilerConfig):
     show_tool_info()
     print("=== 配置模式 ===")
@@ -459,7 +899,7 @@ def _interactive_input(args):
     if not args.project_path:
         args.project_path = input("请输入项目路径: ").strip()
     if not args.main_file:
-        args.main_file = input("请输入主入口文件: ").strip()
+        args.main_file = [f.strip() for f in input("请输入主入口文件 (多个以逗号分隔): ").split(',') if f.strip()]
     if not args.output:
         suggested_name = ProjectCompiler(args.project_path, args.main_file)._get_suggested_output_name()
         args.output = input(f"请输入输出文件名 [{suggested_name}]: ").strip() or suggested_name
@@ -1,16 +1,32 @@
+import io
 import os
+import re
 import sys
+import json
 import time
 import shutil
 import argparse
+import threading
+import statistics
 import configparser
-import subprocess
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, TextIO, List, Dict, Any, Tuple
 from pathlib import Path
+from process_runner import run_process, format_usage, ProcessTimeout, ProcessCancelled
+from node_pool import NodeWorkerPool, get_node_path, find_package_version
+from content_cache import ContentCache, hash_file
+from build_manifest import BuildManifest
+from build_progress import BatchProgress
+import html_minifier
+import js_minifier
+import asset_minifiers
 
 TOOL_NAME = "HTML 项目混淆工具"
 VERSION = "0.1.0"
 
+# 处理方式 -> 显示名称
+ENGINES = {'python': '内置压缩器', 'pool': '常驻工作进程', 'cli': '逐个文件启动命令'}
+
 def show_tool_info():
     print(f"\n{TOOL_NAME} v{VERSION}")
     print("="*50 + "\n")
@@ -19,7 +35,19 @@ class ObfuscatorConfig:
     DEFAULT_CONFIG = {
         'General': {
             'clean_temp': 'true',
-            'confirm_before_process': 'true'
+            'confirm_before_process': 'true',
+            'step_timeout': '120',  # 处理单个文件的时限（秒），超时终止整个进程树，0 为不限制
+            # python: 内置的流式压缩器，内存占用与文件大小无关；pool: 常驻Node工作进程运行 html-minifier-terser；
+            # cli: 每个文件启动一次 html-minifier-terser
+            'engine': 'python',
+            'workers': 'auto',  # 同时处理的文件数（工作进程数），auto 为CPU核数
+            # python 引擎把小文件合并为一个请求交给工作进程，减少进程间通信的次数
+            'batch_size_kb': '256',
+            'slowest_files': '10',  # 结束时列出用时最长的文件数
+            # 按文件内容、压缩选项和压缩器版本缓存输出，未修改的文件直接使用缓存
+            'cache': 'true',
+            'cache_dir': '',  # 默认 ~/.projectcompiler/html_cache
+            'cache_max_size_mb': '1024'
         },
         'Minifier': {
             'collapse_whitespace': 'true',
@@ -32,8 +60,19 @@ class ObfuscatorConfig:
             'minify_css': 'true',
             'minify_js': 'true',
             'decode_entities': 'true'
+        },
+        # 与HTML一起压缩并输出到 dist 的静态资源类型，由内置压缩器处理
+        'Assets': {
+            'css': 'true',
+            'svg': 'true',
+            # 项目中的JSON多为工具配置，默认不处理；启用时跳过 CONFIG_JSON_FILES 中的配置和锁文件
+            'json': 'false'
         }
     }
+    HTML_EXTENSIONS = ('.html', '.htm')
+    # 包管理器、编译器和编辑器的配置文件，不属于网页资源，其中一些允许注释，不是严格的JSON
+    CONFIG_JSON_FILES = re.compile(r'(package(-lock)?|npm-shrinkwrap|bower|composer|(ts|js)config(\..+)?)\.json$',
+                                   re.IGNORECASE)
 
     def __init__(self):
         self.config = configparser.ConfigParser()
@@ -58,25 +97,58 @@ class ObfuscatorConfig:
                     self.config[section][key] = str(args[arg_name])
 
 class HTMLObfuscator:
-    def __init__(self, project_path: str | Path, config: ObfuscatorConfig = None):
+    def __init__(self, project_path: str | Path, config: ObfuscatorConfig = None, output: TextIO = None,
+                 cancel_event: threading.Event = None):
         if not Path(project_path).exists():
             raise ValueError(f"项目路径不存在: {project_path}")
         self.project_path = os.path.abspath(project_path)
         self.output_dir = os.path.join(self.project_path, 'dist')
         self.config = config or ObfuscatorConfig()
+        # 输出流为 None 时使用调用时的 sys.stdout
+        self.output = output
+        # 被设置时终止正在运行的子进程，用于从界面停止处理；按 Ctrl+C 时也通过它停止所有并行任务
+        self.cancel_event = cancel_event or threading.Event()
+        self.step_timeout = float(self.config.config['General'].get('step_timeout', '0')) or None
+        self.executable = None
+        # 所有子进程的CPU时间合计和最大峰值内存
+        self.child_usage = {'cpu_time': 0.0, 'peak_rss': 0}
+        self.get_engine()
+        self._lock = threading.Lock()
+
+    def log(self, *args, **kwargs):
+        print(*args, file=self.output or sys.stdout, **kwargs)
+
+    def get_engine(self) -> str:
+        engine = self.config.config['General'].get('engine', 'python')
+        if engine not in ENGINES:
+            raise ValueError(f"不支持的处理方式: {engine}")
+        return engine
+
+    def get_extensions(self) -> Tuple[str, ...]:
+        """需要处理的扩展名：HTML和 [Assets] 中启用的静态资源类型"""
+        assets = self.config.config['Assets']
+        return ObfuscatorConfig.HTML_EXTENSIONS + tuple(
+            f'.{key}' for key in assets if assets.getboolean(key) and f'.{key}' in asset_minifiers.MINIFIERS)
 
     def collect_html_files(self) -> List[str]:
-        """收集所有HTML文件"""
+        """收集所有HTML文件和启用的静态资源文件"""
         html_files = []
         exclude_dirs = {'node_modules', 'dist', '.git', '.svn'}
-        
+        extensions = self.get_extensions()
+
         for root, dirs, files in os.walk(self.project_path):
-            dirs[:] = [d for d in dirs if d not in exclude_dirs]
+            # .vscode、.idea 等隐藏目录中是工具的配置
+            dirs[:] = [d for d in dirs if d not in exclude_dirs and not d.startswith('.')]
             for file in files:
-                if file.endswith(('.html', '.htm')):
+                if file.lower().endswith(extensions) and not ObfuscatorConfig.CONFIG_JSON_FILES.match(file):
                     html_files.append(os.path.join(root, file))
         return html_files
 
+    @staticmethod
+    def get_file_type(file: str) -> str:
+        extension = os.path.splitext(file)[1].lower()
+        return 'html' if extension in ObfuscatorConfig.HTML_EXTENSIONS else extension[1:]
+
     def create_minifier_config(self) -> dict:
         """创建混淆器配置"""
         min_config = {}
@@ -84,61 +156,398 @@ class HTMLObfuscator:
             min_config[key] = value.lower() == 'true'
         return min_config
 
+    def get_output_path(self, html_file: str) -> str:
+        return os.path.join(self.output_dir, os.path.relpath(html_file, self.project_path))
+
+    def _get_workers(self) -> int:
+        value = self.config.config['General'].get('workers', 'auto')
+        if value == 'auto':
+            return os.cpu_count() or 1
+        return max(1, int(value))
+
+    def get_library_options(self) -> dict:
+        """把配置项名 (collapse_whitespace) 转换为 html-minifier-terser 的选项名 (collapseWhitespace)"""
+        options = {}
+        for key, value in self.create_minifier_config().items():
+            head, *rest = key.split('_')
+            name = head + ''.join(part.capitalize() for part in rest)
+            options[{'minifyCss': 'minifyCSS', 'minifyJs': 'minifyJS'}.get(name, name)] = value
+        return options
+
+    def _get_cache(self) -> ContentCache | None:
+        general = self.config.config['General']
+        if not general.getboolean('cache', fallback=True):
+            return None
+        cache_dir = general.get('cache_dir', '') or str(Path.home() / '.projectcompiler' / 'html_cache')
+        return ContentCache(cache_dir, int(general.get('cache_max_size_mb', '1024')), suffix='.html')
+
+    def _get_engine_version(self, engine: str, file_type: str = 'html') -> str | None:
+        if file_type != 'html':
+            # 静态资源总是由内置压缩器处理，类型也区分了内容相同的不同文件
+            return f'{file_type}-python-{asset_minifiers.VERSION}+js-{js_minifier.VERSION}'
+        if engine == 'python':
+            # 内联脚本和样式由 js_minifier 和 asset_minifiers 压缩，其版本同样影响输出
+            return f'python-{html_minifier.VERSION}+js-{js_minifier.VERSION}+css-{asset_minifiers.VERSION}'
+        version = find_package_version('html-minifier-terser', get_node_path(self.project_path))
+        return f'html-minifier-terser {version}' if version else None
+
+    def _lookup_cache(self, cache: ContentCache, html_files: List[str], engine: str) -> Dict[str, str | None]:
+        """把命中缓存的文件直接写入输出目录，返回未命中的文件 -> 缓存键"""
+        versions = {}
+        options = self.create_minifier_config()
+        pending = {}
+        for file in html_files:
+            file_type = self.get_file_type(file)
+            if file_type not in versions:
+                versions[file_type] = self._get_engine_version(engine, file_type)
+                if versions[file_type] is None:
+                    self.log("警告: 无法确定 html-minifier-terser 的版本，本次HTML文件不使用缓存")
+            if versions[file_type] is None:
+                pending[file] = None
+                continue
+            key = ContentCache.make_key(hash_file(file), options, versions[file_type])
+            output_path = self.get_output_path(file)
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            if not cache.get(key, output_path):
+                pending[file] = key
+        return pending
+
+    def _report_cache(self, cache: ContentCache, cached_bytes: int, processed_bytes: int, process_seconds: float):
+        """输出缓存命中率，并按累计的处理速度估算节省的时间"""
+        total = cache.hits + cache.misses
+        # 历次运行累计的处理字节数和用时，只处理了少量文件时估算的速度也不会失真
+        stats_path = os.path.join(cache.cache_dir, 'throughput.json')
+        try:
+            with open(stats_path, 'r', encoding='utf-8') as f:
+                history = json.load(f)
+        except (OSError, ValueError):
+            history = {}
+        history = {'bytes': history.get('bytes', 0) + processed_bytes,
+                   'seconds': history.get('seconds', 0.0) + process_seconds}
+        if processed_bytes:
+            try:
+                os.makedirs(cache.cache_dir, exist_ok=True)
+                with open(stats_path, 'w', encoding='utf-8') as f:
+                    json.dump(history, f)
+            except OSError:
+                pass
+
+        line = f"缓存命中 {cache.hits}/{total} ({cache.hits / total if total else 0:.1%})"
+        if cache.hits and history['bytes'] and history['seconds']:
+            speed = history['bytes'] / history['seconds']
+            line += f"，节省约 {cached_bytes / speed:.1f}秒 (按 {speed / 1024 / 1024:.2f}MB/秒 估算)"
+        self.log(line)
+
+    def _prune_stale_outputs(self, html_files: List[str], failed: List[str]) -> int:
+        """删除以前写出、但源文件已不存在或其类型已不再处理的输出文件，并记录本次写出的文件，返回删除的文件数；
+        输出目录中不是本工具写出的文件（如打包工具的输出）不受影响"""
+        manifest = BuildManifest(BuildManifest.default_path('compress_html-outputs', self.output_dir), output=self.output)
+        removed = manifest.prune_files(map(self.get_output_path, html_files), self.output_dir)
+        for file in html_files:
+            if file not in failed:
+                manifest.add_file(self.get_output_path(file))
+        manifest.save()
+        return removed
+
     def minify_file(self, html_file: str) -> bool:
         """混淆单个HTML文件"""
-        rel_path = os.path.relpath(html_file, self.project_path)
-        output_path = os.path.join(self.output_dir, rel_path)
+        if self.cancel_event.is_set():
+            raise ProcessCancelled("操作已取消")
+        output_path = self.get_output_path(html_file)
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
         config = self.create_minifier_config()
-        config_str = ' '.join([f'--{k.replace("_", "-")}' for k, v in config.items() if v])
-        
-        try:
-            cmd = f'html-minifier-terser "{html_file}" -o "{output_path}" {config_str}'
-            result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-            
-            if result.returncode != 0:
-                print(f"混淆失败 {html_file}: {result.stderr}")
+        if self.get_engine() == 'python' or self.get_file_type(html_file) != 'html':
+            try:
+                asset_minifiers.get_minifier(html_file)(html_file, output_path, config)
+            except (OSError, ValueError) as e:
+                self.log(f"混淆失败 {html_file}: {e}")
                 return False
             return True
-        except Exception as e:
-            print(f"处理文件时出错 {html_file}: {str(e)}")
+
+        args = [html_file, '-o', output_path]
+        args += [f'--{k.replace("_", "-")}' for k, v in config.items() if v]
+        return self._run_tool(args, html_file)
+
+    def _find_executable(self) -> str:
+        # Windows 上npm安装的命令是 .cmd 脚本，需要解析出完整路径才能不经过shell执行
+        executable = shutil.which('html-minifier-terser')
+        if not executable:
+            raise RuntimeError("未找到 html-minifier-terser，请先执行 npm install -g html-minifier-terser")
+        return executable
+
+    def _run_tool(self, args: List[str], source_file: str) -> bool:
+        """运行一次 html-minifier-terser，失败时输出其错误信息"""
+        if self.executable is None:
+            self.executable = self._find_executable()
+        captured = io.StringIO()
+        usage = {}
+        try:
+            result = run_process([self.executable, *args], output=captured, cancel_event=self.cancel_event,
+                                 resource_usage=usage, timeout=self.step_timeout)
+        except (OSError, ProcessTimeout) as e:
+            self.log(f"混淆失败 {source_file}: {e}")
             return False
+        if usage:
+            with self._lock:
+                self.child_usage['cpu_time'] += usage['cpu_time']
+                self.child_usage['peak_rss'] = max(self.child_usage['peak_rss'], usage['peak_rss'])
+        if result != 0:
+            self.log(f"混淆失败 {source_file}: {captured.getvalue()}")
+            return False
+        return True
+
+    def _make_batches(self, html_files: List[str], sizes: Dict[str, int]) -> List[List[Tuple[str, str]]]:
+        """按顺序把文件分组，每组的总大小不超过 batch_size_kb，超过的文件单独一组"""
+        limit = int(self.config.config['General'].get('batch_size_kb', '256')) * 1024
+        batches, batch, batch_size = [], [], 0
+        for file in html_files:
+            if batch and batch_size + sizes[file] > limit:
+                batches.append(batch)
+                batch, batch_size = [], 0
+            batch.append((file, self.get_output_path(file)))
+            batch_size += sizes[file]
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _minify_with_python(self, html_files: List[str], sizes: Dict[str, int],
+                            on_done: Callable[[str, bool, float], None]):
+        """用内置压缩器在多个进程中处理，HTML和各类静态资源使用同一组工作进程，小文件合并为一个请求；
+        只有一个工作进程时直接在当前进程中处理"""
+        options = self.create_minifier_config()
+
+        def finish(results: List[Dict[str, Any]]):
+            for result in results:
+                if not result['ok']:
+                    self.log(f"混淆失败 {os.path.relpath(result['source'], self.project_path)}: {result['error']}")
+                on_done(result['source'], result['ok'], result['seconds'])
+
+        batches = self._make_batches(html_files, sizes)
+        workers = min(self._get_workers(), len(batches))
+        if workers == 1:
+            for batch in batches:
+                if self.cancel_event.is_set():
+                    raise ProcessCancelled("操作已取消")
+                finish(html_minifier.minify_batch(batch, options))
+            return
+
+        executor = ProcessPoolExecutor(max_workers=workers)
+        pending = iter(batches)
+        running = set()
+        try:
+            while True:
+                # 只提交有限个请求，文件很多时不会一次创建全部任务
+                while len(running) < workers * 2:
+                    batch = next(pending, None)
+                    if batch is None:
+                        break
+                    running.add(executor.submit(html_minifier.minify_batch, batch, options))
+                if not running:
+                    break
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finish(future.result())
+                if self.cancel_event.is_set():
+                    raise ProcessCancelled("操作已取消")
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _minify_with_pool(self, html_files: List[str], on_done: Callable[[str, bool, float], None]):
+        """在常驻Node工作进程中运行 html-minifier-terser"""
+        workers = min(self._get_workers(), len(html_files))
+        tasks = [{'source': file, 'output': self.get_output_path(file)} for file in html_files]
+
+        def on_result(result):
+            if not result['ok']:
+                self.log(f"混淆失败 {os.path.relpath(result['source'], self.project_path)}: {result.get('error')}")
+            on_done(result['source'], result['ok'], result.get('seconds', 0.0))
+
+        pool = NodeWorkerPool('html-minifier-terser', 'lib.minify(code, options)', workers,
+                              self.get_library_options(), project_path=self.project_path, output=self.output,
+                              cancel_event=self.cancel_event, timeout=self.step_timeout)
+        with pool:
+            self.log(f"已启动 {workers} 个Node工作进程 (html-minifier-terser {pool.version or '未知版本'})")
+            pool.run(tasks, on_result)
+        self.child_usage['cpu_time'] += pool.usage['cpu_time']
+        self.child_usage['peak_rss'] = max(self.child_usage['peak_rss'], pool.usage['peak_rss'])
+
+    def _minify_with_cli(self, html_files: List[str], on_done: Callable[[str, bool, float], None]):
+        """同时运行多个 html-minifier-terser 命令"""
+        def minify(file: str):
+            start_time = time.time()
+            ok = self.minify_file(file)
+            on_done(file, ok, time.time() - start_time)
 
-    def process_project(self):
+        executor = ThreadPoolExecutor(max_workers=self._get_workers())
+        try:
+            # 逐个取结果，任一文件被取消时立即抛出
+            for future in [executor.submit(minify, file) for file in html_files]:
+                future.result()
+        except BaseException:
+            self.cancel_event.set()
+            raise
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _remove_partial_outputs(self):
+        """删除中断时留下的临时输出文件，输出目录中只保留完整的文件"""
+        pattern = re.compile(r'\.tmp-[0-9a-f]+$')
+        for root, _, files in os.walk(self.output_dir):
+            for file in files:
+                if pattern.search(file):
+                    try:
+                        os.remove(os.path.join(root, file))
+                    except OSError:
+                        pass
+
+    def _report_timings(self, timings: Dict[str, float], sizes: Dict[str, int]):
+        """输出每个文件用时的统计和最慢的文件"""
+        if not timings:
+            return
+        values = sorted(timings.values())
+        p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+        self.log(f"单个文件用时: 中位数 {statistics.median(values) * 1000:.1f}ms，"
+                 f"95% {p95 * 1000:.1f}ms，最长 {values[-1] * 1000:.1f}ms")
+        count = int(self.config.config['General'].get('slowest_files', '10'))
+        slowest = sorted(timings.items(), key=lambda item: item[1], reverse=True)[:count]
+        if not slowest:
+            return
+        self.log(f"用时最长的 {len(slowest)} 个文件:")
+        for file, seconds in slowest:
+            speed = sizes[file] / 1024 / 1024 / seconds if seconds else 0
+            self.log(f"  {seconds * 1000:>10.1f}ms {sizes[file] / 1024:>10.0f}KB {speed:>8.2f}MB/秒  "
+                     f"{os.path.relpath(file, self.project_path)}")
+
+    def _report_types(self, html_files: List[str], failed: List[str], sizes: Dict[str, int]) -> Dict[str, Dict[str, int]]:
+        """按文件类型统计成功处理的文件压缩前后的大小，返回 类型 -> {files, bytes, output_bytes}"""
+        types = {}
+        failed = set(failed)
+        for file in html_files:
+            if file in failed:
+                continue
+            entry = types.setdefault(self.get_file_type(file), {'files': 0, 'bytes': 0, 'output_bytes': 0})
+            entry['files'] += 1
+            entry['bytes'] += sizes[file]
+            entry['output_bytes'] += os.path.getsize(self.get_output_path(file))
+        if types:
+            self.log("按类型统计:")
+        for file_type, entry in sorted(types.items(), key=lambda item: item[1]['bytes'], reverse=True):
+            saved = entry['bytes'] - entry['output_bytes']
+            self.log(f"  {file_type.upper():<6}{entry['files']:>8} 个文件  {entry['bytes'] / 1024:>10.1f}KB -> "
+                     f"{entry['output_bytes'] / 1024:>10.1f}KB  节省 {saved / 1024:.1f}KB "
+                     f"({saved / entry['bytes'] if entry['bytes'] else 0:.1%})")
+        return types
+
+    def process_project(self) -> Dict[str, Any] | None:
         if self.config.config['General'].getboolean('confirm_before_process'):
             if not self._confirm_process():
-                print("取消处理")
+                self.log("取消处理")
                 return
 
         start_time = time.time()
 
         try:
-            print("1. 收集HTML文件...")
+            self.log("1. 收集HTML和静态资源文件...")
             html_files = self.collect_html_files()
             if not html_files:
-                print("未找到HTML文件！")
+                self.log("未找到需要处理的文件！")
                 return
 
-            print(f"找到 {len(html_files)} 个HTML文件")
-            print("2. 开始混淆处理...")
-            
-            success_count = 0
+            # 先处理大文件，避免最后只剩一个大文件在运行而其他工作进程空闲
+            sizes = {file: os.path.getsize(file) for file in html_files}
+            html_files.sort(key=sizes.get, reverse=True)
+            counts = {}
             for file in html_files:
-                print(f"处理: {os.path.relpath(file, self.project_path)}")
-                if self.minify_file(file):
-                    success_count += 1
+                file_type = self.get_file_type(file)
+                counts[file_type] = counts.get(file_type, 0) + 1
+            self.log(f"找到 {len(html_files)} 个文件 ({'，'.join(f'{t.upper()} {n}' for t, n in counts.items())})，"
+                     f"共 {sum(sizes.values()) / 1024 / 1024:.2f}MB")
+            engine = self.get_engine()
+            process_start = time.time()
+            cache = self._get_cache()
+            pending = self._lookup_cache(cache, html_files, engine) if cache else dict.fromkeys(html_files)
+            failed = []
+            timings = {}
+            engine_seconds = 0.0
+
+            def on_done(file: str, ok: bool, seconds: float):
+                with self._lock:
+                    if ok:
+                        timings[file] = seconds
+                        if pending[file]:
+                            cache.put(pending[file], self.get_output_path(file))
+                    else:
+                        failed.append(file)
+                progress.update(sizes[file], ok)
+
+            if pending:
+                files = list(pending)
+                engine_name = ENGINES[engine]
+                self.log(f"2. 开始混淆处理 ({engine_name}，并行 {min(self._get_workers(), len(files))} 个)...")
+                progress = BatchProgress(len(files), sum(sizes[file] for file in files), self.log)
+                engine_start = time.time()
+                try:
+                    if engine == 'python':
+                        self._minify_with_python(files, sizes, on_done)
+                    else:
+                        # html-minifier-terser 只处理HTML，静态资源随后由内置压缩器处理
+                        html_only = [file for file in files if self.get_file_type(file) == 'html']
+                        assets = [file for file in files if self.get_file_type(file) != 'html']
+                        if html_only:
+                            if engine == 'pool':
+                                self._minify_with_pool(html_only, on_done)
+                            else:
+                                self._minify_with_cli(html_only, on_done)
+                        if assets:
+                            self._minify_with_python(assets, sizes, on_done)
+                finally:
+                    self._remove_partial_outputs()
+                    engine_seconds = time.time() - engine_start
+
+            removed = self._prune_stale_outputs(html_files, failed)
+            if removed:
+                self.log(f"已删除 {removed} 个源文件已不存在的输出文件")
+
+            success_count = len(html_files) - len(failed)
+            types = self._report_types(html_files, failed, sizes)
+            stats = {
+                'engine': engine,
+                'files': len(html_files),
+                'succeeded': success_count,
+                'bytes': sum(sizes.values()),
+                'output_bytes': sum(entry['output_bytes'] for entry in types.values()),
+                'types': types,
+                'seconds': time.time() - process_start,
+            }
 
             total_time = time.time() - start_time
             minutes = int(total_time // 60)
             seconds = total_time % 60
 
-            print(f"\n混淆完成！成功: {success_count}/{len(html_files)}")
-            print(f"总用时: {minutes}分{seconds:.1f}秒")
-            print(f"输出目录: {self.output_dir}")
+            self.log(f"\n混淆完成！成功: {success_count}/{len(html_files)}")
+            if failed:
+                self.log("失败的文件:")
+                for file in sorted(failed):
+                    self.log(f"  {os.path.relpath(file, self.project_path)}")
+            self.log(f"总用时: {minutes}分{seconds:.1f}秒")
+            process_seconds = stats['seconds'] or 1e-9
+            self.log(f"吞吐量: {stats['files'] / process_seconds:.1f} 个文件/秒，"
+                     f"{stats['bytes'] / 1024 / 1024 / process_seconds:.2f} MB/秒")
+            self._report_timings(timings, sizes)
+            if cache:
+                self._report_cache(cache, sum(sizes[file] for file in html_files if file not in pending),
+                                   sum(sizes[file] for file in timings), engine_seconds)
+                evicted, freed = cache.evict()
+                if evicted:
+                    self.log(f"缓存超过上限，已淘汰 {evicted} 个条目，释放 {freed / 1024 / 1024:.1f}MB")
+            if self.child_usage['cpu_time']:
+                self.log(f"子进程合计: {format_usage(self.child_usage)}")
+            self.log(f"输出目录: {self.output_dir}")
+            return stats
 
         except Exception as e:
-            print(f"处理过程中出错: {str(e)}")
+            self.log(f"处理过程中出错: {str(e)}")
             raise
 
     def _confirm_process(self) -> bool:
@@ -148,11 +557,19 @@ def main():
     show_tool_info()
     parser = argparse.ArgumentParser(description='HTML项目混淆工具')
     parser.add_argument('project_path', nargs='?', help='项目路径')
+    parser.add_argument('--config', action='store_true', help='配置模式')
     parser.add_argument('--yes', '-y', action='store_true', help='自动确认所有提示')
+    parser.add_argument('--general_engine', choices=['python', 'pool', 'cli'],
+                        help='处理方式: python(内置的流式压缩器)/pool(常驻Node工作进程)/cli(逐个文件启动命令)')
+    parser.add_argument('--general_workers', help='工作进程数，auto 为CPU核数')
+    parser.add_argument('--general_cache', choices=['true', 'false'], help='是否使用缓存')
+    parser.add_argument('--general_cache_max_size_mb', help='缓存容量上限 (MB)')
     
     # 添加混淆器配置参数
     for key in ObfuscatorConfig.DEFAULT_CONFIG['Minifier']:
         parser.add_argument(f'--minifier_{key}', help=f'混淆器 {key} 配置')
+    for key in ObfuscatorConfig.DEFAULT_CONFIG['Assets']:
+        parser.add_argument(f'--assets_{key}', choices=['true', 'false'], help=f'是否同时压缩 {key.upper()} 文件')
 
     args = parser.parse_args()
     config = ObfuscatorConfig()
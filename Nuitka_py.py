@@ -1,24 +1,52 @@
+import io
 import os
+import re
 import sys
+import json
+import shlex
+import statistics
+import itertools
 import time
 import shutil
+import hashlib
 import argparse
+import tempfile
+import threading
 import configparser
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, TextIO
+from build_manifest import BuildManifest
+from nuitka_report import NuitkaReport
+from import_analyzer import ImportAnalyzer
+from build_progress import NuitkaProgress, ProgressCallback, PHASES, json_lines_callback
+from process_runner import (run_process, build_env, format_command, format_usage, PrefixedOutput,
+                            ProcessCancelled)
+from system_resources import get_available_memory, MemoryMonitor
+import build_daemon
 
 TOOL_NAME = "Python 3 项目 Nuitka 编译工具"
 VERSION = "0.1.0"
 
+# 只影响编译过程、不影响输出内容的选项，会随可用内存自动调整，不计入 versioned 解压目录的内容标识
+RESOURCE_OPTIONS = {'show_progress', 'show_memory', 'jobs', 'low_memory', 'adaptive_resources',
+                    'memory_reserve_mb', 'max_restarts', 'use_ccache', 'cache_dir', 'cache_max_size_mb',
+                    'compilation_report', 'remove_output'}
+
 class NuitkaConfig:
     DEFAULT_CONFIG = {
         'General': {
             'clean_temp': 'true',
-            'confirm_before_compile': 'true'
+            'confirm_before_compile': 'true',
+            'step_timeout': '0'  # 单次Nuitka运行的时限（秒），超时终止整个进程树，0 为不限制
         },
         'Nuitka': {
             'standalone': 'true',
             'onefile': 'false',
+            # onefile 解压目录: 留空为Nuitka默认的临时目录（每次运行重新解压），
+            # versioned 为缓存目录下按项目、版本号和源码内容区分的固定目录，也可直接填写Nuitka的路径模板
+            'onefile_tempdir_spec': '',
+            'onefile_cache_mode': 'auto',  # auto/cached/temporary，cached 时重复运行复用已解压的文件
             'windows_icon': '',
             'company_name': '',
             'product_name': '',
@@ -33,6 +61,7 @@ class NuitkaConfig:
             'include_package_data': '',  # 格式: package_name:*.txt,package_name2
             'include_data_files': '',    # 格式: source=dest,source2=dest2
             'noinclude_dlls': '',        # 格式: pattern1,pattern2
+            'nofollow_import_to': '',    # 不跟随编译的模块/包，格式: package1,package2
             'prefer_source_code': 'true',
             'python_flag': '',           # no_site/no_warnings/no_asserts
             'remove_output': 'false',
@@ -43,7 +72,32 @@ class NuitkaConfig:
             'copyright': '',              # 版权信息
             'trademarks': '',             # 商标信息
             'output_dir': '',             # 新增：输出目录配置
-            'module_name_choice': 'original'  # 新增：模块名称选择模式
+            'module_name_choice': 'original',  # 新增：模块名称选择模式
+            'use_ccache': 'true',         # 使用 ccache 缓存C编译结果
+            'cache_dir': '',              # 编译缓存目录，默认 ~/.projectcompiler/nuitka_cache
+            'cache_max_size_mb': '10240',  # 编译缓存容量上限，超出时淘汰最久未使用的文件
+            'adaptive_resources': 'true',  # 根据可用内存、CPU核数和历史内存占用自动选择 jobs/lto/low_memory
+            'memory_reserve_mb': '1024',   # 为系统保留的内存，可用内存低于其一半时以更省内存的模式重新编译
+            'max_restarts': '2',           # 内存不足时最多重新编译的次数
+            # 预先以 --module 编译为扩展模块的项目包，格式: package1,package2，auto 为项目中的全部顶层包
+            # 包按源码内容缓存，修改一个包只重新编译该包
+            'module_packages': '',
+            'compilation_report': 'true',  # 生成编译报告，统计各模块的C代码大小、编译耗时和打包体积
+            'report_top': '10'             # 报告中每项指标显示的条目数
+        },
+        'Analyze': {
+            # 分析导入时运行程序的参数，多组参数用 ; 分隔，每组运行一次，应覆盖有代表性的功能
+            'run_args': '',
+            'timeout': '300'
+        },
+        'Matrix': {
+            # 变体矩阵的各个维度，格式: 选项:取值1|取值2;选项2:取值1|取值2，取各维度的全部组合
+            'axes': 'lto:no|yes;python_flag:|no_asserts,no_docstrings',
+            'benchmark_command': '',  # 基准测试命令，{exe} 替换为可执行文件路径，留空则直接运行可执行文件
+            'benchmark_runs': '5',
+            'parallel_builds': 'auto',
+            # 排名权重: 运行时间、启动时间（到首行输出）、体积、构建时间
+            'weights': 'runtime:1,startup:0.5,size:0.2,build_time:0.1'
         }
     }
 
@@ -62,6 +116,12 @@ class NuitkaConfig:
         with open(self.config_file, 'w') as f:
             self.config.write(f)
 
+    def copy(self) -> 'NuitkaConfig':
+        """返回包含当前全部设置的独立副本"""
+        config = NuitkaConfig()
+        config.config.read_dict({s: dict(self.config.items(s)) for s in self.config.sections()})
+        return config
+
     def update_from_args(self, args: Dict[str, Any]):
         for section in self.config.sections():
             for key in self.config[section]:
@@ -69,8 +129,144 @@ class NuitkaConfig:
                 if arg_name in args and args[arg_name] is not None:
                     self.config[section][key] = str(args[arg_name])
 
+class NuitkaCache:
+    """管理Nuitka编译缓存目录：容量上限、按最近使用时间淘汰，并记录C编译缓存命中统计"""
+
+    STATS_FILE = 'projectcompiler_stats.json'
+    # 只在这些子目录中按文件淘汰；其他子目录（下载的编译工具链等）删除部分文件后会损坏
+    EVICTABLE_DIRS = ('ccache', 'clcache')
+    CCACHE_RESULT_PATTERN = re.compile(r"Cached C files \(using ccache\) with result '([^']+)': (\d+)")
+    CLCACHE_PATTERN = re.compile(r"using clcache with (\d+) cache hits and (\d+) cache misses")
+
+    def __init__(self, cache_dir: str, max_size_mb: int):
+        self.cache_dir = os.path.abspath(os.path.expanduser(cache_dir))
+        self.max_size = max_size_mb * 1024 * 1024
+        self.stats_file = os.path.join(self.cache_dir, self.STATS_FILE)
+        self.reset_run()
+
+    @classmethod
+    def from_config(cls, nuitka_config) -> 'NuitkaCache':
+        cache_dir = nuitka_config.get('cache_dir', '') or str(Path.home() / '.projectcompiler' / 'nuitka_cache')
+        return cls(cache_dir, int(nuitka_config.get('cache_max_size_mb', '10240')))
+
+    def reset_run(self):
+        self.hits = 0
+        self.misses = 0
+        self.compile_started = None
+        self.compile_seconds = 0.0
+
+    def get_env(self) -> Dict[str, str]:
+        """传给Nuitka进程的环境变量：所有Nuitka缓存（含ccache）都放在受管理的目录中"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # ccache 自身也按该上限清理，其余缓存由 evict 统一淘汰
+        return {
+            'NUITKA_CACHE_DIR': self.cache_dir,
+            'CCACHE_MAXSIZE': f'{max(1, self.max_size // (1024 * 1024))}M',
+        }
+
+    def handle_line(self, line: str):
+        """解析Nuitka输出中的C编译缓存统计"""
+        if 'Running C compilation' in line:
+            self.compile_started = time.time()
+        elif self.compile_started and ('linking' in line or 'Successfully created' in line):
+            self.compile_seconds = time.time() - self.compile_started
+            self.compile_started = None
+
+        match = self.CCACHE_RESULT_PATTERN.search(line)
+        if match:
+            if match.group(1).startswith('cache hit'):
+                self.hits += int(match.group(2))
+            elif match.group(1) == 'cache miss':
+                self.misses += int(match.group(2))
+            return
+        match = self.CLCACHE_PATTERN.search(line)
+        if match:
+            self.hits += int(match.group(1))
+            self.misses += int(match.group(2))
+
+    def _load_stats(self) -> Dict[str, Any]:
+        try:
+            with open(self.stats_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def record_run(self) -> Dict[str, Any]:
+        """记录本次命中情况，并按历史上每个未命中文件的平均编译耗时估算节省的时间"""
+        stats = self._load_stats()
+        if self.misses and self.compile_seconds:
+            per_miss = self.compile_seconds / self.misses
+            previous = stats.get('seconds_per_miss')
+            # 指数滑动平均，避免单次构建波动过大
+            stats['seconds_per_miss'] = per_miss if previous is None else previous * 0.7 + per_miss * 0.3
+        seconds_per_miss = stats.get('seconds_per_miss', 0.0)
+        saved = self.hits * seconds_per_miss
+
+        stats['total_hits'] = stats.get('total_hits', 0) + self.hits
+        stats['total_misses'] = stats.get('total_misses', 0) + self.misses
+        stats['total_saved_seconds'] = stats.get('total_saved_seconds', 0.0) + saved
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(self.stats_file, 'w', encoding='utf-8') as f:
+            json.dump(stats, f, indent=2)
+        return {'hits': self.hits, 'misses': self.misses, 'saved_seconds': saved,
+                'seconds_per_miss': seconds_per_miss, **{k: stats[k] for k in
+                ('total_hits', 'total_misses', 'total_saved_seconds')}}
+
+    def get_size(self) -> int:
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for file in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, file))
+                except OSError:
+                    pass
+        return total
+
+    def evict(self) -> tuple:
+        """整个缓存目录超过容量上限时，按最近访问时间从旧到新删除C编译缓存中的文件，返回 (删除文件数, 释放字节数)"""
+        total = self.get_size()
+        if total <= self.max_size:
+            return 0, 0
+        entries = []
+        for name in self.EVICTABLE_DIRS:
+            for root, _, files in os.walk(os.path.join(self.cache_dir, name)):
+                for file in files:
+                    if file == 'ccache.conf':
+                        continue
+                    path = os.path.join(root, file)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((max(st.st_atime, st.st_mtime), st.st_size, path))
+
+        # 淘汰到上限的 90%，避免每次构建后都触发清理
+        target = self.max_size * 0.9
+        removed, freed = 0, 0
+        for _, size, path in sorted(entries):
+            if total - freed <= target:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+                freed += size
+            except OSError:
+                pass
+        return removed, freed
+
+
 class NuitkaCompiler:
-    def __init__(self, project_path: str | Path, main_file: str, config: NuitkaConfig = None):
+    # 首次构建没有历史数据时使用的内存估计 (MB)
+    DEFAULT_FRONTEND_MB = 1024
+    DEFAULT_PER_JOB_MB = 512
+    # 启用LTO时链接阶段的内存按并行编译占用的倍数估计
+    LTO_MEMORY_FACTOR = 2
+    # 需要 --show-progress 或 --show-memory 才会输出，取各阶段中的最大值作为前端内存占用
+    MEMORY_USAGE_PATTERN = re.compile(r'Total memory usage before .*\((\d+) bytes\)')
+
+    def __init__(self, project_path: str | Path, main_file: str, config: NuitkaConfig = None,
+                 output: TextIO = None, progress_callback: ProgressCallback = None,
+                 cancel_event: threading.Event = None):
         if not Path(project_path).exists():
             raise ValueError(f"项目路径不存在: {project_path}")
         if not main_file.endswith('.py'):
@@ -80,6 +276,17 @@ class NuitkaCompiler:
         self.main_file = main_file
         self.project_name = Path(project_path).name
         self.config = config or NuitkaConfig()
+        # 输出流为 None 时使用调用时的 sys.stdout，并发构建应各自传入独立的输出流
+        self.output = output
+        # 结构化进度事件回调，事件格式见 build_progress.NuitkaProgress
+        self.progress_callback = progress_callback
+        self.progress = None
+        self._last_phase = None
+        # 被设置时终止正在运行的Nuitka进程树，用于从界面停止构建
+        self.cancel_event = cancel_event
+        self.step_timeout = float(self.config.config['General']['step_timeout']) or None
+        # 子进程使用的环境变量，为 None 时使用当前进程的环境；守护进程中设置为提交任务的客户端的环境
+        self.base_env: Dict[str, str] | None = None
         
         # 添加输出目录设置
         self.dist_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'dist'))
@@ -88,15 +295,365 @@ class NuitkaCompiler:
         # 确保输出目录存在
         os.makedirs(self.output_dir, exist_ok=True)
 
-    def build_nuitka_command(self) -> str:
-        """构建Nuitka编译命令"""
-        cmd_parts = [
-            'python -m nuitka',
-            f'"{os.path.join(self.project_path, self.main_file)}"',
-            f'--output-dir="{self.output_dir}"'  # 添加输出目录参数
+        # 记录本次构建产生的中间目录，清理时只删除这些条目
+        self.manifest = BuildManifest(BuildManifest.default_path('nuitka', self.project_path), output=output)
+        self.cache = NuitkaCache.from_config(self.config.config['Nuitka'])
+
+        # 运行时覆盖的Nuitka选项（资源规划、降级重试等），不写回配置文件
+        self.option_overrides: Dict[str, str] = {}
+        self.restarts = 0
+        self.memory_exhausted = False
+        self.frontend_memory = None
+        digest = hashlib.sha1(self.project_path.encode('utf-8')).hexdigest()[:12]
+        self.history_file = Path.home() / '.projectcompiler' / 'nuitka_stats' / f'{self.project_name}-{digest}.json'
+        self.module_cache_dir = Path.home() / '.projectcompiler' / 'nuitka_modules' / f'{self.project_name}-{digest}'
+        # 包名 -> 预编译扩展模块路径
+        self.prebuilt_modules: Dict[str, str] = {}
+        self.rebuilt_packages: List[str] = []
+        self.report_file = None
+        # 项目源码和选项的哈希，用于 versioned 解压目录，内容不变的重复构建共用同一目录
+        self._content_id: str | None = None
+        self.report_history_dir = Path.home() / '.projectcompiler' / 'nuitka_reports' / f'{self.project_name}-{digest}'
+
+    def log(self, *args, **kwargs):
+        print(*args, file=self.output or sys.stdout, **kwargs)
+
+    def _get_temp_candidates(self) -> list:
+        """Nuitka 可能生成的中间目录，输出的 .dist 目录和可执行文件不在其中"""
+        stem = Path(self.main_file).stem
+        return [
+            os.path.join(self.project_path, 'build'),
+            os.path.join(self.output_dir, f'{stem}.build'),
+            os.path.join(self.output_dir, f'{stem}.onefile-build'),
         ]
 
+    def _record_temp_dirs(self, existing_before: set):
+        for path in self._get_temp_candidates():
+            if path not in existing_before and os.path.isdir(path):
+                self.manifest.add_dir(path)
+        self.manifest.save()
+
+    def get_effective_options(self) -> configparser.SectionProxy:
+        """返回应用运行时覆盖项之后的Nuitka选项"""
+        parser = configparser.ConfigParser()
+        parser.read_dict({'Nuitka': {**self.config.config['Nuitka'], **self.option_overrides}})
+        return parser['Nuitka']
+
+    def load_history(self) -> Dict[str, Any]:
+        try:
+            with open(self.history_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_history(self, history: Dict[str, Any]):
+        self.history_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.history_file, 'w', encoding='utf-8') as f:
+            json.dump(history, f, indent=2)
+
+    def _get_jobs(self) -> int:
+        jobs = self.get_effective_options()['jobs']
+        return int(jobs) if jobs != 'auto' else (os.cpu_count() or 1)
+
+    def plan_resources(self):
+        """根据可用内存、CPU核数和该项目历史构建的内存占用，为设为 auto 的选项选择取值"""
         nuitka_config = self.config.config['Nuitka']
+        if not nuitka_config.getboolean('adaptive_resources'):
+            return
+        available = get_available_memory()
+        if available is None:
+            self.log("无法获取可用内存，跳过资源规划")
+            return
+
+        history = self.load_history()
+        frontend_mb = history.get('frontend_mb', self.DEFAULT_FRONTEND_MB)
+        per_job_mb = history.get('per_job_mb', self.DEFAULT_PER_JOB_MB)
+        reserve_mb = int(nuitka_config['memory_reserve_mb'])
+        usable_mb = available / 1024 / 1024 - reserve_mb
+        cores = os.cpu_count() or 1
+
+        if nuitka_config['jobs'] == 'auto' and 'jobs' not in self.option_overrides:
+            jobs = int((usable_mb - frontend_mb) // per_job_mb)
+            self.option_overrides['jobs'] = str(max(1, min(cores, jobs)))
+        jobs = self._get_jobs()
+
+        if nuitka_config['lto'] == 'auto' and 'lto' not in self.option_overrides and usable_mb < frontend_mb + per_job_mb * jobs * self.LTO_MEMORY_FACTOR:
+            self.option_overrides['lto'] = 'no'
+
+        if not nuitka_config.getboolean('low_memory') and usable_mb < frontend_mb + per_job_mb:
+            self.option_overrides['low_memory'] = 'true'
+            if nuitka_config['jobs'] == 'auto':
+                self.option_overrides['jobs'] = '1'
+
+        options = self.get_effective_options()
+        source = '历史构建' if history.get('per_job_mb') else '默认估计'
+        self.log(f"资源规划: 可用内存 {available / 1024 / 1024:.0f}MB，CPU {cores} 核，"
+                 f"前端约 {frontend_mb:.0f}MB，每个编译任务约 {per_job_mb:.0f}MB ({source})")
+        self.log(f"  jobs={options['jobs']} lto={options['lto']} low_memory={options['low_memory']}")
+
+    def _downgrade_resources(self) -> bool:
+        """内存接近耗尽后切换到更省内存的模式，无法再降级或超过重试次数时返回 False"""
+        if self.restarts >= int(self.config.config['Nuitka']['max_restarts']):
+            return False
+        options = self.get_effective_options()
+        jobs = self._get_jobs()
+        if jobs > 1 or options['lto'] != 'no':
+            self.option_overrides['jobs'] = str(max(1, jobs // 2))
+            self.option_overrides['lto'] = 'no'
+        elif not options.getboolean('low_memory'):
+            self.option_overrides['low_memory'] = 'true'
+        else:
+            return False
+        self.restarts += 1
+        options = self.get_effective_options()
+        self.log(f"\n内存即将耗尽，以更省内存的模式重新编译 (第 {self.restarts} 次): "
+                 f"jobs={options['jobs']} lto={options['lto']} low_memory={options['low_memory']}")
+        return True
+
+    def _record_memory_usage(self, peak_usage: int):
+        """用本次构建的内存峰值更新该项目的前端和单个编译任务的内存估计"""
+        if not peak_usage:
+            return
+        history = self.load_history()
+        peak_mb = peak_usage / 1024 / 1024
+        frontend_mb = self.frontend_memory / 1024 / 1024 if self.frontend_memory else None
+        if frontend_mb:
+            history['frontend_mb'] = self._smooth(history.get('frontend_mb'), frontend_mb)
+        per_job_mb = (peak_mb - (frontend_mb or 0)) / self._get_jobs()
+        if per_job_mb > 0:
+            history['per_job_mb'] = self._smooth(history.get('per_job_mb'), per_job_mb)
+        history['peak_mb'] = peak_mb
+        self.save_history(history)
+
+    @staticmethod
+    def _smooth(previous: float | None, value: float) -> float:
+        # 偏向较大值的滑动平均，宁可少开并行任务也不要内存耗尽
+        if previous is None:
+            return value
+        return max(value, previous * 0.7 + value * 0.3)
+
+    def get_module_packages(self) -> List[str]:
+        value = self.config.config['Nuitka'].get('module_packages', '').strip()
+        if not value:
+            return []
+        if value == 'auto':
+            main_stem = Path(self.main_file).stem
+            return sorted(entry.name for entry in os.scandir(self.project_path)
+                          if entry.is_dir() and entry.name != main_stem and not entry.name.startswith('.')
+                          and os.path.exists(os.path.join(entry.path, '__init__.py')))
+        packages = [p.strip() for p in value.split(',') if p.strip()]
+        for package in packages:
+            if not os.path.exists(os.path.join(self.project_path, package, '__init__.py')):
+                raise ValueError(f"项目中不存在包: {package}")
+        return packages
+
+    def _hash_package(self, package: str) -> str:
+        """根据包的源码、影响生成代码的选项以及Python/Nuitka版本计算缓存键"""
+        options = self.get_effective_options()
+        digest = hashlib.sha256()
+        try:
+            from importlib.metadata import version
+            nuitka_version = version('nuitka')
+        except Exception:
+            nuitka_version = 'unknown'
+        digest.update(f'{sys.version}|{nuitka_version}'.encode('utf-8'))
+        for key in ('python_flag', 'lto', 'unstripped', 'prefer_source_code'):
+            digest.update(f'|{key}={options[key]}'.encode('utf-8'))
+
+        package_dir = os.path.join(self.project_path, package)
+        for root, dirs, files in os.walk(package_dir):
+            dirs[:] = sorted(d for d in dirs if d != '__pycache__')
+            for file in sorted(files):
+                if file.endswith(('.pyc', '.pyo')):
+                    continue
+                path = os.path.join(root, file)
+                digest.update(os.path.relpath(path, package_dir).replace(os.sep, '/').encode('utf-8'))
+                with open(path, 'rb') as f:
+                    digest.update(hashlib.sha256(f.read()).digest())
+        return digest.hexdigest()[:16]
+
+    def build_module_command(self, package: str, output_dir: str) -> List[str]:
+        """构建把单个包编译为扩展模块的Nuitka命令"""
+        options = self.get_effective_options()
+        cmd_parts = [
+            sys.executable, '-m', 'nuitka',
+            '--module',
+            os.path.join(self.project_path, package),
+            f'--include-package={package}',
+            f'--output-dir={output_dir}',
+            '--remove-output',
+        ]
+        if options.getboolean('show_progress'):
+            cmd_parts.append('--show-progress')
+        if options['jobs'] != 'auto':
+            cmd_parts.append(f'--jobs={options["jobs"]}')
+        if options['lto'] != 'auto':
+            cmd_parts.append(f'--lto={options["lto"]}')
+        if options.getboolean('prefer_source_code'):
+            cmd_parts.append('--prefer-source-code')
+        if options.getboolean('unstripped'):
+            cmd_parts.append('--unstripped')
+        if options.getboolean('low_memory'):
+            cmd_parts.append('--low-memory')
+        if not options.getboolean('use_ccache'):
+            cmd_parts.append('--disable-ccache')
+        for flag in options['python_flag'].split(','):
+            if flag:
+                cmd_parts.append(f'--python-flag={flag}')
+        return cmd_parts
+
+    def build_module_packages(self) -> Dict[str, str]:
+        """把配置的包编译为扩展模块，源码未变化的包直接使用缓存，返回 包名 -> 扩展模块路径"""
+        packages = self.get_module_packages()
+        if not packages:
+            return {}
+        if self.get_effective_options().getboolean('onefile'):
+            raise ValueError("module_packages 不支持 onefile 模式，预编译的扩展模块需要放在可执行文件旁")
+
+        self.log(f"预编译扩展模块: {', '.join(packages)}")
+        modules = {}
+        self.rebuilt_packages = []
+        for package in packages:
+            package_hash = self._hash_package(package)
+            entry_dir = self.module_cache_dir / f'{package}-{package_hash}'
+            cached = self._find_extension(entry_dir, package)
+            if cached:
+                self.log(f"  {package}: 源码未变化，使用缓存 ({package_hash})")
+                modules[package] = cached
+                continue
+
+            self.log(f"  {package}: 编译扩展模块 ({package_hash})...")
+            build_dir = Path(tempfile.mkdtemp(prefix=f'{package}-', dir=self._ensure_module_cache_dir()))
+            try:
+                if self._run_nuitka(self.build_module_command(package, str(build_dir))) != 0:
+                    raise RuntimeError(f"扩展模块 {package} 编译失败")
+                if not self._find_extension(build_dir, package):
+                    raise RuntimeError(f"未找到扩展模块 {package} 的编译产物")
+                # 编译完成后再改名，中断的构建不会留下看似有效的缓存
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                os.replace(build_dir, entry_dir)
+            finally:
+                shutil.rmtree(build_dir, ignore_errors=True)
+            self._prune_module_cache(package, entry_dir)
+            modules[package] = self._find_extension(entry_dir, package)
+            self.rebuilt_packages.append(package)
+        return modules
+
+    def _ensure_module_cache_dir(self) -> Path:
+        self.module_cache_dir.mkdir(parents=True, exist_ok=True)
+        return self.module_cache_dir
+
+    @staticmethod
+    def _find_extension(directory: Path, package: str) -> str | None:
+        if not directory.is_dir():
+            return None
+        for entry in directory.iterdir():
+            if entry.name.startswith(f'{package}.') and entry.suffix in ('.so', '.pyd'):
+                return str(entry)
+        return None
+
+    def _prune_module_cache(self, package: str, keep: Path):
+        """每个包只保留最新的缓存条目"""
+        for entry in self.module_cache_dir.glob(f'{package}-*'):
+            if entry != keep and entry.is_dir() and re.fullmatch(rf'{re.escape(package)}-[0-9a-f]{{16}}', entry.name):
+                shutil.rmtree(entry, ignore_errors=True)
+
+    def _install_prebuilt_modules(self):
+        """把预编译的扩展模块复制到可执行文件所在目录"""
+        target_dir = os.path.dirname(self.get_executable_path())
+        for package, module_path in self.prebuilt_modules.items():
+            shutil.copy2(module_path, os.path.join(target_dir, os.path.basename(module_path)))
+
+    def _report_incremental_build(self, total_time: float):
+        """记录完整构建用时，并在增量构建时与最近一次完整构建比较"""
+        history = self.load_history()
+        if not self.prebuilt_modules:
+            history['full_build_seconds'] = total_time
+            self.save_history(history)
+            return
+        reused = len(self.prebuilt_modules) - len(self.rebuilt_packages)
+        self.log(f"\n扩展模块: 重新编译 {len(self.rebuilt_packages)} 个，复用缓存 {reused} 个")
+        full_time = history.get('full_build_seconds')
+        if full_time:
+            self.log(f"本次用时 {total_time:.1f}秒，最近一次完整构建 {full_time:.1f}秒，"
+                     f"加速 {full_time / total_time:.2f} 倍")
+        else:
+            self.log("尚无完整构建记录，清空 module_packages 构建一次后即可比较加速效果")
+
+    def get_onefile_tempdir_spec(self) -> str:
+        spec = self.get_effective_options()['onefile_tempdir_spec'].strip()
+        if spec != 'versioned':
+            return spec
+        version = self.get_effective_options()['file_version'] or 'build'
+        return f'{{CACHE_DIR}}/projectcompiler/{self.project_name}/{version}-{self.get_content_id()}'
+
+    def get_content_id(self) -> str:
+        """根据项目文件和编译选项计算内容标识；内容改变时解压到新目录，不会复用旧版本解压的文件"""
+        if self._content_id is None:
+            digest = hashlib.sha256()
+            options = self.get_effective_options()
+            digest.update(f'{sys.version}|{os.path.basename(self.main_file)}'.encode('utf-8'))
+            for key in sorted(set(options) - RESOURCE_OPTIONS):
+                digest.update(f'|{key}={options[key]}'.encode('utf-8'))
+            skip_dirs = {os.path.abspath(self.dist_dir), os.path.abspath(self.output_dir)}
+            for root, dirs, files in os.walk(self.project_path):
+                dirs[:] = sorted(d for d in dirs if d != '__pycache__' and not d.startswith('.')
+                                 and os.path.abspath(os.path.join(root, d)) not in skip_dirs)
+                for file in sorted(files):
+                    if file.endswith(('.pyc', '.pyo')):
+                        continue
+                    path = os.path.join(root, file)
+                    digest.update(os.path.relpath(path, self.project_path).replace(os.sep, '/').encode('utf-8'))
+                    with open(path, 'rb') as f:
+                        digest.update(hashlib.sha256(f.read()).digest())
+            self._content_id = digest.hexdigest()[:12]
+        return self._content_id
+
+    @staticmethod
+    def resolve_onefile_dir(spec: str) -> str | None:
+        """把固定的解压路径模板解析为实际目录；含运行时变量（PID、时间等）的模板返回 None"""
+        if not spec or re.search(r'\{(PID|TIME|TIME_US|RANDOM|TEMP)\}', spec):
+            return None
+        if os.name == 'nt':
+            cache_dir = os.environ.get('LOCALAPPDATA', '')
+        elif sys.platform == 'darwin':
+            cache_dir = str(Path.home() / 'Library' / 'Caches')
+        else:
+            cache_dir = os.environ.get('XDG_CACHE_HOME') or str(Path.home() / '.cache')
+        path = spec.replace('{CACHE_DIR}', cache_dir).replace('{HOME}', str(Path.home()))
+        if '{' in path:
+            return None
+        return os.path.normpath(path)
+
+    def get_executable_path(self) -> str:
+        """返回编译生成的可执行文件路径"""
+        options = self.get_effective_options()
+        stem = Path(self.main_file).stem
+        exe_name = f'{stem}.exe' if os.name == 'nt' else f'{stem}.bin'
+        if options.getboolean('standalone') and not options.getboolean('onefile'):
+            return os.path.join(self.output_dir, f'{stem}.dist', exe_name)
+        return os.path.join(self.output_dir, exe_name)
+
+    def get_output_size(self) -> int:
+        """返回发布产物的总大小：standalone 为整个 .dist 目录，否则为可执行文件"""
+        exe_path = self.get_executable_path()
+        options = self.get_effective_options()
+        if not (options.getboolean('standalone') and not options.getboolean('onefile')):
+            return os.path.getsize(exe_path) if os.path.exists(exe_path) else 0
+        total = 0
+        for root, _, files in os.walk(os.path.dirname(exe_path)):
+            total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+        return total
+
+    def build_nuitka_command(self) -> List[str]:
+        """构建Nuitka编译命令的参数列表，直接执行而不经过shell"""
+        cmd_parts = [
+            sys.executable, '-m', 'nuitka',
+            os.path.join(self.project_path, self.main_file),
+            f'--output-dir={self.output_dir}'  # 添加输出目录参数
+        ]
+
+        nuitka_config = self.get_effective_options()
         
         # 基本选项
         if nuitka_config.getboolean('standalone'):
@@ -104,6 +661,11 @@ class NuitkaCompiler:
         
         if nuitka_config.getboolean('onefile'):
             cmd_parts.append('--onefile')
+            tempdir_spec = self.get_onefile_tempdir_spec()
+            if tempdir_spec:
+                cmd_parts.append(f'--onefile-tempdir-spec={tempdir_spec}')
+            if nuitka_config['onefile_cache_mode'] != 'auto':
+                cmd_parts.append(f'--onefile-cache-mode={nuitka_config["onefile_cache_mode"]}')
             
         if nuitka_config.getboolean('show_progress'):
             cmd_parts.append('--show-progress')
@@ -113,7 +675,7 @@ class NuitkaCompiler:
 
         # 修改：移除之前的输出目录设置，使用类中定义的输出目录
         if nuitka_config['output_dir']:
-            print("警告: 配置中的 output_dir 设置将被忽略，统一使用 dist 目录")
+            self.log("警告: 配置中的 output_dir 设置将被忽略，统一使用 dist 目录")
 
         # 模块名称选择
         if nuitka_config['module_name_choice']:
@@ -122,7 +684,7 @@ class NuitkaCompiler:
         # Windows特定选项
         if os.name == 'nt':
             if nuitka_config['windows_icon']:
-                cmd_parts.append(f'--windows-icon-from-ico="{nuitka_config["windows_icon"]}"')
+                cmd_parts.append(f'--windows-icon-from-ico={nuitka_config["windows_icon"]}')
             
             console_mode = nuitka_config['windows_console_mode']
             if console_mode in ['force', 'disable', 'attach', 'hide']:
@@ -132,7 +694,7 @@ class NuitkaCompiler:
         for info_key in ['company_name', 'product_name', 'file_version', 
                         'file_description', 'copyright', 'trademarks']:
             if nuitka_config[info_key]:
-                cmd_parts.append(f'--{info_key.replace("_", "-")}="{nuitka_config[info_key]}"')
+                cmd_parts.append(f'--{info_key.replace("_", "-")}={nuitka_config[info_key]}')
 
         # 数据文件支持
         if nuitka_config['include_package_data']:
@@ -150,6 +712,11 @@ class NuitkaCompiler:
                 if pattern:
                     cmd_parts.append(f'--noinclude-dlls={pattern}')
 
+        if nuitka_config['nofollow_import_to']:
+            for module in nuitka_config['nofollow_import_to'].split(','):
+                if module:
+                    cmd_parts.append(f'--nofollow-import-to={module}')
+
         # 编译优化选项
         if nuitka_config['jobs'] != 'auto':
             cmd_parts.append(f'--jobs={nuitka_config["jobs"]}')
@@ -169,6 +736,9 @@ class NuitkaCompiler:
         if nuitka_config.getboolean('low_memory'):
             cmd_parts.append('--low-memory')
 
+        if not nuitka_config.getboolean('use_ccache'):
+            cmd_parts.append('--disable-ccache')
+
         # Python标记
         if nuitka_config['python_flag']:
             for flag in nuitka_config['python_flag'].split(','):
@@ -179,68 +749,534 @@ class NuitkaCompiler:
         if nuitka_config.getboolean('follow_imports'):
             cmd_parts.append('--follow-imports')
 
-        return ' '.join(cmd_parts)
+        if self.report_file:
+            cmd_parts.append(f'--report={self.report_file}')
+
+        # 预编译为扩展模块的包不再随主程序编译
+        for package in self.prebuilt_modules:
+            cmd_parts.append(f'--nofollow-import-to={package}')
+        if self.prebuilt_modules:
+            # standalone 默认会拦截被排除模块的导入，需要允许从可执行文件旁加载
+            cmd_parts.append('--no-deployment-flag=excluded-module-usage')
+
+        return cmd_parts
 
     def compile_project(self):
-        print(f"\n{TOOL_NAME} v{VERSION}")
-        print("="*50 + "\n")
+        self.log(f"\n{TOOL_NAME} v{VERSION}")
+        self.log("="*50 + "\n")
         
         if self.config.config['General'].getboolean('confirm_before_compile'):
             if not input("确认执行编译? (y/N): ").lower() == 'y':
-                print("取消编译")
+                self.log("取消编译")
                 return
 
         start_time = time.time()
         
         try:
-            print("开始编译项目...")
-            print(f"输出目录: {self.output_dir}")
-            command = self.build_nuitka_command()
-            print(f"执行命令: {command}")
-            
-            result = os.system(command)
+            self.log("开始编译项目...")
+            self.log(f"输出目录: {self.output_dir}")
+            self.plan_resources()
+            self.prebuilt_modules = self.build_module_packages()
+            if self.config.config['Nuitka'].getboolean('compilation_report'):
+                self.report_file = os.path.join(tempfile.mkdtemp(prefix='nuitka-report-'), 'report.xml')
+
+            existing_before = {p for p in self._get_temp_candidates() if os.path.exists(p)}
+            try:
+                while True:
+                    command = self.build_nuitka_command()
+                    self.log(f"执行命令: {format_command(command)}")
+                    self._start_progress()
+                    result = -1
+                    try:
+                        result = self._run_nuitka(command)
+                    finally:
+                        # 取消或超时时同样停止进度跟踪
+                        self._finish_progress(result == 0)
+                    if not self.memory_exhausted or not self._downgrade_resources():
+                        break
+            finally:
+                self._record_temp_dirs(existing_before)
             
             if result != 0:
                 raise RuntimeError("编译失败")
+
+            self._install_prebuilt_modules()
+            self._report_cache_stats()
+            self._report_compilation()
                 
             if self.config.config['General'].getboolean('clean_temp'):
-                print("清理临时文件...")
+                self.log("清理临时文件...")
                 self._cleanup()
                 
             total_time = time.time() - start_time
             minutes = int(total_time // 60)
             seconds = total_time % 60
             
-            print(f"\n编译完成！总用时: {minutes}分{seconds:.1f}秒")
-            print(f"输出文件在: {self.output_dir}")
+            self.log(f"\n编译完成！总用时: {minutes}分{seconds:.1f}秒")
+            self.log(f"输出文件在: {self.output_dir}")
+            self._report_incremental_build(total_time)
             
         except Exception as e:
-            print(f"编译过程中出错: {str(e)}")
+            self.log(f"编译过程中出错: {str(e)}")
+            if self.report_file:
+                shutil.rmtree(os.path.dirname(self.report_file), ignore_errors=True)
+                self.report_file = None
             self._cleanup()
             raise
 
+    def _run_nuitka(self, command: List[str]) -> int:
+        """在受管理的缓存目录下运行Nuitka，收集缓存统计，并在内存即将耗尽时终止编译"""
+        self.cache.reset_run()
+        self.memory_exhausted = False
+        self.frontend_memory = None
+        low_memory_event = threading.Event()
+
+        def on_low_memory(available: int):
+            self.log(f"警告: 可用内存仅剩 {available / 1024 / 1024:.0f}MB，终止本次编译")
+            self.memory_exhausted = True
+            low_memory_event.set()
+
+        nuitka_config = self.config.config['Nuitka']
+        monitor = None
+        if nuitka_config.getboolean('adaptive_resources'):
+            threshold = int(nuitka_config['memory_reserve_mb']) * 1024 * 1024 // 2
+            monitor = MemoryMonitor(threshold, on_low_memory)
+            if not monitor.start():
+                monitor = None
+
+        usage = {}
+        try:
+            result = run_process(command, cwd=self.project_path, env=build_env(self.cache.get_env(), self.base_env),
+                                 output=self.output, line_callback=self._handle_line,
+                                 cancel_event=[low_memory_event, self.cancel_event],
+                                 resource_usage=usage, timeout=self.step_timeout)
+        except ProcessCancelled:
+            # 内存不足时由本方法终止的编译交给调用方降级重试，用户取消则继续向上抛出
+            if not self.memory_exhausted or (self.cancel_event and self.cancel_event.is_set()):
+                raise
+            result = -1
+        finally:
+            if monitor:
+                monitor.stop()
+        if usage:
+            self.log(f"Nuitka进程: {format_usage(usage)}")
+        if monitor and result == 0:
+            self._record_memory_usage(monitor.peak_usage)
+        return result
+
+    def _start_progress(self):
+        build_dir = os.path.join(self.output_dir, f'{Path(self.main_file).stem}.build')
+        self.progress = NuitkaProgress(self._on_progress, build_dir, self.load_history().get('phases'))
+        self._last_phase = None
+        self.progress.start()
+
+    def _finish_progress(self, success: bool):
+        phases = self.progress.finish(success)
+        self.progress = None
+        if success:
+            history = self.load_history()
+            history['phases'] = phases
+            self.save_history(history)
+
+    def _on_progress(self, event: Dict[str, Any]):
+        if event['phase'] != self._last_phase and event['phase'] in PHASES:
+            self._last_phase = event['phase']
+            line = f"[进度] {event['phase_name']}，已用 {event['elapsed']:.0f}秒"
+            if event['eta'] is not None:
+                line += f"，约完成 {event['percent']:.0f}%，预计剩余 {event['eta']:.0f}秒"
+            self.log(line)
+        if self.progress_callback:
+            self.progress_callback(event)
+
+    def _handle_line(self, line: str):
+        self.cache.handle_line(line)
+        if self.progress:
+            self.progress.handle_line(line)
+        match = self.MEMORY_USAGE_PATTERN.search(line)
+        if match:
+            self.frontend_memory = max(self.frontend_memory or 0, int(match.group(1)))
+
+    def _report_cache_stats(self):
+        stats = self.cache.record_run()
+        total = stats['hits'] + stats['misses']
+        if total:
+            self.log(f"\nC编译缓存: 命中 {stats['hits']}/{total} ({stats['hits'] / total:.0%})，"
+                     f"未命中 {stats['misses']}，估算节省 {stats['saved_seconds']:.1f}秒")
+            self.log(f"累计: 命中 {stats['total_hits']}，未命中 {stats['total_misses']}，"
+                     f"累计节省 {stats['total_saved_seconds'] / 60:.1f}分钟")
+        elif self.config.config['Nuitka'].getboolean('use_ccache'):
+            self.log("\n未获取到C编译缓存统计，请确认已安装 ccache")
+
+        removed, freed = self.cache.evict()
+        if removed:
+            self.log(f"编译缓存超过上限，已淘汰 {removed} 个文件，释放 {freed / 1024 / 1024:.1f}MB")
+
+    def _report_compilation(self):
+        """解析编译报告，打印占用最多的包并保存本次统计；须在清理构建目录之前调用"""
+        if not self.report_file:
+            return
+        try:
+            if not os.path.exists(self.report_file):
+                self.log("\n未生成编译报告")
+                return
+            stem = Path(self.main_file).stem
+            options = self.get_effective_options()
+            dist_dir = os.path.join(self.output_dir, f'{stem}.dist') if options.getboolean('standalone') else None
+            report = NuitkaReport(self.report_file, os.path.join(self.output_dir, f'{stem}.build'), dist_dir)
+            try:
+                report.parse()
+            except Exception as e:
+                self.log(f"\n警告: 无法解析编译报告: {e}")
+                return
+            previous = NuitkaReport.load_latest(self.report_history_dir)
+            report.print_summary(int(self.config.config['Nuitka']['report_top']), previous, self.output)
+            saved = report.save(self.report_history_dir)
+            self.log(f"模块统计已保存到: {saved}")
+        finally:
+            shutil.rmtree(os.path.dirname(self.report_file), ignore_errors=True)
+            self.report_file = None
+
+    def prewarm_cache(self):
+        """以当前项目作为参考构建预热编译缓存，构建输出写入临时目录后丢弃"""
+        self.log(f"使用参考构建预热编译缓存: {self.cache.cache_dir}")
+        original_output_dir = self.output_dir
+        self.output_dir = tempfile.mkdtemp(prefix='nuitka-prewarm-')
+        start_time = time.time()
+        try:
+            command = self.build_nuitka_command()
+            self.log(f"执行命令: {format_command(command)}")
+            if self._run_nuitka(command) != 0:
+                raise RuntimeError("参考构建失败")
+            self._report_cache_stats()
+        finally:
+            shutil.rmtree(self.output_dir, ignore_errors=True)
+            self.output_dir = original_output_dir
+        self.log(f"缓存预热完成，用时 {time.time() - start_time:.1f}秒，"
+                 f"缓存大小 {self.cache.get_size() / 1024 / 1024:.1f}MB")
+
     def _cleanup(self):
-        """清理临时文件，但保留dist目录"""
-        build_dir = os.path.join(self.project_path, 'build')
-        if os.path.exists(build_dir):
-            shutil.rmtree(build_dir)
-            
-        # 清理项目目录中的临时文件，但保留dist目录的内容
-        for root, dirs, files in os.walk(self.project_path):
-            if 'dist' in dirs:
-                dirs.remove('dist')  # 不遍历dist目录
-            for file in files:
-                if file.endswith(('.pyd', '.so', '.pyo', '.pyc')):
-                    try:
-                        os.remove(os.path.join(root, file))
-                    except Exception as e:
-                        print(f"警告: 无法删除文件 {file}: {e}")
+        """按构建清单清理本次构建产生的中间文件，保留dist目录和项目中原有的文件"""
+        removed = self.manifest.cleanup()
+        self.log(f"已清理 {removed} 个构建产物")
+
+class VariantMatrix:
+    """按配置的选项组合并行构建多个变体，对每个产物运行基准测试并排名"""
+
+    METRICS = ('runtime', 'startup', 'size', 'build_time')
+
+    def __init__(self, project_path: str, main_file: str, config: NuitkaConfig = None, output: TextIO = None):
+        self.project_path = os.path.abspath(project_path)
+        self.main_file = main_file
+        self.config = config or NuitkaConfig()
+        self.output = output
+        self.matrix_config = self.config.config['Matrix']
+        self.variants = self.parse_axes(self.matrix_config['axes'])
+        self.results: List[Dict[str, Any]] = []
+        dist_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'dist'))
+        self.matrix_dir = os.path.join(dist_dir, f'{Path(self.project_path).name}-matrix')
+
+    def log(self, *args, **kwargs):
+        print(*args, file=self.output or sys.stdout, **kwargs)
+
+    def parse_axes(self, axes: str) -> List[Dict[str, str]]:
+        """解析矩阵维度并返回全部组合，每个组合是一组Nuitka选项覆盖项"""
+        names, values = [], []
+        for axis in axes.split(';'):
+            if not axis.strip():
+                continue
+            if ':' not in axis:
+                raise ValueError(f"无效的矩阵维度: {axis}，格式应为 选项:取值1|取值2")
+            name, choices = axis.split(':', 1)
+            name = name.strip()
+            if name not in self.config.config['Nuitka']:
+                raise ValueError(f"未知的Nuitka选项: {name}")
+            names.append(name)
+            values.append([c.strip() for c in choices.split('|')])
+        if not names:
+            raise ValueError("变体矩阵为空，请配置 Matrix.axes")
+        return [dict(zip(names, combo)) for combo in itertools.product(*values)]
+
+    @staticmethod
+    def describe(options: Dict[str, str]) -> str:
+        return ' '.join(f'{k}={v or "(空)"}' for k, v in options.items())
+
+    def _copy_config(self) -> NuitkaConfig:
+        config = self.config.copy()
+        config.config['General']['confirm_before_compile'] = 'false'
+        return config
+
+    def _get_parallel_builds(self) -> int:
+        value = self.matrix_config.get('parallel_builds', 'auto')
+        if value == 'auto':
+            # 每个Nuitka构建本身会并行编译C文件，默认只同时运行两个变体
+            return max(1, min(len(self.variants), 2, os.cpu_count() or 1))
+        return max(1, int(value))
+
+    def _build_variant(self, index: int, options: Dict[str, str], jobs: int) -> Dict[str, Any]:
+        name = f'v{index + 1}'
+        compiler = NuitkaCompiler(self.project_path, self.main_file, self._copy_config(),
+                                  output=PrefixedOutput(name, self.output))
+        compiler.output_dir = os.path.join(self.matrix_dir, name)
+        # 各变体使用独立的构建清单，并行构建时互不覆盖
+        compiler.manifest = BuildManifest(BuildManifest.default_path(f'nuitka-matrix-{name}', self.project_path),
+                                          output=compiler.output)
+        # 构建历史、编译报告和缓存统计写入矩阵目录：并行的变体不争用同一文件，
+        # 受其他变体内存占用影响的数据也不会混入主项目的历史记录和预计用时
+        # 按选项区分，矩阵维度改变后同名变体不会沿用其他选项的历史
+        digest = hashlib.sha1(self.describe(options).encode('utf-8')).hexdigest()[:8]
+        state_dir = Path(self.matrix_dir) / 'history' / f'{name}-{digest}'
+        state_dir.mkdir(parents=True, exist_ok=True)
+        compiler.history_file = state_dir / 'stats.json'
+        compiler.report_history_dir = state_dir / 'reports'
+        compiler.cache.stats_file = str(state_dir / NuitkaCache.STATS_FILE)
+        compiler.option_overrides.update(options)
+        if compiler.config.config['Nuitka']['jobs'] == 'auto' and 'jobs' not in options:
+            compiler.option_overrides['jobs'] = str(jobs)
+
+        result = {'name': name, 'options': options, 'ok': False}
+        start_time = time.time()
+        try:
+            compiler.compile_project()
+        except Exception as e:
+            result['error'] = str(e)
+            return result
+        finally:
+            compiler.output.flush()
+        result['build_time'] = time.time() - start_time
+        result['executable'] = compiler.get_executable_path()
+        result['size'] = compiler.get_output_size()
+        result['ok'] = os.path.exists(result['executable'])
+        if not result['ok']:
+            result['error'] = '未找到生成的可执行文件'
+        return result
+
+    def _benchmark(self, result: Dict[str, Any]):
+        """多次运行基准测试命令，取运行时间和到首行输出时间的中位数"""
+        exe = result['executable']
+        template = self.matrix_config['benchmark_command'] or '{exe}'
+        # 先拆分再替换，可执行文件路径中的空格不需要转义
+        command = [arg.replace('{exe}', exe) for arg in shlex.split(template, posix=os.name != 'nt')]
+        runtimes, startups = [], []
+        for _ in range(max(1, int(self.matrix_config['benchmark_runs']))):
+            first_output = None
+            start_time = time.perf_counter()
+
+            def on_line(line: str):
+                nonlocal first_output
+                if first_output is None:
+                    first_output = time.perf_counter()
+
+            code = run_process(command, cwd=self.project_path, output=io.StringIO(), line_callback=on_line)
+            end_time = time.perf_counter()
+            if code != 0:
+                result['ok'] = False
+                result['error'] = f'基准测试返回码 {code}'
+                return
+            runtimes.append(end_time - start_time)
+            startups.append((first_output or end_time) - start_time)
+        result['runtime'] = statistics.median(runtimes)
+        result['startup'] = statistics.median(startups)
+
+    def _get_weights(self) -> Dict[str, float]:
+        weights = dict.fromkeys(self.METRICS, 0.0)
+        for item in self.matrix_config['weights'].split(','):
+            if ':' in item:
+                key, value = item.split(':', 1)
+                if key.strip() in weights:
+                    weights[key.strip()] = float(value)
+        return weights
+
+    def rank(self) -> List[Dict[str, Any]]:
+        """按各指标相对于最优值的倍数加权求和打分，分数越低越好"""
+        succeeded = [r for r in self.results if r['ok']]
+        weights = self._get_weights()
+        total_weight = sum(weights.values()) or 1.0
+        best = {m: min(r[m] for r in succeeded) for m in self.METRICS} if succeeded else {}
+        for result in succeeded:
+            result['score'] = sum(weights[m] * (result[m] / best[m] if best[m] else 1.0)
+                                  for m in self.METRICS) / total_weight
+        return sorted(succeeded, key=lambda r: r['score'])
+
+    def run(self) -> List[Dict[str, Any]]:
+        workers = self._get_parallel_builds()
+        jobs = max(1, (os.cpu_count() or 1) // workers)
+        self.log(f"变体矩阵: {len(self.variants)} 个变体，同时构建 {workers} 个")
+        for index, options in enumerate(self.variants):
+            self.log(f"  v{index + 1}: {self.describe(options)}")
+
+        start_time = time.time()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            self.results = list(executor.map(lambda item: self._build_variant(*item, jobs),
+                                             enumerate(self.variants)))
+        self.log(f"\n全部变体构建完成，用时 {time.time() - start_time:.1f}秒")
+
+        # 基准测试顺序执行，避免变体之间争用CPU影响计时
+        for result in self.results:
+            if result['ok']:
+                self.log(f"基准测试 {result['name']}...")
+                self._benchmark(result)
+
+        ranking = self.rank()
+        self._report(ranking)
+        self._save_results(ranking)
+        return ranking
+
+    def _report(self, ranking: List[Dict[str, Any]]):
+        self.log(f"\n{'排名':<4} {'变体':<5} {'得分':>6} {'运行(秒)':>9} {'启动(秒)':>9} {'体积(MB)':>9} {'构建(秒)':>9}  选项")
+        for position, result in enumerate(ranking, 1):
+            self.log(f"{position:<6} {result['name']:<6} {result['score']:>7.3f} {result['runtime']:>10.3f} "
+                     f"{result['startup']:>10.3f} {result['size'] / 1024 / 1024:>10.1f} "
+                     f"{result['build_time']:>10.1f}  {self.describe(result['options'])}")
+        for result in self.results:
+            if not result['ok']:
+                self.log(f"失败 {result['name']} ({self.describe(result['options'])}): {result.get('error', '')}")
+
+    def _save_results(self, ranking: List[Dict[str, Any]]):
+        os.makedirs(self.matrix_dir, exist_ok=True)
+        results_file = os.path.join(self.matrix_dir, 'matrix_results.json')
+        with open(results_file, 'w', encoding='utf-8') as f:
+            json.dump({'ranking': [r['name'] for r in ranking], 'variants': self.results},
+                      f, ensure_ascii=False, indent=2)
+        self.log(f"\n结果已保存到: {results_file}")
+
+    def save_best(self, ranking: List[Dict[str, Any]]) -> bool:
+        """把排名第一的变体选项写入 nuitka_config.ini"""
+        if not ranking:
+            return False
+        best = ranking[0]
+        for key, value in best['options'].items():
+            self.config.config['Nuitka'][key] = value
+        self.config.save_config()
+        self.log(f"已将 {best['name']} 的选项写入 {self.config.config_file}: {self.describe(best['options'])}")
+        return True
+
+
+class StartupBenchmark:
+    """分别构建 standalone 和 onefile 输出，测量冷启动和热启动延迟的分位数"""
+
+    MODES = ('standalone', 'onefile')
+    PERCENTILES = (50, 90, 99)
+
+    def __init__(self, project_path: str, main_file: str, config: NuitkaConfig = None,
+                 runs: int = 10, run_args: str = '', output: TextIO = None):
+        self.project_path = os.path.abspath(project_path)
+        self.main_file = main_file
+        self.config = config or NuitkaConfig()
+        self.runs = max(1, runs)
+        self.run_args = run_args
+        self.output = output
+        dist_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'dist'))
+        self.benchmark_dir = os.path.join(dist_dir, f'{Path(self.project_path).name}-startup')
+
+    def log(self, *args, **kwargs):
+        print(*args, file=self.output or sys.stdout, **kwargs)
+
+    def _build(self, mode: str) -> NuitkaCompiler:
+        config = self.config.copy()
+        config.config['General']['confirm_before_compile'] = 'false'
+        compiler = NuitkaCompiler(self.project_path, self.main_file, config,
+                                  output=PrefixedOutput(mode, self.output))
+        compiler.output_dir = os.path.join(self.benchmark_dir, mode)
+        compiler.option_overrides.update({'standalone': 'true', 'onefile': str(mode == 'onefile').lower()})
+        try:
+            compiler.compile_project()
+        finally:
+            compiler.output.flush()
+        return compiler
+
+    @staticmethod
+    def _evict_page_cache(path: str):
+        """通知内核丢弃文件的页缓存，使下一次启动从磁盘读取（仅支持 posix_fadvise 的系统）"""
+        if not hasattr(os, 'posix_fadvise'):
+            return
+        paths = [path]
+        if os.path.isdir(path):
+            paths = [os.path.join(root, f) for root, _, files in os.walk(path) for f in files]
+        for file_path in paths:
+            try:
+                fd = os.open(file_path, os.O_RDONLY)
+            except OSError:
+                continue
+            try:
+                os.fsync(fd)
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            except OSError:
+                pass
+            finally:
+                os.close(fd)
+
+    def _run_once(self, exe: str) -> float:
+        command = [exe, *shlex.split(self.run_args)]
+        start_time = time.perf_counter()
+        code = run_process(command, cwd=self.project_path, output=io.StringIO())
+        elapsed = time.perf_counter() - start_time
+        if code != 0:
+            raise RuntimeError(f"{exe} 返回码 {code}")
+        return elapsed
+
+    def _measure(self, compiler: NuitkaCompiler, cold: bool) -> List[float]:
+        exe = compiler.get_executable_path()
+        onefile = compiler.get_effective_options().getboolean('onefile')
+        extract_dir = compiler.resolve_onefile_dir(compiler.get_onefile_tempdir_spec()) if onefile else None
+        files = exe if onefile else os.path.dirname(exe)
+        if not cold:
+            self._run_once(exe)  # 预热：填充页缓存和 onefile 解压缓存
+        times = []
+        for _ in range(self.runs):
+            if cold:
+                if extract_dir:
+                    shutil.rmtree(extract_dir, ignore_errors=True)
+                self._evict_page_cache(files)
+            times.append(self._run_once(exe))
+        return times
+
+    @staticmethod
+    def percentile(values: List[float], percent: float) -> float:
+        ordered = sorted(values)
+        position = (len(ordered) - 1) * percent / 100
+        lower = int(position)
+        upper = min(lower + 1, len(ordered) - 1)
+        return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+    def run(self) -> Dict[str, Dict[str, List[float]]]:
+        results = {}
+        for mode in self.MODES:
+            self.log(f"构建 {mode} 输出...")
+            compiler = self._build(mode)
+            results[mode] = {}
+            for state, cold in (('cold', True), ('warm', False)):
+                self.log(f"测量 {mode} {'冷' if cold else '热'}启动 ({self.runs} 次)...")
+                results[mode][state] = self._measure(compiler, cold)
+            extract_dir = compiler.resolve_onefile_dir(compiler.get_onefile_tempdir_spec())
+            if mode == 'onefile' and extract_dir:
+                shutil.rmtree(extract_dir, ignore_errors=True)
+        self._report(results)
+        return results
+
+    def _report(self, results: Dict[str, Dict[str, List[float]]]):
+        header = ''.join(f"{f'p{p}':>10}" for p in self.PERCENTILES)
+        self.log(f"\n启动延迟 (毫秒，{self.runs} 次):")
+        self.log(f"{'输出':<12}{'状态':<6}{header}{'最小':>9}{'最大':>9}")
+        for mode, states in results.items():
+            for state, times in states.items():
+                values = ''.join(f"{self.percentile(times, p) * 1000:>10.1f}" for p in self.PERCENTILES)
+                self.log(f"{mode:<12}{state:<8}{values}{min(times) * 1000:>10.1f}{max(times) * 1000:>10.1f}")
+        if not hasattr(os, 'posix_fadvise'):
+            self.log("注意: 当前系统无法丢弃页缓存，冷启动仅清除了 onefile 解压目录")
+        for state in ('cold', 'warm'):
+            standalone = self.percentile(results['standalone'][state], 50)
+            onefile = self.percentile(results['onefile'][state], 50)
+            if standalone:
+                self.log(f"{'冷' if state == 'cold' else '热'}启动中位数: onefile 为 standalone 的 {onefile / standalone:.2f} 倍")
+
 
 def main():
     parser = argparse.ArgumentParser(description=f'{TOOL_NAME} - 用于编译Python项目的工具')
     parser.add_argument('project_path', nargs='?', help='项目路径')
     parser.add_argument('main_file', nargs='?', help='主入口文件')
     parser.add_argument('--yes', '-y', action='store_true', help='自动确认所有提示')
+    parser.add_argument('--config', action='store_true', help='配置模式')
+    parser.add_argument('--no-daemon', action='store_true', help='不使用构建守护进程，始终在本进程中构建')
     
     # 添加Nuitka相关的命令行参数
     parser.add_argument('--standalone', action='store_true', help='创建独立可执行文件')
@@ -267,6 +1303,29 @@ def main():
     parser.add_argument('--output-dir', help='输出目录路径')
     parser.add_argument('--module-name-choice', choices=['original', 'runtime'], 
                        default='original', help='模块名称选择模式')
+    parser.add_argument('--nuitka_use_ccache', help='是否使用 ccache 缓存C编译结果 (true/false)')
+    parser.add_argument('--nuitka_cache_dir', help='编译缓存目录')
+    parser.add_argument('--nuitka_cache_max_size_mb', help='编译缓存容量上限 (MB)')
+    parser.add_argument('--nuitka_adaptive_resources', help='是否根据内存和CPU自动选择 jobs/lto/low_memory (true/false)')
+    parser.add_argument('--nuitka_memory_reserve_mb', help='为系统保留的内存 (MB)')
+    parser.add_argument('--nuitka_module_packages', help='预编译为扩展模块的包，格式: package1,package2 或 auto')
+    parser.add_argument('--nuitka_compilation_report', help='是否生成编译报告并统计各模块开销 (true/false)')
+    parser.add_argument('--prewarm-cache', action='store_true', help='以指定项目作为参考构建预热编译缓存')
+    parser.add_argument('--nuitka_nofollow_import_to', help='不跟随编译的模块/包，格式: package1,package2')
+    parser.add_argument('--analyze-imports', action='store_true', help='运行程序记录实际导入，建议可排除的包和DLL')
+    parser.add_argument('--analyze_run_args', help='分析导入时运行程序的参数，多组参数用 ; 分隔')
+    parser.add_argument('--apply-analysis', action='store_true', help='把导入分析的建议写入配置文件')
+    parser.add_argument('--nuitka_onefile_tempdir_spec', help='onefile 解压目录: 留空/versioned/Nuitka路径模板')
+    parser.add_argument('--nuitka_onefile_cache_mode', choices=['auto', 'cached', 'temporary'], help='onefile 解压缓存模式')
+    parser.add_argument('--startup-benchmark', type=int, metavar='N', help='构建 standalone 和 onefile 输出并各测量 N 次冷/热启动')
+    parser.add_argument('--startup-args', default='', help='启动基准测试时传给程序的参数')
+    parser.add_argument('--progress-json', metavar='FILE', help='把结构化进度事件以JSON行写入文件，- 表示标准输出')
+    parser.add_argument('--matrix', action='store_true', help='构建变体矩阵并对各变体运行基准测试排名')
+    parser.add_argument('--matrix_axes', help='变体矩阵维度，格式: 选项:取值1|取值2;选项2:取值1|取值2')
+    parser.add_argument('--matrix_benchmark_command', help='基准测试命令，{exe} 替换为可执行文件路径')
+    parser.add_argument('--matrix_benchmark_runs', help='每个变体的基准测试次数')
+    parser.add_argument('--matrix_parallel_builds', help='同时构建的变体数 (auto 或数字)')
+    parser.add_argument('--save-best', action='store_true', help='把排名第一的变体选项写入配置文件')
 
     args = parser.parse_args()
     config = NuitkaConfig()
@@ -278,15 +1337,90 @@ def main():
     if not all([args.project_path, args.main_file]):
         _interactive_input(args)
 
+    progress_stream = None
     try:
         config.update_from_args(vars(args))
         if args.yes:
             config.config['General']['confirm_before_compile'] = 'false'
-        compiler = NuitkaCompiler(args.project_path, args.main_file, config)
+        if args.progress_json:
+            progress_stream = sys.stdout if args.progress_json == '-' else open(args.progress_json, 'w', encoding='utf-8')
+        compiler = NuitkaCompiler(args.project_path, args.main_file, config,
+                                  progress_callback=json_lines_callback(progress_stream) if progress_stream else None)
+        if args.prewarm_cache:
+            compiler.prewarm_cache()
+            return
+        if args.matrix:
+            _run_matrix(args, config)
+            return
+        if args.analyze_imports:
+            _analyze_imports(args, compiler)
+            return
+        if args.startup_benchmark:
+            StartupBenchmark(args.project_path, args.main_file, config, args.startup_benchmark,
+                             args.startup_args).run()
+            return
+        if not args.no_daemon and build_daemon.is_running():
+            _compile_with_daemon(compiler)
+            return
         compiler.compile_project()
     except Exception as e:
         print(f"错误: {str(e)}")
         sys.exit(1)
+    finally:
+        if progress_stream and progress_stream is not sys.stdout:
+            progress_stream.close()
+
+def _analyze_imports(args, compiler: NuitkaCompiler):
+    config = compiler.config
+    analyzer = ImportAnalyzer(compiler.project_path, compiler.main_file, compiler.report_history_dir)
+    timeout = float(config.config['Analyze']['timeout'])
+    run_args_list = config.config['Analyze']['run_args'].split(';')
+    recorded = 0
+    for run_args in run_args_list:
+        print(f"运行程序记录导入 (参数: {run_args.strip() or '无'})...")
+        recorded += analyzer.record_run(run_args.strip(), timeout)
+    if not recorded:
+        raise RuntimeError("没有成功记录到任何导入")
+
+    result = analyzer.analyze()
+    analyzer.print_proposal(result)
+    if not (result['nofollow'] or result['noinclude']):
+        return
+    confirm = config.config['General'].getboolean('confirm_before_compile')
+    if args.apply_analysis or (confirm and input("\n把建议写入配置文件? (y/N): ").lower() == 'y'):
+        nuitka_config = config.config['Nuitka']
+        for key, proposed in (('nofollow_import_to', result['nofollow']), ('noinclude_dlls', result['noinclude'])):
+            current = [item for item in nuitka_config[key].split(',') if item]
+            nuitka_config[key] = ','.join(current + [item for item in sorted(proposed) if item not in current])
+        config.save_config()
+        print(f"已写入 {config.config_file}")
+
+def _run_matrix(args, config: NuitkaConfig):
+    confirm = config.config['General'].getboolean('confirm_before_compile')
+    matrix = VariantMatrix(args.project_path, args.main_file, config)
+    if confirm and not input(f"确认构建 {len(matrix.variants)} 个变体? (y/N): ").lower() == 'y':
+        print("取消编译")
+        return
+    ranking = matrix.run()
+    if not ranking:
+        raise RuntimeError("没有成功完成基准测试的变体")
+    if args.save_best or (confirm and input("\n将最优变体的选项写入配置文件? (y/N): ").lower() == 'y'):
+        matrix.save_best(ranking)
+
+def _compile_with_daemon(compiler: NuitkaCompiler):
+    """守护进程运行时由其执行构建，本进程只负责确认和输出日志"""
+    if compiler.config.config['General'].getboolean('confirm_before_compile'):
+        if not input("确认执行编译? (y/N): ").lower() == 'y':
+            print("取消编译")
+            return
+    print("检测到构建守护进程，提交构建任务...")
+    config = {s: dict(compiler.config.config.items(s)) for s in compiler.config.config.sections()}
+    ok = build_daemon.submit_job('nuitka', compiler.project_path, [compiler.main_file], config)
+    if ok is None:
+        print("构建守护进程不可用，改为本地构建")
+        compiler.compile_project()
+    elif not ok:
+        sys.exit(1)
 
 def _interactive_config(config: NuitkaConfig):
     print(f"\n{TOOL_NAME} v{VERSION}")
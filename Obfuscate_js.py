@@ -1,16 +1,31 @@
+import io
 import os
+import re
 import sys
 import time
 import shutil
+import uuid
 import argparse
+import tempfile
+import threading
 import configparser
-import subprocess
-from typing import List, Set, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from typing import Callable, TextIO, List, Set, Dict, Any
 from pathlib import Path
+from process_runner import run_process, format_usage, ProcessTimeout, ProcessCancelled
+from node_pool import NodeWorkerPool, get_node_path, find_package_version
+from content_cache import ContentCache, hash_file
+from build_manifest import BuildManifest
+import js_minifier
+from build_progress import BatchProgress
+from js_profiler import ObfuscationProfiler, load_execution_profile, classify_hot_files
 
 TOOL_NAME = "JavaScript 项目混淆工具"
 VERSION = "0.1.0"
 
+# 处理方式 -> 显示名称
+ENGINES = {'pool': '常驻工作进程', 'cli': '逐个文件启动命令', 'python': '内置压缩器'}
+
 def show_tool_info():
     print(f"\n{TOOL_NAME} v{VERSION}")
     print("="*50 + "\n")
@@ -19,7 +34,16 @@ class ObfuscatorConfig:
     DEFAULT_CONFIG = {
         'General': {
             'clean_temp': 'true',
-            'confirm_before_process': 'true'
+            'confirm_before_process': 'true',
+            'step_timeout': '120',  # 处理单个文件的时限（秒），超时终止整个进程树，0 为不限制
+            # pool: 常驻Node工作进程批量处理；cli: 每个文件启动一次 javascript-obfuscator 命令；
+            # python: 内置的压缩器，只删除注释和空白，不混淆也不需要Node，忽略 [Obfuscator] 中的选项
+            'engine': 'pool',
+            'workers': 'auto',  # 同时处理的文件数（工作进程数），auto 为CPU核数
+            # 按文件内容、混淆选项和混淆器版本缓存输出，未修改的文件直接使用缓存
+            'cache': 'true',
+            'cache_dir': '',  # 默认 ~/.projectcompiler/js_cache
+            'cache_max_size_mb': '1024'
         },
         'Obfuscator': {
             'compact': 'true',
@@ -30,6 +54,31 @@ class ObfuscatorConfig:
             'string-array': 'true',
             'string-array-threshold': '0.75',
             'unicode-escape-sequence': 'true'
+        },
+        # 热点代码使用的轻量配置，只在 [HotPath] profile 指定了性能数据时使用
+        'LightObfuscator': {
+            'compact': 'true',
+            'control-flow-flattening': 'false',
+            'control-flow-flattening-threshold': '0',
+            'dead-code-injection': 'false',
+            'dead-code-injection-threshold': '0',
+            'string-array': 'true',
+            'string-array-threshold': '0.25',
+            'unicode-escape-sequence': 'false'
+        },
+        'HotPath': {
+            # V8 CPU profile (node --cpu-prof 生成的 .cpuprofile)，或 NODE_V8_COVERAGE 生成的覆盖率文件或目录；
+            # 热点文件使用 [LightObfuscator] 的配置，其他文件使用 [Obfuscator] 的配置
+            'profile': '',
+            'hot_fraction': '0.9'  # 按执行量从大到小选出热点文件，直到覆盖全部执行量的这一比例
+        },
+        'Profile': {
+            # 测量混淆对运行速度影响的基准脚本，逗号分隔的项目内相对路径；
+            # 脚本用相对路径加载被测代码，运行时间应远大于Node的启动时间
+            'benchmarks': '',
+            'runs': '5',  # 每个变体运行的次数，取中位数
+            'slowdown_budget': '1.5',  # 自动调整阈值时允许的最大减速倍数
+            'timeout': '300'  # 单次运行基准脚本的时限（秒），0 为不限制
         }
     }
 
@@ -56,12 +105,37 @@ class ObfuscatorConfig:
                     self.config[section][key] = str(args[arg_name])
 
 class JSObfuscator:
-    def __init__(self, project_path: str | Path, config: ObfuscatorConfig = None):
+    def __init__(self, project_path: str | Path, config: ObfuscatorConfig = None, output: TextIO = None,
+                 cancel_event: threading.Event = None):
         if not Path(project_path).exists():
             raise ValueError(f"项目路径不存在: {project_path}")
         self.project_path = os.path.abspath(project_path)
         self.output_dir = os.path.join(self.project_path, 'dist')
         self.config = config or ObfuscatorConfig()
+        # 输出流为 None 时使用调用时的 sys.stdout
+        self.output = output
+        # 被设置时终止正在运行的子进程，用于从界面停止处理；按 Ctrl+C 时也通过它停止所有并行任务
+        self.cancel_event = cancel_event or threading.Event()
+        self.step_timeout = float(self.config.config['General'].get('step_timeout', '0')) or None
+        self.executable = None
+        # 所有子进程的CPU时间合计和最大峰值内存
+        self.child_usage = {'cpu_time': 0.0, 'peak_rss': 0}
+        self.get_engine()
+        # 源文件 -> 随机种子，由内容和选项决定，保证相同输入得到相同输出
+        self.file_seeds: Dict[str, int] = {}
+        # 按性能数据分类出的热点文件，使用轻量配置
+        self.hot_files: Set[str] = set()
+        self.node_path = None
+        self._lock = threading.Lock()
+
+    def log(self, *args, **kwargs):
+        print(*args, file=self.output or sys.stdout, **kwargs)
+
+    def get_engine(self) -> str:
+        engine = self.config.config['General'].get('engine', 'pool')
+        if engine not in ENGINES:
+            raise ValueError(f"不支持的处理方式: {engine}")
+        return engine
 
     def collect_js_files(self) -> List[str]:
         """收集所有JS文件"""
@@ -75,10 +149,10 @@ class JSObfuscator:
                     js_files.append(os.path.join(root, file))
         return js_files
 
-    def create_obfuscator_config(self) -> dict:
+    def create_obfuscator_config(self, section: str = 'Obfuscator') -> dict:
         """创建混淆器配置"""
         obf_config = {}
-        for key, value in self.config.config['Obfuscator'].items():
+        for key, value in self.config.config[section].items():
             if value.lower() in ('true', 'false'):
                 obf_config[key] = value.lower() == 'true'
             elif value.replace('.', '').isdigit():
@@ -87,59 +161,382 @@ class JSObfuscator:
                 obf_config[key] = value
         return obf_config
 
+    def get_library_options(self, section: str = 'Obfuscator') -> dict:
+        """把命令行风格的选项名 (control-flow-flattening) 转换为库接口的选项名 (controlFlowFlattening)"""
+        options = {}
+        for key, value in self.create_obfuscator_config(section).items():
+            head, *rest = key.split('-')
+            options[head + ''.join(part.capitalize() for part in rest)] = value
+        return options
+
+    def get_options_section(self, js_file: str) -> str:
+        return 'LightObfuscator' if js_file in self.hot_files else 'Obfuscator'
+
+    def classify_hot_files(self, js_files: List[str]):
+        """读取 [HotPath] profile 指定的性能数据，选出使用轻量配置的热点文件"""
+        self.hot_files = set()
+        hot_path = self.config.config['HotPath']
+        if not hot_path.get('profile'):
+            return
+        # 性能数据可能是运行原始代码或混淆后的代码得到的
+        weights = load_execution_profile(os.path.expanduser(hot_path['profile']),
+                                         [self.project_path, self.output_dir])
+        weights = {file: functions for file, functions in weights.items()
+                   if os.path.join(self.project_path, file) in js_files}
+        hot = classify_hot_files(weights, float(hot_path.get('hot_fraction', '0.9')))
+        self.hot_files = {os.path.join(self.project_path, file) for file in hot}
+
+        total = sum(sum(functions.values()) for functions in weights.values())
+        covered = sum(sum(weights[file].values()) for file in hot)
+        self.log(f"热点文件 {len(hot)}/{len(js_files)} 个，占记录到的执行量的 {covered / total if total else 0:.1%}，"
+                 f"使用轻量配置；{len(js_files) - len(hot)} 个文件使用完整配置")
+        for file in sorted(hot, key=lambda f: sum(weights[f].values()), reverse=True):
+            top = ', '.join(name for name, _ in weights[file].most_common(3))
+            self.log(f"  {file} ({sum(weights[file].values()) / total:.1%}): {top}")
+
+    def _get_node_path(self) -> str:
+        if self.node_path is None:
+            self.node_path = get_node_path(self.project_path)
+        return self.node_path
+
+    def _get_cache(self) -> ContentCache | None:
+        general = self.config.config['General']
+        if not general.getboolean('cache', fallback=True):
+            return None
+        cache_dir = general.get('cache_dir', '') or str(Path.home() / '.projectcompiler' / 'js_cache')
+        return ContentCache(cache_dir, int(general.get('cache_max_size_mb', '1024')), suffix='.js')
+
+    def get_output_path(self, js_file: str) -> str:
+        return os.path.join(self.output_dir, os.path.relpath(js_file, self.project_path))
+
+    def _get_workers(self) -> int:
+        value = self.config.config['General'].get('workers', 'auto')
+        if value == 'auto':
+            return os.cpu_count() or 1
+        return max(1, int(value))
+
     def obfuscate_file(self, js_file: str):
-        """混淆单个JS文件"""
-        rel_path = os.path.relpath(js_file, self.project_path)
-        output_path = os.path.join(self.output_dir, rel_path)
+        """混淆单个JS文件，输出先写入临时文件，成功后再替换目标文件"""
+        if self.cancel_event.is_set():
+            raise ProcessCancelled("操作已取消")
+        output_path = self.get_output_path(js_file)
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        # 保留 .js 扩展名，否则 javascript-obfuscator 会把输出路径当作目录
+        temp_path = f'{output_path}.tmp-{uuid.uuid4().hex[:8]}.js'
 
-        config = self.create_obfuscator_config()
-        config_str = ' '.join([f'--{k} {str(v).lower()}' for k, v in config.items()])
-        
-        cmd = f'javascript-obfuscator "{js_file}" --output "{output_path}" {config_str}'
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            print(f"混淆失败 {js_file}: {result.stderr}")
+        config = self.create_obfuscator_config(self.get_options_section(js_file))
+        args = [js_file, '--output', temp_path]
+        for key, value in config.items():
+            args += [f'--{key}', str(value).lower()]
+        if js_file in self.file_seeds:
+            args += ['--seed', str(self.file_seeds[js_file])]
+        try:
+            ok = self._run_tool(args, js_file)
+            if ok:
+                os.replace(temp_path, output_path)
+            return ok
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _find_executable(self) -> str:
+        # Windows 上npm安装的命令是 .cmd 脚本，需要解析出完整路径才能不经过shell执行
+        executable = shutil.which('javascript-obfuscator')
+        if not executable:
+            raise RuntimeError("未找到 javascript-obfuscator，请先执行 npm install -g javascript-obfuscator")
+        return executable
+
+    def _run_tool(self, args: List[str], source_file: str) -> bool:
+        """运行一次 javascript-obfuscator，失败时输出其错误信息"""
+        if self.executable is None:
+            self.executable = self._find_executable()
+        captured = io.StringIO()
+        usage = {}
+        try:
+            result = run_process([self.executable, *args], output=captured, cancel_event=self.cancel_event,
+                                 resource_usage=usage, timeout=self.step_timeout)
+        except (OSError, ProcessTimeout) as e:
+            self.log(f"混淆失败 {source_file}: {e}")
+            return False
+        if usage:
+            with self._lock:
+                self.child_usage['cpu_time'] += usage['cpu_time']
+                self.child_usage['peak_rss'] = max(self.child_usage['peak_rss'], usage['peak_rss'])
+        if result != 0:
+            self.log(f"混淆失败 {source_file}: {captured.getvalue()}")
             return False
         return True
 
-    def process_project(self):
+    def _obfuscate_with_pool(self, js_files: List[str], on_done: Callable[[str, bool], None]):
+        """在常驻Node工作进程中混淆，每个文件完成后立即写出"""
+        workers = min(self._get_workers(), len(js_files))
+        tasks = []
+        light_options = self.get_library_options('LightObfuscator') if self.hot_files else {}
+        for file in js_files:
+            task = {'source': file, 'output': self.get_output_path(file), 'options': {}}
+            if file in self.hot_files:
+                task['options'].update(light_options)
+            if file in self.file_seeds:
+                task['options']['seed'] = self.file_seeds[file]
+            tasks.append(task)
+
+        def on_result(result):
+            if not result['ok']:
+                self.log(f"混淆失败 {os.path.relpath(result['source'], self.project_path)}: {result.get('error')}")
+            on_done(result['source'], result['ok'])
+
+        pool = NodeWorkerPool('javascript-obfuscator', 'lib.obfuscate(code, options).getObfuscatedCode()',
+                              workers, self.get_library_options(), project_path=self.project_path,
+                              output=self.output, cancel_event=self.cancel_event, timeout=self.step_timeout,
+                              node_path=self._get_node_path())
+        with pool:
+            self.log(f"已启动 {workers} 个Node工作进程 (javascript-obfuscator {pool.version or '未知版本'})")
+            pool.run(tasks, on_result)
+        self.child_usage['cpu_time'] += pool.usage['cpu_time']
+        self.child_usage['peak_rss'] = max(self.child_usage['peak_rss'], pool.usage['peak_rss'])
+
+    def _obfuscate_with_cli(self, js_files: List[str], on_done: Callable[[str, bool], None]):
+        """同时运行多个 javascript-obfuscator 命令"""
+        def obfuscate(file: str):
+            on_done(file, self.obfuscate_file(file))
+
+        executor = ThreadPoolExecutor(max_workers=self._get_workers())
+        try:
+            # 逐个取结果，任一文件被取消时立即抛出
+            for future in [executor.submit(obfuscate, file) for file in js_files]:
+                future.result()
+        except BaseException:
+            self.cancel_event.set()
+            raise
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _minify_with_python(self, js_files: List[str], on_done: Callable[[str, bool], None]):
+        """用内置的压缩器在多个进程中处理，只有一个工作进程时直接在当前进程中处理"""
+        def finish(file: str, run: Callable[[], Any]):
+            try:
+                run()
+                ok = True
+            except (OSError, UnicodeDecodeError, js_minifier.JSSyntaxError) as e:
+                self.log(f"压缩失败 {os.path.relpath(file, self.project_path)}: {e}")
+                ok = False
+            on_done(file, ok)
+
+        workers = min(self._get_workers(), len(js_files))
+        if workers == 1:
+            for file in js_files:
+                if self.cancel_event.is_set():
+                    raise ProcessCancelled("操作已取消")
+                finish(file, lambda: js_minifier.minify_file(file, self.get_output_path(file)))
+            return
+
+        executor = ProcessPoolExecutor(max_workers=workers)
+        try:
+            futures = {executor.submit(js_minifier.minify_file, file, self.get_output_path(file)): file
+                       for file in js_files}
+            for future in as_completed(futures):
+                if self.cancel_event.is_set():
+                    raise ProcessCancelled("操作已取消")
+                finish(futures[future], future.result)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _remove_partial_outputs(self):
+        """删除中断时留下的临时输出文件，输出目录中只保留完整的文件"""
+        pattern = re.compile(r'\.tmp-[0-9a-f]+(\.js)?$')
+        for root, _, files in os.walk(self.output_dir):
+            for file in files:
+                if pattern.search(file):
+                    try:
+                        os.remove(os.path.join(root, file))
+                    except OSError:
+                        pass
+
+    def _get_output_manifest_path(self) -> Path:
+        return BuildManifest.default_path('obfuscate_js-outputs', self.output_dir)
+
+    def _prune_stale_outputs(self, js_files: List[str], failed: List[str]) -> int:
+        """删除以前写出、但源文件已不存在的输出文件，并记录本次写出的文件，返回删除的文件数；
+        输出目录中不是本工具写出的文件（如打包工具的输出）不受影响"""
+        manifest = BuildManifest(self._get_output_manifest_path(), output=self.output)
+        removed = manifest.prune_files(map(self.get_output_path, js_files), self.output_dir)
+        for file in js_files:
+            if file not in failed:
+                manifest.add_file(self.get_output_path(file))
+        manifest.save()
+        return removed
+
+    def _get_engine_version(self, engine: str) -> str | None:
+        if engine == 'python':
+            return f'python-{js_minifier.VERSION}'
+        version = find_package_version('javascript-obfuscator', self._get_node_path())
+        return f'javascript-obfuscator {version}' if version else None
+
+    def _lookup_cache(self, cache: ContentCache, js_files: List[str], hashes: Dict[str, str],
+                      file_options: Dict[str, dict], engine: str) -> Dict[str, str]:
+        """把命中缓存的文件直接写入输出目录，返回未命中的文件 -> 缓存键"""
+        version = self._get_engine_version(engine)
+        if version is None:
+            self.log("警告: 无法确定 javascript-obfuscator 的版本，本次不使用缓存")
+            return dict.fromkeys(js_files)
+        pending = {}
+        for file in js_files:
+            key = ContentCache.make_key(hashes[file], file_options[file], self.file_seeds.get(file), version)
+            output_path = self.get_output_path(file)
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            if not cache.get(key, output_path):
+                pending[file] = key
+        self.log(f"缓存命中 {cache.hits}/{len(js_files)}，需要处理 {len(pending)} 个文件 ({version})")
+        return pending
+
+    def process_project(self) -> Dict[str, Any] | None:
         if self.config.config['General'].getboolean('confirm_before_process'):
             if not self._confirm_process():
-                print("取消处理")
+                self.log("取消处理")
                 return
 
         start_time = time.time()
 
         try:
-            print("1. 收集JavaScript文件...")
+            self.log("1. 收集JavaScript文件...")
             js_files = self.collect_js_files()
             if not js_files:
-                print("未找到JavaScript文件！")
+                self.log("未找到JavaScript文件！")
                 return
 
-            print(f"找到 {len(js_files)} 个JavaScript文件")
-            print("2. 开始混淆处理...")
-            
-            success_count = 0
-            for file in js_files:
-                print(f"处理: {os.path.relpath(file, self.project_path)}")
-                if self.obfuscate_file(file):
-                    success_count += 1
+            # 先处理大文件，避免最后只剩一个大文件在运行而其他工作进程空闲
+            sizes = {file: os.path.getsize(file) for file in js_files}
+            js_files.sort(key=sizes.get, reverse=True)
+            self.log(f"找到 {len(js_files)} 个JavaScript文件，共 {sum(sizes.values()) / 1024 / 1024:.2f}MB")
+            engine = self.get_engine()
+            process_start = time.time()
+
+            # 内置压缩器不使用混淆选项，修改混淆选项不应使其缓存失效
+            if engine != 'python':
+                self.classify_hot_files(js_files)
+                sections = {section: self.create_obfuscator_config(section)
+                            for section in ('Obfuscator', 'LightObfuscator')}
+                file_options = {file: sections[self.get_options_section(file)] for file in js_files}
+            else:
+                self.hot_files = set()
+                file_options = dict.fromkeys(js_files, {})
+            hashes = {file: hash_file(file) for file in js_files}
+            self.file_seeds = {}
+            if engine != 'python':
+                self.file_seeds = {file: int(ContentCache.make_key(hashes[file], options)[:8], 16) & 0x7fffffff
+                                   for file, options in file_options.items() if 'seed' not in options}
+            cache = self._get_cache()
+            pending = (self._lookup_cache(cache, js_files, hashes, file_options, engine) if cache
+                       else dict.fromkeys(js_files))
+
+            failed = []
+
+            def on_done(file: str, ok: bool):
+                if ok and pending[file]:
+                    cache.put(pending[file], self.get_output_path(file))
+                elif not ok:
+                    failed.append(file)
+                progress.update(sizes[file], ok)
+
+            if pending:
+                engine_name = ENGINES[engine]
+                self.log(f"2. 开始处理 ({engine_name}，并行 {min(self._get_workers(), len(pending))} 个)...")
+                progress = BatchProgress(len(pending), sum(sizes[file] for file in pending), self.log)
+                try:
+                    if engine == 'pool':
+                        self._obfuscate_with_pool(list(pending), on_done)
+                    elif engine == 'python':
+                        self._minify_with_python(list(pending), on_done)
+                    else:
+                        self._obfuscate_with_cli(list(pending), on_done)
+                finally:
+                    self._remove_partial_outputs()
+
+            removed = self._prune_stale_outputs(js_files, failed)
+            if removed:
+                self.log(f"已删除 {removed} 个源文件已不存在的输出文件")
+            if cache:
+                evicted, freed = cache.evict()
+                if evicted:
+                    self.log(f"缓存超过上限，已淘汰 {evicted} 个条目，释放 {freed / 1024 / 1024:.1f}MB")
+            success_count = len(js_files) - len(failed)
+            stats = {
+                'engine': engine,
+                'files': len(js_files),
+                'succeeded': success_count,
+                'bytes': sum(sizes.values()),
+                'seconds': time.time() - process_start,
+                'output_bytes': sum(os.path.getsize(self.get_output_path(file))
+                                    for file in js_files if file not in failed),
+            }
 
             total_time = time.time() - start_time
             minutes = int(total_time // 60)
             seconds = total_time % 60
 
-            print(f"\n混淆完成！成功: {success_count}/{len(js_files)}")
-            print(f"总用时: {minutes}分{seconds:.1f}秒")
-            print(f"输出目录: {self.output_dir}")
+            self.log(f"\n混淆完成！成功: {success_count}/{len(js_files)}")
+            if failed:
+                self.log("失败的文件:")
+                for file in sorted(failed):
+                    self.log(f"  {os.path.relpath(file, self.project_path)}")
+            self.log(f"总用时: {minutes}分{seconds:.1f}秒")
+            self._report_throughput(stats)
+            if self.child_usage['cpu_time']:
+                self.log(f"子进程合计: {format_usage(self.child_usage)}")
+            self.log(f"输出目录: {self.output_dir}")
+            return stats
 
         except Exception as e:
-            print(f"处理过程中出错: {str(e)}")
+            self.log(f"处理过程中出错: {str(e)}")
             raise
 
+    def _report_throughput(self, stats: Dict[str, Any]):
+        seconds = stats['seconds'] or 1e-9
+        self.log(f"吞吐量: {stats['files'] / seconds:.1f} 个文件/秒，"
+                 f"{stats['bytes'] / 1024 / 1024 / seconds:.2f} MB/秒")
+
+    def benchmark_engines(self) -> Dict[str, Dict[str, Any]]:
+        """分别用各个引擎处理整个项目，比较吞吐量和输出大小；输出写入临时目录后丢弃"""
+        general = self.config.config['General']
+        original = (general.get('engine', 'pool'), general['confirm_before_process'], general.get('cache', 'true'),
+                    self.output_dir)
+        general['confirm_before_process'] = 'false'
+        # 比较的是处理速度，两种方式都不使用缓存
+        general['cache'] = 'false'
+        results = {}
+        try:
+            for engine in ('cli', 'pool', 'python'):
+                general['engine'] = engine
+                self.output_dir = tempfile.mkdtemp(prefix=f'jsobf-{engine}-')
+                self.child_usage = {'cpu_time': 0.0, 'peak_rss': 0}
+                try:
+                    stats = self.process_project()
+                except (RuntimeError, OSError) as e:
+                    # 没有安装Node工具时仍然可以测试内置压缩器
+                    self.log(f"{engine} 不可用: {e}")
+                    continue
+                finally:
+                    shutil.rmtree(self.output_dir, ignore_errors=True)
+                    self._get_output_manifest_path().unlink(missing_ok=True)
+                if stats:
+                    results[engine] = stats
+        finally:
+            general['engine'], general['confirm_before_process'], general['cache'], self.output_dir = original
+
+        if results:
+            self.log(f"\n{'模式':<10}{'成功':>8}{'用时(秒)':>12}{'文件/秒':>10}{'MB/秒':>10}{'输出/输入':>10}")
+            for engine, stats in results.items():
+                seconds = stats['seconds'] or 1e-9
+                succeeded = f"{stats['succeeded']}/{stats['files']}"
+                ratio = stats['output_bytes'] / stats['bytes'] if stats['bytes'] else 0
+                self.log(f"{engine:<10}{succeeded:>8}{stats['seconds']:>12.2f}{stats['files'] / seconds:>10.1f}"
+                         f"{stats['bytes'] / 1024 / 1024 / seconds:>10.2f}{ratio:>10.1%}")
+            baseline = results.get('cli')
+            for engine in ('pool', 'python'):
+                if baseline and results.get(engine) and results[engine]['seconds']:
+                    self.log(f"{engine} 相对逐个文件启动命令加速 {baseline['seconds'] / results[engine]['seconds']:.2f} 倍")
+        return results
+
     def _confirm_process(self) -> bool:
         return input("确认开始混淆处理? (y/N): ").lower() == 'y'
 
@@ -147,11 +544,26 @@ def main():
     show_tool_info()
     parser = argparse.ArgumentParser(description='JavaScript项目混淆工具')
     parser.add_argument('project_path', nargs='?', help='项目路径')
+    parser.add_argument('--config', action='store_true', help='配置模式')
     parser.add_argument('--yes', '-y', action='store_true', help='自动确认所有提示')
+    parser.add_argument('--general_engine', choices=['pool', 'cli', 'python'],
+                        help='处理方式: pool(常驻工作进程)/cli(逐个文件)/python(内置压缩器，只删除注释和空白)')
+    parser.add_argument('--general_workers', help='工作进程数，auto 为CPU核数')
+    parser.add_argument('--benchmark-engines', action='store_true', help='比较两种处理方式的吞吐量')
+    parser.add_argument('--profile-overhead', action='store_true', help='运行基准脚本，按文件和选项报告混淆造成的减速')
+    parser.add_argument('--autotune', action='store_true', help='在减速预算内搜索最强的混淆阈值')
+    parser.add_argument('--save-tuned', action='store_true', help='把自动调整的结果保存到配置文件')
+    parser.add_argument('--profile_benchmarks', help='基准脚本，逗号分隔的项目内相对路径')
+    parser.add_argument('--profile_runs', help='每个变体运行基准脚本的次数')
+    parser.add_argument('--profile_slowdown_budget', help='允许的最大减速倍数')
     
     # 添加混淆器配置参数
     for key in ObfuscatorConfig.DEFAULT_CONFIG['Obfuscator']:
         parser.add_argument(f'--obfuscator_{key}', help=f'混淆器 {key} 配置')
+    for key in ObfuscatorConfig.DEFAULT_CONFIG['LightObfuscator']:
+        parser.add_argument(f'--lightobfuscator_{key}', help=f'热点文件的混淆器 {key} 配置')
+    parser.add_argument('--hotpath_profile', help='V8 CPU profile 或覆盖率文件，热点文件使用轻量配置')
+    parser.add_argument('--hotpath_hot_fraction', help='热点文件覆盖的执行量比例')
 
     args = parser.parse_args()
     config = ObfuscatorConfig()
@@ -169,11 +581,30 @@ def main():
         if args.yes:
             config.config['General']['confirm_before_process'] = 'false'
         obfuscator = JSObfuscator(args.project_path, config)
-        obfuscator.process_project()
+        if args.benchmark_engines:
+            obfuscator.benchmark_engines()
+        elif args.profile_overhead or args.autotune:
+            _profile_overhead(obfuscator, args)
+        else:
+            obfuscator.process_project()
     except Exception as e:
         print(f"错误: {str(e)}")
         sys.exit(1)
 
+def _profile_overhead(obfuscator: JSObfuscator, args: argparse.Namespace):
+    with ObfuscationProfiler(obfuscator) as profiler:
+        profiler.baseline()
+        if args.profile_overhead:
+            profiler.profile_options()
+            profiler.profile_files()
+            profiler.profile_hot_path()
+        if args.autotune:
+            tuned = profiler.autotune()
+            if args.save_tuned:
+                obfuscator.config.config['Obfuscator'].update(tuned['options'])
+                obfuscator.config.save_config()
+                print(f"\n已保存到 {obfuscator.config.config_file}")
+
 def _interactive_config(config: ObfuscatorConfig):
     show_tool_info()
     print("=== 配置模式 ===")
@@ -0,0 +1,311 @@
+import io
+import os
+import re
+import json
+import uuid
+import xml.parsers.expat
+from typing import Callable, Dict, List, Optional, TextIO, Tuple
+import js_minifier
+
+VERSION = "0.1.1"
+
+# 扩展名 -> 压缩函数 (源文件, 输出文件, 选项) -> (输入字节数, 输出字节数)
+Minifier = Callable[[str, str, Dict[str, bool]], Tuple[int, int]]
+MINIFIERS: Dict[str, Minifier] = {}
+
+
+def register_minifier(extensions: Tuple[str, ...], minifier: Minifier):
+    """为一种或多种扩展名注册压缩函数，后注册的覆盖先注册的"""
+    for extension in extensions:
+        MINIFIERS[extension.lower()] = minifier
+
+
+def get_minifier(path: str) -> Optional[Minifier]:
+    return MINIFIERS.get(os.path.splitext(path)[1].lower())
+
+
+def _write_atomic(output_path: str, write: Callable[[str], None]):
+    """先写入同目录的临时文件再替换目标文件，中断时不会留下不完整的输出"""
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    temp_path = f'{output_path}.tmp-{uuid.uuid4().hex[:8]}'
+    try:
+        write(temp_path)
+        os.replace(temp_path, output_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+# CSS
+
+CSS_TOKEN = re.compile(r'''
+    (?P<string>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+  | (?P<comment>/\*.*?\*/)
+  | (?P<url>(?i:url)\(\s*(?P<path>[^)'"\s]*)\s*\))
+  | (?P<space>\s+)
+  | (?P<punct>[{};,>~:])
+  | (?P<other>(?:\\.|[^\s"'/{};,>~:\\])+|/(?!\*))
+''', re.S | re.X)
+# 这些符号两侧的空白可以删除；冒号之前的空白在选择器中有意义 (a :hover)，只在声明中删除
+CSS_STRIP_BEFORE = set('{};,>~')
+CSS_STRIP_AFTER = set('{};,>~:')
+CSS_STATEMENT_END = re.compile(r'[{;}]')
+
+
+def _in_declaration(source: str, pos: int) -> bool:
+    """冒号所在的语句以 ; 或 } 结束时是声明，以 { 结束时是选择器"""
+    end = CSS_STATEMENT_END.search(source, pos)
+    return end is None or end.group() != '{'
+
+
+def _is_name_char(char: str) -> bool:
+    return char.isalnum() or char in '-_\\' or ord(char) > 127
+
+
+def _tokens_merge(left: str, right: str) -> bool:
+    """两个记号直接相连时是否会连成一个记号，如 1px 和 2px、c 和 d；.a 和 .b 相连仍是两个记号"""
+    if not _is_name_char(left[-1]):
+        return False
+    if _is_name_char(right[0]):
+        return True
+    # 1 和 .5、10 和 % 相连会成为一个数值
+    return left[-1].isdigit() and (right[0] == '%' or (right[0] == '.' and right[1:2].isdigit()))
+
+
+def minify_css(source: str) -> str:
+    """删除CSS中的注释和多余空白，保留 /*! 开头的注释；字符串和 url() 原样保留"""
+    out: List[str] = []
+    space = False
+    comment = False  # 上一个记号与当前记号之间有被删除的注释
+    pos = 0
+    while pos < len(source):
+        match = CSS_TOKEN.match(source, pos)
+        if not match:
+            what = '注释' if source.startswith('/*', pos) else '字符串'
+            raise ValueError(f"{what}没有结束 (位置 {pos})")
+        pos = match.end()
+        kind, token = match.lastgroup, match.group()
+        if kind == 'space':
+            space = True
+            continue
+        if kind == 'comment' and not token.startswith('/*!'):
+            # 注释不是空白，.a/**/.b 是复合选择器，删除后不能插入空格
+            comment = True
+            continue
+        if kind == 'url':
+            token = f"{token[:3]}({match.group('path')})"
+        if comment and out and _tokens_merge(out[-1], token):
+            # 注释分隔的两个记号 (1px/**/2px) 直接相连会合并为一个，用一个空格代替注释
+            space = True
+        if out:
+            if token == '}' and out[-1] == ';':
+                out.pop()
+            elif space and out[-1][-1] not in CSS_STRIP_AFTER and token not in CSS_STRIP_BEFORE \
+                    and not out[-1].endswith('*/') and not (token == ':' and _in_declaration(source, pos)):
+                out.append(' ')
+        out.append(token)
+        space = False
+        comment = False
+    return ''.join(out)
+
+
+def minify_css_file(source_path: str, output_path: str, options: Dict[str, bool]) -> Tuple[int, int]:
+    with open(source_path, 'r', encoding='utf-8', errors='surrogateescape', newline='') as f:
+        result = minify_css(f.read())
+
+    def write(temp_path: str):
+        with open(temp_path, 'w', encoding='utf-8', errors='surrogateescape', newline='') as f:
+            f.write(result)
+
+    _write_atomic(output_path, write)
+    return os.path.getsize(source_path), os.path.getsize(output_path)
+
+
+# SVG
+
+# 文本内容中的空白有意义的元素
+SVG_TEXT_ELEMENTS = {'text', 'tspan', 'textPath', 'title', 'desc', 'a'}
+# 其中的内容是HTML，空白可能会显示
+SVG_HTML_ELEMENTS = {'foreignObject'}
+SVG_WHITESPACE = re.compile(r'[ \t\n\r]+')
+
+
+def _escape_text(text: str) -> str:
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def _escape_attribute(value: str) -> str:
+    return value.replace('&', '&amp;').replace('<', '&lt;').replace('"', '&quot;')
+
+
+class SVGMinifier:
+    """用 expat 边解析边输出的SVG压缩器：删除注释、XML声明和标签之间的空白，空元素改为自闭合，
+    内嵌的 style 和 script 分别用CSS和JS压缩器处理"""
+
+    def __init__(self, output: TextIO, options: Dict[str, bool]):
+        self.out = output
+        self.options = options
+        self.parser = xml.parsers.expat.ParserCreate()
+        self.parser.ordered_attributes = True
+        self.parser.buffer_text = True
+        self.parser.StartElementHandler = self.start_element
+        self.parser.EndElementHandler = self.end_element
+        self.parser.CharacterDataHandler = self.character_data
+        self.parser.CommentHandler = self.comment
+        self.parser.ProcessingInstructionHandler = self.processing_instruction
+        self.parser.StartCdataSectionHandler = self.start_cdata
+        self.parser.EndCdataSectionHandler = self.end_cdata
+        self.stack: List[Tuple[str, bool]] = []
+        self._open_tag = False  # 开始标签的 > 尚未写出，元素为空时改写为 />
+        self._preserve = 0  # xml:space="preserve" 的嵌套层数
+        self._html = 0  # foreignObject 的嵌套层数
+        self._raw: Optional[List[str]] = None  # style/script 的内容
+        self._raw_cdata = False
+        self._in_cdata = False
+
+    def _close_open_tag(self):
+        if self._open_tag:
+            self.out.write('>')
+            self._open_tag = False
+
+    def start_element(self, name: str, attributes: List[str]):
+        self._close_open_tag()
+        parts = [name]
+        for i in range(0, len(attributes), 2):
+            parts.append(f'{attributes[i]}="{_escape_attribute(attributes[i + 1])}"')
+        self.out.write('<' + ' '.join(parts))
+        self._open_tag = True
+        preserve = 'preserve' in attributes[1::2] and 'xml:space' in attributes[0::2]
+        self.stack.append((name, preserve))
+        if preserve:
+            self._preserve += 1
+        if name in SVG_HTML_ELEMENTS:
+            self._html += 1
+        if name in ('style', 'script'):
+            self._raw = []
+
+    def end_element(self, name: str):
+        _, preserve = self.stack.pop()
+        if preserve:
+            self._preserve -= 1
+        if name in SVG_HTML_ELEMENTS:
+            self._html -= 1
+        if self._raw is not None:
+            self._flush_raw(name)
+        if self._open_tag:
+            self.out.write('/>')
+            self._open_tag = False
+        else:
+            self.out.write(f'</{name}>')
+
+    def _flush_raw(self, name: str):
+        content = ''.join(self._raw)
+        self._raw = None
+        if not content:
+            return
+        if name == 'style' and self.options.get('minify_css'):
+            try:
+                content = minify_css(content)
+            except ValueError:
+                pass
+        elif name == 'script' and self.options.get('minify_js'):
+            minified = io.StringIO()
+            try:
+                js_minifier.minify(content, minified)
+                content = minified.getvalue()
+            except js_minifier.JSSyntaxError:
+                pass
+        self._close_open_tag()
+        if self._raw_cdata:
+            self.out.write(f'<![CDATA[{content}]]>')
+        else:
+            self.out.write(_escape_text(content))
+        self._raw_cdata = False
+
+    def character_data(self, data: str):
+        if self._raw is not None:
+            self._raw.append(data)
+            self._raw_cdata = self._raw_cdata or self._in_cdata
+            return
+        if self._in_cdata:
+            self._close_open_tag()
+            self.out.write(data)
+            return
+        # foreignObject 中的HTML可能包含 pre 等元素，空白原样保留
+        if not self._preserve and not self._html and self.options.get('collapse_whitespace'):
+            in_text = self.stack and self.stack[-1][0] in SVG_TEXT_ELEMENTS
+            data = SVG_WHITESPACE.sub(' ', data)
+            if not in_text and not data.strip():
+                # 图形元素之间的空白不影响显示
+                return
+        self._close_open_tag()
+        self.out.write(_escape_text(data))
+
+    def start_cdata(self):
+        self._in_cdata = True
+        if self._raw is None:
+            self._close_open_tag()
+            self.out.write('<![CDATA[')
+
+    def end_cdata(self):
+        self._in_cdata = False
+        if self._raw is None:
+            self.out.write(']]>')
+
+    def comment(self, data: str):
+        if self.options.get('remove_comments') and not data.startswith('!'):
+            return
+        self._close_open_tag()
+        self.out.write(f'<!--{data}-->')
+
+    def processing_instruction(self, target: str, data: str):
+        self._close_open_tag()
+        self.out.write(f'<?{target} {data}?>' if data else f'<?{target}?>')
+
+    def feed(self, source: io.BufferedIOBase):
+        # XML声明不写出，输出总是UTF-8编码
+        self.parser.ParseFile(source)
+        self._close_open_tag()
+
+
+def minify_svg_file(source_path: str, output_path: str, options: Dict[str, bool]) -> Tuple[int, int]:
+    def write(temp_path: str):
+        with open(source_path, 'rb') as source, open(temp_path, 'w', encoding='utf-8', newline='') as output:
+            try:
+                SVGMinifier(output, options).feed(source)
+            except xml.parsers.expat.ExpatError as e:
+                raise ValueError(f"SVG解析失败: {e}") from None
+
+    _write_atomic(output_path, write)
+    return os.path.getsize(source_path), os.path.getsize(output_path)
+
+
+# JSON
+
+JSON_STRING_OR_SPACE = re.compile(r'"(?:[^"\\]|\\.)*"|[ \t\n\r]+')
+
+
+def minify_json(source: str) -> str:
+    """删除字符串之外的空白；数字和字符串原样保留，不经过解析再序列化而改变精度或转义"""
+    result = JSON_STRING_OR_SPACE.sub(lambda m: m.group() if m.group().startswith('"') else '', source)
+    # 只用于检查压缩结果是合法的JSON
+    json.loads(result)
+    return result
+
+
+def minify_json_file(source_path: str, output_path: str, options: Dict[str, bool]) -> Tuple[int, int]:
+    with open(source_path, 'r', encoding='utf-8-sig') as f:
+        result = minify_json(f.read())
+
+    def write(temp_path: str):
+        with open(temp_path, 'w', encoding='utf-8', newline='') as f:
+            f.write(result)
+
+    _write_atomic(output_path, write)
+    return os.path.getsize(source_path), os.path.getsize(output_path)
+
+
+register_minifier(('.css',), minify_css_file)
+register_minifier(('.svg',), minify_svg_file)
+register_minifier(('.json',), minify_json_file)
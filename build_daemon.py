@@ -0,0 +1,340 @@
+import io
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+import socketserver
+import importlib.util
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, TextIO
+
+TOOL_NAME = "ProjectCompiler 构建守护进程"
+VERSION = "0.1.0"
+
+DEFAULT_SOCKET = Path.home() / '.projectcompiler' / 'daemon.sock'
+
+# 守护进程支持的任务类型: 工具模块名, 编译器类, 配置类
+TOOLS = {
+    'cython': ('Comp-Package_py', 'ProjectCompiler', 'CompilerConfig'),
+    'nuitka': ('Nuitka_py', 'NuitkaCompiler', 'NuitkaConfig'),
+}
+
+
+def import_tool(name):
+    spec = importlib.util.spec_from_file_location(name, str(Path(__file__).parent / f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def is_supported() -> bool:
+    return hasattr(socket, 'AF_UNIX') and hasattr(socketserver, 'ThreadingUnixStreamServer')
+
+
+class JobOutput(io.TextIOBase):
+    """把构建输出按行转发给客户端的输出流"""
+
+    def __init__(self, send: Callable[[Dict[str, Any]], None]):
+        super().__init__()
+        self.send = send
+        self.buffer = ''
+        self.lock = threading.Lock()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        with self.lock:
+            self.buffer += text
+            while '\n' in self.buffer:
+                line, self.buffer = self.buffer.split('\n', 1)
+                self.send({'type': 'log', 'text': line})
+        return len(text)
+
+    def flush(self):
+        with self.lock:
+            if self.buffer:
+                self.send({'type': 'log', 'text': self.buffer})
+                self.buffer = ''
+
+
+class BuildDaemon:
+    def __init__(self, max_jobs: int):
+        self.max_jobs = max_jobs
+        self.slots = threading.BoundedSemaphore(max_jobs)
+        self.active_jobs: Dict[int, Dict[str, Any]] = {}
+        self.jobs_lock = threading.Lock()
+        self.next_job_id = 1
+        self.started_at = time.time()
+        self.tools = {}
+
+    def warm_up(self):
+        """预先导入工具模块及其依赖的 Cython/setuptools，后续任务无需再次导入"""
+        start_time = time.time()
+        for kind, (module_name, _, _) in TOOLS.items():
+            try:
+                self.tools[kind] = import_tool(module_name)
+            except Exception as e:
+                print(f"警告: 无法加载 {module_name}: {e}")
+        try:
+            # 工具模块在编译时才导入这些模块，cythonize 在首次编译时才导入编译器主体
+            import setuptools.extension  # noqa: F401
+            import Cython.Build  # noqa: F401
+            import Cython.Compiler.Main  # noqa: F401
+        except ImportError:
+            pass
+        print(f"工具链已加载，用时 {time.time() - start_time:.2f}秒")
+
+    def status(self) -> Dict[str, Any]:
+        with self.jobs_lock:
+            jobs = list(self.active_jobs.values())
+        return {
+            'type': 'status',
+            'pid': os.getpid(),
+            'max_jobs': self.max_jobs,
+            'executable': sys.executable,
+            'uptime': time.time() - self.started_at,
+            'jobs': jobs,
+        }
+
+    def run_job(self, request: Dict[str, Any], send: Callable[[Dict[str, Any]], None],
+                cancel_event: threading.Event = None):
+        kind = request.get('tool')
+        if kind not in self.tools:
+            send({'type': 'result', 'ok': False, 'error': f'不支持的工具: {kind}'})
+            return
+        executable = request.get('executable')
+        if executable and os.path.realpath(executable) != os.path.realpath(sys.executable):
+            # 编译和打包会启动与 sys.executable 相同的解释器，解释器不同时构建结果会不一致
+            send({'type': 'result', 'ok': False, 'rejected': True,
+                  'error': f'客户端的Python解释器 {executable} 与守护进程的 {sys.executable} 不同'})
+            return
+
+        with self.jobs_lock:
+            job_id = self.next_job_id
+            self.next_job_id += 1
+            self.active_jobs[job_id] = {'id': job_id, 'tool': kind, 'project_path': request.get('project_path'),
+                                        'state': 'waiting'}
+
+        output = JobOutput(send)
+        try:
+            if not self.slots.acquire(blocking=False):
+                print("所有构建槽都在使用中，等待空闲...", file=output)
+                self.slots.acquire()
+            try:
+                with self.jobs_lock:
+                    self.active_jobs[job_id]['state'] = 'running'
+                start_time = time.time()
+                self._build(kind, request, output, cancel_event)
+                output.flush()
+                send({'type': 'result', 'ok': True, 'elapsed': time.time() - start_time})
+            finally:
+                self.slots.release()
+        except Exception as e:
+            output.flush()
+            send({'type': 'result', 'ok': False, 'error': str(e)})
+        finally:
+            with self.jobs_lock:
+                self.active_jobs.pop(job_id, None)
+
+    def _build(self, kind: str, request: Dict[str, Any], output: TextIO, cancel_event: threading.Event = None):
+        build_project(self.tools[kind], kind, request, output, cancel_event)
+
+
+def build_project(module, kind: str, request: Dict[str, Any], output: TextIO = None,
+                  cancel_event: threading.Event = None):
+    """按请求中的项目、入口文件和配置，在当前进程中用已导入的工具模块构建；cancel_event 被设置时终止构建"""
+    _, compiler_name, config_name = TOOLS[kind]
+    config = getattr(module, config_name)()
+    config.config.read_dict(request.get('config', {}))
+    # 非交互环境中无法确认，确认由提交方在提交前完成
+    config.config['General']['confirm_before_compile'] = 'false'
+
+    main_files = request.get('main_files') or []
+    main_file = main_files if kind == 'cython' else main_files[0]
+    compiler = getattr(module, compiler_name)(request['project_path'], main_file, config, output=output,
+                                              cancel_event=cancel_event)
+    # 子进程使用客户端的环境变量 (PATH、CC、虚拟环境等)，而不是守护进程启动时的环境
+    compiler.base_env = request.get('env')
+    compiler.compile_project()
+
+
+class BuildRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        send_lock = threading.Lock()
+        # 客户端断开 (包括按 Ctrl+C) 时被设置，终止该客户端提交的构建并释放构建槽
+        disconnected = threading.Event()
+
+        def send(message: Dict[str, Any]):
+            if disconnected.is_set():
+                return
+            data = (json.dumps(message, ensure_ascii=False) + '\n').encode('utf-8')
+            with send_lock:
+                try:
+                    self.wfile.write(data)
+                    self.wfile.flush()
+                except OSError:
+                    disconnected.set()
+
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            request = json.loads(line)
+        except ValueError:
+            send({'type': 'result', 'ok': False, 'error': '无效的请求'})
+            return
+
+        daemon = self.server.build_daemon
+        request_type = request.get('type', 'build')
+        if request_type == 'status':
+            send(daemon.status())
+        elif request_type == 'shutdown':
+            send({'type': 'result', 'ok': True})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+        else:
+            threading.Thread(target=self._watch_disconnect, args=(disconnected,), daemon=True).start()
+            daemon.run_job(request, send, disconnected)
+
+    def _watch_disconnect(self, disconnected: threading.Event):
+        """客户端提交请求后不再写入，读到连接结束说明客户端已断开，构建没有输出时也能及时终止"""
+        try:
+            self.rfile.read(1)
+        except (OSError, ValueError):
+            pass
+        disconnected.set()
+
+
+class BuildServer(getattr(socketserver, 'ThreadingUnixStreamServer', socketserver.ThreadingMixIn)):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, build_daemon: BuildDaemon):
+        self.build_daemon = build_daemon
+        super().__init__(socket_path, BuildRequestHandler)
+
+
+def _connect(socket_path: str | Path = DEFAULT_SOCKET) -> Optional[socket.socket]:
+    if not is_supported() or not os.path.exists(socket_path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(socket_path))
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def _request(message: Dict[str, Any], socket_path: str | Path = DEFAULT_SOCKET,
+             on_message: Callable[[Dict[str, Any]], None] = None) -> Optional[Dict[str, Any]]:
+    """发送请求并逐条处理返回消息，守护进程未运行时返回 None"""
+    sock = _connect(socket_path)
+    if sock is None:
+        return None
+    last_message = {}
+    with sock, sock.makefile('rwb') as stream:
+        stream.write((json.dumps(message, ensure_ascii=False) + '\n').encode('utf-8'))
+        stream.flush()
+        for line in stream:
+            last_message = json.loads(line)
+            if on_message:
+                on_message(last_message)
+    return last_message
+
+
+def is_running(socket_path: str | Path = DEFAULT_SOCKET) -> bool:
+    sock = _connect(socket_path)
+    if sock is None:
+        return False
+    sock.close()
+    return True
+
+
+def submit_job(tool: str, project_path: str, main_files: List[str], config: Dict[str, Dict[str, str]],
+               output: TextIO = None, socket_path: str | Path = DEFAULT_SOCKET) -> Optional[bool]:
+    """把构建任务交给守护进程并实时输出日志；守护进程未运行或拒绝任务时返回 None，由调用方在本地构建"""
+    sink = output or sys.stdout
+
+    def on_message(message: Dict[str, Any]):
+        if message.get('type') == 'log':
+            print(message['text'], file=sink)
+        elif message.get('type') == 'result' and message.get('rejected'):
+            print(f"守护进程拒绝了任务: {message.get('error', '')}", file=sink)
+        elif message.get('type') == 'result' and not message.get('ok'):
+            print(f"守护进程构建失败: {message.get('error', '')}", file=sink)
+
+    result = _request({
+        'type': 'build',
+        'tool': tool,
+        'project_path': os.path.abspath(project_path),
+        'main_files': main_files,
+        'config': config,
+        'executable': sys.executable,
+        'env': dict(os.environ),
+    }, socket_path, on_message)
+    if result is None or result.get('rejected'):
+        return None
+    return bool(result.get('ok'))
+
+
+def serve(socket_path: str | Path, max_jobs: int):
+    socket_path = Path(socket_path)
+    if is_running(socket_path):
+        print(f"守护进程已在运行: {socket_path}")
+        return
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    if socket_path.exists():
+        socket_path.unlink()  # 上次异常退出留下的套接字文件
+
+    build_daemon = BuildDaemon(max_jobs)
+    build_daemon.warm_up()
+    with BuildServer(str(socket_path), build_daemon) as server:
+        os.chmod(socket_path, 0o600)
+        print(f"守护进程已启动: {socket_path} (PID {os.getpid()}, 最多 {max_jobs} 个并发任务)")
+        try:
+            server.serve_forever()
+        finally:
+            if socket_path.exists():
+                socket_path.unlink()
+    print("守护进程已停止")
+
+
+def main():
+    print(f"\n{TOOL_NAME} v{VERSION}")
+    print("="*50 + "\n")
+    parser = argparse.ArgumentParser(description=f'{TOOL_NAME} - 常驻进程中预加载编译工具链，避免每次构建的启动开销')
+    parser.add_argument('command', choices=['start', 'stop', 'status'], help='启动/停止守护进程或查看状态')
+    parser.add_argument('--socket', default=str(DEFAULT_SOCKET), help='Unix 套接字路径')
+    parser.add_argument('--max-jobs', type=int, default=max(1, (os.cpu_count() or 2) // 2), help='最大并发构建数')
+    args = parser.parse_args()
+
+    if not is_supported():
+        print("错误: 当前平台不支持 Unix 套接字，无法使用构建守护进程")
+        sys.exit(1)
+
+    if args.command == 'start':
+        serve(args.socket, args.max_jobs)
+    elif args.command == 'stop':
+        if _request({'type': 'shutdown'}, args.socket) is None:
+            print("守护进程未运行")
+        else:
+            print("已通知守护进程停止")
+    else:
+        status = _request({'type': 'status'}, args.socket)
+        if status is None:
+            print("守护进程未运行")
+            return
+        print(f"PID: {status['pid']}  运行时间: {status['uptime']:.0f}秒  最大并发: {status['max_jobs']}")
+        for job in status['jobs']:
+            print(f"  任务 #{job['id']} [{job['tool']}] {job['state']}: {job['project_path']}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n用户取消操作")
+        sys.exit(1)
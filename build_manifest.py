@@ -0,0 +1,153 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, TextIO
+
+
+class BuildManifest:
+    """构建清单：记录构建过程中创建的文件和目录，清理时只删除这些条目"""
+
+    PARALLEL_THRESHOLD = 64  # 目录直接子项超过该数量时并行删除
+
+    def __init__(self, manifest_file: str | Path, output: TextIO = None):
+        self.manifest_file = Path(manifest_file)
+        self.output = output
+        # 使用dict保持插入顺序并去重
+        self.files: Dict[str, None] = {}
+        self.dirs: Dict[str, None] = {}
+        self.load()
+
+    def log(self, *args, **kwargs):
+        print(*args, file=self.output or sys.stdout, **kwargs)
+
+    @staticmethod
+    def default_path(tool: str, project_path: str) -> Path:
+        """按项目路径生成清单文件位置，清单保存在项目目录之外，不会被当作资源打包"""
+        digest = hashlib.sha1(os.path.abspath(project_path).encode('utf-8')).hexdigest()[:12]
+        name = Path(project_path).name or 'project'
+        return Path.home() / '.projectcompiler' / 'manifests' / f'{tool}-{name}-{digest}.json'
+
+    def load(self):
+        """读取上次未清理的清单，中断的构建留下的产物会在本次一并清理"""
+        if not self.manifest_file.exists():
+            return
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.files.update(dict.fromkeys(data.get('files', [])))
+            self.dirs.update(dict.fromkeys(data.get('dirs', [])))
+        except (OSError, ValueError) as e:
+            self.log(f"警告: 无法读取构建清单 {self.manifest_file}: {e}")
+
+    def save(self):
+        self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.manifest_file, 'w', encoding='utf-8') as f:
+            json.dump({'files': list(self.files), 'dirs': list(self.dirs)}, f, ensure_ascii=False, indent=2)
+
+    def add_file(self, path: str):
+        self.files[os.path.abspath(path)] = None
+
+    def add_dir(self, path: str):
+        self.dirs[os.path.abspath(path)] = None
+
+    def makedirs(self, path: str):
+        """创建目录，并记录其中由本次构建新建的最上层目录"""
+        path = os.path.abspath(path)
+        top_created = None
+        current = path
+        while not os.path.exists(current):
+            top_created = current
+            parent = os.path.dirname(current)
+            if parent == current:
+                break
+            current = parent
+        os.makedirs(path, exist_ok=True)
+        if top_created:
+            self.add_dir(top_created)
+
+    def copy_file(self, src: str, dst: str):
+        """复制文件，目标原本不存在时才记入清单，避免误删预先存在的文件"""
+        if not os.path.exists(dst):
+            self.add_file(dst)
+        shutil.copy2(src, dst)
+
+    def prune_files(self, keep: Iterable[str], root: str) -> int:
+        """删除清单中记录但不在 keep 中的文件，以及因此变空的目录（不超出 root），返回删除的文件数"""
+        keep = {os.path.abspath(path) for path in keep}
+        root = os.path.abspath(root)
+        removed = 0
+        for path in list(self.files):
+            if path in keep:
+                continue
+            del self.files[path]
+            if not path.startswith(root + os.sep):
+                continue
+            removed += self._remove_file(path)
+            parent = os.path.dirname(path)
+            while parent != root:
+                try:
+                    os.rmdir(parent)
+                except OSError:
+                    break
+                parent = os.path.dirname(parent)
+        return removed
+
+    def cleanup(self, workers: int = None) -> int:
+        """删除清单中记录的全部条目，返回删除的条目数"""
+        workers = workers or min(32, (os.cpu_count() or 1) * 4)
+        removed = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            files = [f for f in self.files if not self._inside_recorded_dir(f)]
+            if len(files) >= self.PARALLEL_THRESHOLD:
+                removed += sum(executor.map(self._remove_file, files))
+            else:
+                removed += sum(self._remove_file(f) for f in files)
+
+            # 先删除较深的目录，已被上层目录覆盖的条目会被直接跳过
+            for dir_path in sorted(self.dirs, key=lambda p: p.count(os.sep), reverse=True):
+                if os.path.isdir(dir_path):
+                    self._remove_tree(dir_path, executor)
+                    removed += 1
+
+        self.files.clear()
+        self.dirs.clear()
+        try:
+            self.manifest_file.unlink()
+        except FileNotFoundError:
+            pass
+        return removed
+
+    def _inside_recorded_dir(self, path: str) -> bool:
+        return any(path.startswith(d + os.sep) for d in self.dirs)
+
+    def _remove_file(self, path: str) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except FileNotFoundError:
+            return 0
+        except OSError as e:
+            self.log(f"警告: 无法删除文件 {path}: {e}")
+            return 0
+
+    def _remove_tree(self, path: str, executor: ThreadPoolExecutor):
+        """删除目录树；子项较多时并行删除各子项，再删除目录本身"""
+        try:
+            entries = list(os.scandir(path))
+        except OSError as e:
+            self.log(f"警告: 无法访问目录 {path}: {e}")
+            return
+
+        if len(entries) >= self.PARALLEL_THRESHOLD:
+            def remove_entry(entry):
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                else:
+                    self._remove_file(entry.path)
+            list(executor.map(remove_entry, entries))
+
+        shutil.rmtree(path, onerror=lambda func, p, exc: self.log(f"警告: 无法删除 {p}: {exc[1]}"))
@@ -0,0 +1,210 @@
+import os
+import re
+import json
+import time
+import threading
+from typing import Any, Callable, Dict, Optional, TextIO
+
+# 按构建顺序排列的阶段及其在Nuitka输出中的起始标志
+PHASES = {
+    'pass1': ('第一轮优化', 'PASS 1:'),
+    'pass2': ('第二轮优化', 'PASS 2:'),
+    'codegen': ('生成C代码', 'Generating source code for C backend compiler'),
+    'data_composer': ('处理常量数据', 'Running data composer tool'),
+    'c_compile': ('C编译', 'Running C compilation via Scons'),
+    'link': ('链接', 'Backend C linking with'),
+    'done': ('完成', 'Successfully created'),
+}
+PHASE_ORDER = list(PHASES)
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+
+def json_lines_callback(stream: TextIO) -> ProgressCallback:
+    """返回把进度事件逐行写成JSON的回调"""
+    lock = threading.Lock()
+
+    def write(event: Dict[str, Any]):
+        with lock:
+            stream.write(json.dumps(event, ensure_ascii=False) + '\n')
+            stream.flush()
+    return write
+
+
+class NuitkaProgress:
+    """把Nuitka的 --show-progress 输出解析为结构化进度事件，并根据该项目以往构建的阶段耗时估算剩余时间
+
+    事件字段: type=progress, phase, phase_name, elapsed, percent, eta，以及当前阶段的
+    module / modules_done / modules_remaining（优化阶段）或 c_files_total / c_files_compiled（C编译阶段）
+    """
+
+    MODULE_PATTERN = re.compile(r"Optimizing module '([^']+)', (\d+) more modules to go")
+    POLL_INTERVAL = 1.0
+
+    def __init__(self, callback: Optional[ProgressCallback], build_dir: str = None,
+                 history: Dict[str, float] = None):
+        self.callback = callback
+        self.build_dir = build_dir
+        # 以往构建中各阶段开始时相对构建开始的秒数，'total' 为总耗时
+        self.history = history or {}
+        self.phase_offsets: Dict[str, float] = {}
+        self.phase = None
+        self.start_time = None
+        self.modules_done = 0
+        self.modules_remaining = 0
+        self.c_files_total = 0
+        self.c_files_compiled = 0
+        self._poll_stop = threading.Event()
+        self._poll_thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        self.start_time = time.time()
+        self._emit('start')
+
+    def handle_line(self, line: str):
+        for phase, (_, marker) in PHASES.items():
+            if marker in line:
+                self._enter(phase)
+                return
+
+        match = self.MODULE_PATTERN.search(line)
+        if match and self.phase in ('pass1', 'pass2'):
+            self.modules_done += 1
+            self.modules_remaining = int(match.group(2))
+            self._emit(self.phase, module=match.group(1))
+
+    def _enter(self, phase: str):
+        if phase == self.phase or phase in self.phase_offsets:
+            return
+        self.phase_offsets[phase] = time.time() - self.start_time
+        self.phase = phase
+        self.modules_done = 0
+        self.modules_remaining = 0
+        if phase == 'c_compile':
+            self._start_polling()
+        elif self._poll_thread:
+            self._stop_polling()
+        self._emit(phase)
+
+    def _start_polling(self):
+        """Nuitka 在非终端输出时不报告C编译进度，改为统计构建目录中的 .c 和 .o 文件"""
+        if not self.build_dir:
+            return
+        self._poll_stop.clear()
+        self._poll_thread = threading.Thread(target=self._poll, daemon=True)
+        self._poll_thread.start()
+
+    def _stop_polling(self):
+        self._poll_stop.set()
+        if self._poll_thread and self._poll_thread is not threading.current_thread():
+            self._poll_thread.join()
+        self._poll_thread = None
+
+    def _poll(self):
+        while not self._poll_stop.wait(self.POLL_INTERVAL):
+            sources, objects = 0, 0
+            for _, _, files in os.walk(self.build_dir):
+                for file in files:
+                    if file.endswith('.c'):
+                        sources += 1
+                    elif file.endswith(('.o', '.obj')):
+                        objects += 1
+            if (sources, objects) != (self.c_files_total, self.c_files_compiled):
+                self.c_files_total, self.c_files_compiled = sources, objects
+                self._emit('c_compile')
+
+    def _phase_fraction(self) -> float:
+        """当前阶段内的完成比例"""
+        if self.phase in ('pass1', 'pass2'):
+            total = self.modules_done + self.modules_remaining
+            return self.modules_done / total if total else 0.0
+        if self.phase == 'c_compile' and self.c_files_total:
+            return min(1.0, self.c_files_compiled / self.c_files_total)
+        return 0.0
+
+    def _estimate(self, elapsed: float) -> tuple:
+        """返回 (完成比例, 剩余秒数)，没有历史数据时返回 (None, None)"""
+        total = self.history.get('total')
+        if not total:
+            return None, None
+        if self.phase == 'done':
+            return 1.0, 0.0
+        if self.phase not in self.history:
+            # 没有阶段记录时按总耗时线性估算
+            return min(elapsed / total, 0.99), max(0.0, total - elapsed)
+
+        index = PHASE_ORDER.index(self.phase)
+        phase_start = self.history[self.phase]
+        phase_end = next((self.history[p] for p in PHASE_ORDER[index + 1:] if p in self.history), total)
+        expected = phase_start + (phase_end - phase_start) * self._phase_fraction()
+        fraction = min(expected / total, 0.99)
+        # 按本次构建相对历史构建的快慢修正剩余时间
+        speed = elapsed / expected if expected > 0 else 1.0
+        return fraction, max(0.0, (total - expected) * speed)
+
+    def _emit(self, phase: str, **fields):
+        if self.callback is None:
+            return
+        elapsed = time.time() - self.start_time
+        percent, eta = self._estimate(elapsed)
+        event = {
+            'type': 'progress',
+            'phase': phase,
+            'phase_name': PHASES[phase][0] if phase in PHASES else '开始',
+            'elapsed': round(elapsed, 2),
+            'percent': None if percent is None else round(percent * 100, 1),
+            'eta': None if eta is None else round(eta, 1),
+        }
+        if phase in ('pass1', 'pass2'):
+            event.update(modules_done=self.modules_done, modules_remaining=self.modules_remaining)
+        elif phase in ('c_compile', 'link'):
+            event.update(c_files_total=self.c_files_total, c_files_compiled=self.c_files_compiled)
+        event.update(fields)
+        with self._lock:
+            self.callback(event)
+
+    def finish(self, success: bool) -> Dict[str, float]:
+        """结束跟踪并返回本次构建的阶段耗时，供下次估算使用"""
+        self._stop_polling()
+        if success:
+            self._enter('done')
+            self.phase_offsets['total'] = time.time() - self.start_time
+        return self.phase_offsets
+
+
+class BatchProgress:
+    """批量处理文件时按固定间隔汇报完成数、失败数、吞吐量和预计剩余时间，可在多个线程中调用"""
+
+    def __init__(self, total: int, total_bytes: int, log: Callable[[str], None], interval: float = 1.0):
+        self.total = total
+        self.total_bytes = total_bytes
+        self.log = log
+        self.interval = interval
+        self.done = 0
+        self.failed = 0
+        self.done_bytes = 0
+        self.start_time = time.time()
+        self._last_report = self.start_time
+        self._lock = threading.Lock()
+
+    def update(self, size: int, ok: bool):
+        with self._lock:
+            self.done += 1
+            self.done_bytes += size
+            if not ok:
+                self.failed += 1
+            now = time.time()
+            if now - self._last_report >= self.interval or self.done == self.total:
+                self._last_report = now
+                self.log(self.format(now - self.start_time))
+
+    def format(self, elapsed: float) -> str:
+        line = (f"[进度] {self.done}/{self.total} ({self.done / max(self.total, 1):.0%})，失败 {self.failed}，"
+                f"{self.done / max(elapsed, 1e-9):.1f} 个文件/秒，"
+                f"{self.done_bytes / 1024 / 1024 / max(elapsed, 1e-9):.2f} MB/秒，已用 {elapsed:.0f}秒")
+        if self.done < self.total:
+            # 耗时既与文件大小有关也有每个文件的固定开销，按文件数和字节数的完成比例平均估算
+            fraction = (self.done / self.total + self.done_bytes / max(self.total_bytes, 1)) / 2
+            line += f"，预计剩余 {elapsed * (1 - fraction) / fraction:.0f}秒"
+        return line
@@ -0,0 +1,247 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, TextIO
+from process_runner import run_process, PrefixedOutput, ProcessCancelled
+from system_resources import get_available_memory
+import build_daemon
+
+TOOL_NAME = "ProjectCompiler 构建队列"
+VERSION = "0.1.0"
+
+# 未在任务中指定时各工具占用的资源估计
+DEFAULT_RESOURCES = {
+    'nuitka': {'cpus': max(1, (os.cpu_count() or 2) // 2), 'memory_mb': 2048},
+    'cython': {'cpus': 2, 'memory_mb': 1024},
+}
+MEMORY_RESERVE_MB = 1024
+
+
+class BuildJob:
+    def __init__(self, spec: Dict[str, Any], index: int, retries: int):
+        tool = spec.get('tool', 'nuitka')
+        if tool not in build_daemon.TOOLS:
+            raise ValueError(f"不支持的工具: {tool}")
+        if not spec.get('project_path'):
+            raise ValueError(f"第 {index + 1} 个任务缺少 project_path")
+        main_files = spec.get('main_files') or ([spec['main_file']] if spec.get('main_file') else [])
+        if not main_files:
+            raise ValueError(f"第 {index + 1} 个任务缺少 main_file")
+
+        self.index = index
+        self.tool = tool
+        self.project_path = os.path.abspath(spec['project_path'])
+        self.main_files = main_files
+        self.name = spec.get('name') or f"{Path(self.project_path).name}-{index + 1}"
+        self.priority = int(spec.get('priority', 0))
+        self.retries = int(spec.get('retries', retries))
+        self.cpus = int(spec.get('cpus', DEFAULT_RESOURCES[tool]['cpus']))
+        self.memory_mb = int(spec.get('memory_mb', DEFAULT_RESOURCES[tool]['memory_mb']))
+        self.config = spec.get('config', {})
+        self.attempts = 0
+        self.result: Dict[str, Any] = {}
+
+    def build_request(self) -> Dict[str, Any]:
+        """生成交给子进程的构建请求，并把工具自身的并行度限制在分配的CPU数以内"""
+        config = {section: dict(values) for section, values in self.config.items()}
+        if self.tool == 'nuitka':
+            config.setdefault('Nuitka', {}).setdefault('jobs', str(self.cpus))
+        else:
+            config.setdefault('Cython', {}).setdefault('jobs', str(self.cpus))
+            config.setdefault('PyInstaller', {}).setdefault('parallel_builds', str(self.cpus))
+        return {'tool': self.tool, 'project_path': self.project_path,
+                'main_files': self.main_files, 'config': config}
+
+
+class BuildQueue:
+    """在全局CPU和内存预算内并行调度多个项目的构建，支持优先级和失败重试"""
+
+    def __init__(self, jobs: List[BuildJob], cpus: int, memory_mb: int, output: TextIO = None):
+        self.cpus = cpus
+        self.memory_mb = memory_mb
+        self.output = output
+        self.pending = list(jobs)
+        self.finished: List[BuildJob] = []
+        self.running = 0
+        self.free_cpus = cpus
+        self.free_memory = memory_mb
+        self.condition = threading.Condition()
+        self.log_lock = threading.Lock()
+        # 被设置时终止所有运行中的构建进程树，构建子进程在独立的会话中，收不到终端的 Ctrl+C
+        self.cancel_event = threading.Event()
+        for job in jobs:
+            # 超出总预算的任务按总预算运行，此时独占全部资源
+            job.cpus = min(job.cpus, cpus)
+            job.memory_mb = min(job.memory_mb, memory_mb)
+
+    def log(self, *args, **kwargs):
+        with self.log_lock:
+            print(*args, file=self.output or sys.stdout, **kwargs)
+
+    def _next_jobs(self) -> List[BuildJob]:
+        """按优先级选出可以立即启动的任务；高优先级任务资源不足时，低优先级任务不得抢先"""
+        selected = []
+        free_cpus, free_memory = self.free_cpus, self.free_memory
+        blocked_priority = None
+        for job in sorted(self.pending, key=lambda j: (-j.priority, j.index)):
+            if blocked_priority is not None and job.priority < blocked_priority:
+                break
+            if job.cpus <= free_cpus and job.memory_mb <= free_memory:
+                selected.append(job)
+                free_cpus -= job.cpus
+                free_memory -= job.memory_mb
+            elif blocked_priority is None:
+                blocked_priority = job.priority
+        return selected
+
+    def run(self) -> List[BuildJob]:
+        start_time = time.time()
+        self.log(f"构建队列: {len(self.pending)} 个任务，预算 {self.cpus} 个CPU、{self.memory_mb}MB 内存")
+        workers = []
+        try:
+            with self.condition:
+                while self.pending or self.running:
+                    for job in self._next_jobs():
+                        self.pending.remove(job)
+                        self.free_cpus -= job.cpus
+                        self.free_memory -= job.memory_mb
+                        self.running += 1
+                        worker = threading.Thread(target=self._run_job, args=(job,), daemon=True)
+                        worker.start()
+                        workers.append(worker)
+                    self.condition.wait()
+        except KeyboardInterrupt:
+            self.log("正在终止运行中的构建...")
+            self.cancel_event.set()
+            for worker in workers:
+                worker.join()
+            raise
+        self.report(time.time() - start_time)
+        return self.finished
+
+    def _run_job(self, job: BuildJob):
+        job.attempts += 1
+        self.log(f"开始 {job.name} [{job.tool}] (第 {job.attempts} 次，{job.cpus} CPU / {job.memory_mb}MB)")
+        usage = {}
+        command = [sys.executable, os.path.abspath(__file__), '--run-job', json.dumps(job.build_request())]
+        output = PrefixedOutput(job.name, self.output)
+        start_time = time.time()
+        code = -1
+        try:
+            code = run_process(command, output=output, cancel_event=self.cancel_event, resource_usage=usage)
+        except ProcessCancelled:
+            output.write("构建已取消\n")
+        except OSError as e:
+            output.write(f"无法启动构建进程: {e}\n")
+        except Exception as e:
+            # 意外错误按一次失败的尝试处理
+            output.write(f"构建进程出错: {e}\n")
+        finally:
+            output.flush()
+            wall_time = time.time() - start_time
+            # 无论本次尝试如何结束都要归还资源并通知调度线程，否则队列会一直等待
+            with self.condition:
+                self.free_cpus += job.cpus
+                self.free_memory += job.memory_mb
+                self.running -= 1
+                try:
+                    self._record_attempt(job, code, wall_time, usage)
+                finally:
+                    self.condition.notify()
+
+    def _record_attempt(self, job: BuildJob, code: int, wall_time: float, usage: Dict[str, Any]):
+        previous = job.result
+        # 累计所有尝试的资源占用，峰值内存取最大值
+        job.result = {
+            'ok': code == 0,
+            'code': code,
+            'wall_time': previous.get('wall_time', 0.0) + wall_time,
+            'cpu_time': (previous.get('cpu_time') or 0.0) + usage.get('cpu_time', 0.0) if usage else None,
+            'peak_rss': max(previous.get('peak_rss') or 0, usage.get('peak_rss', 0)) if usage else None,
+        }
+        if code != 0 and job.attempts <= job.retries and not self.cancel_event.is_set():
+            self.log(f"{job.name} 失败 (返回码 {code})，重新排队")
+            self.pending.append(job)
+        else:
+            self.log(f"{job.name} {'完成' if code == 0 else '失败'}，用时 {wall_time:.1f}秒")
+            self.finished.append(job)
+
+    def report(self, total_time: float):
+        jobs = sorted(self.finished, key=lambda j: j.index)
+        self.log(f"\n{'项目':<24}{'工具':<8}{'结果':<6}{'尝试':>4}{'墙钟(秒)':>10}{'CPU(秒)':>10}{'峰值内存(MB)':>14}")
+        for job in jobs:
+            result = job.result
+            cpu = f"{result['cpu_time']:.1f}" if result.get('cpu_time') is not None else '-'
+            rss = f"{result['peak_rss'] / 1024 / 1024:.0f}" if result.get('peak_rss') else '-'
+            self.log(f"{job.name:<24}{job.tool:<8}{'成功' if result['ok'] else '失败':<6}{job.attempts:>6}"
+                     f"{result['wall_time']:>12.1f}{cpu:>10}{rss:>14}")
+        sequential = sum(j.result['wall_time'] for j in jobs)
+        failed = sum(not j.result['ok'] for j in jobs)
+        self.log(f"\n总用时 {total_time:.1f}秒，各任务用时合计 {sequential:.1f}秒"
+                 f"{f'，并行加速 {sequential / total_time:.2f} 倍' if total_time else ''}")
+        if failed:
+            self.log(f"失败 {failed} 个任务")
+
+
+def load_jobs(spec_file: str, retries: int) -> List[BuildJob]:
+    """读取任务列表：JSON数组，或包含 jobs 数组的对象"""
+    with open(spec_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    specs = data.get('jobs', []) if isinstance(data, dict) else data
+    return [BuildJob(spec, index, retries) for index, spec in enumerate(specs)]
+
+
+def _run_job(request_json: str):
+    """队列为每个任务启动的子进程入口：在本进程中完成一次构建"""
+    request = json.loads(request_json)
+    module = build_daemon.import_tool(build_daemon.TOOLS[request['tool']][0])
+    try:
+        build_daemon.build_project(module, request['tool'], request)
+    except Exception as e:
+        print(f"错误: {e}")
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=f'{TOOL_NAME} - 在共享的CPU和内存预算内批量构建多个项目')
+    parser.add_argument('spec_file', nargs='?', help='任务列表JSON文件')
+    parser.add_argument('--cpus', type=int, default=os.cpu_count() or 1, help='CPU预算')
+    parser.add_argument('--memory-mb', type=int, help='内存预算 (MB)，默认为当前可用内存减去保留部分')
+    parser.add_argument('--retries', type=int, default=1, help='任务失败后的默认重试次数')
+    parser.add_argument('--run-job', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_job:
+        _run_job(args.run_job)
+        return
+
+    print(f"\n{TOOL_NAME} v{VERSION}")
+    print("="*50 + "\n")
+    if not args.spec_file:
+        args.spec_file = input("请输入任务列表文件: ").strip()
+
+    memory_mb = args.memory_mb
+    if memory_mb is None:
+        available = get_available_memory()
+        memory_mb = max(1024, available // 1024 // 1024 - MEMORY_RESERVE_MB) if available else 4096
+
+    try:
+        jobs = load_jobs(args.spec_file, args.retries)
+    except (OSError, ValueError) as e:
+        print(f"错误: {e}")
+        sys.exit(1)
+    finished = BuildQueue(jobs, max(1, args.cpus), memory_mb).run()
+    if not all(job.result['ok'] for job in finished):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n用户取消操作")
+        sys.exit(1)
@@ -0,0 +1,100 @@
+import os
+import re
+import json
+import uuid
+import shutil
+import hashlib
+from typing import Any, Tuple
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# 与压缩工具的临时输出同名规则，中断后残留在输出目录中的临时文件会被同样清理
+TEMP_FILE = re.compile(r'\.tmp-[0-9a-f]{8}$')
+
+
+class ContentCache:
+    """按内容寻址的处理结果缓存：键由源文件哈希、处理选项和工具版本决定，超过容量上限时淘汰最久未使用的条目"""
+
+    def __init__(self, cache_dir: str, max_size_mb: int, suffix: str = ''):
+        self.cache_dir = os.path.abspath(os.path.expanduser(cache_dir))
+        self.max_size = max_size_mb * 1024 * 1024
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """由可JSON序列化的各部分计算缓存键，字典按键排序，选项的书写顺序不影响结果"""
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + self.suffix)
+
+    def get(self, key: str, dest: str) -> bool:
+        """命中时把缓存的结果复制到 dest 并更新其使用时间"""
+        path = self._path(key)
+        try:
+            _atomic_copy(path, dest)
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def put(self, key: str, source: str):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _atomic_copy(source, path)
+
+    def evict(self) -> Tuple[int, int]:
+        """缓存超过容量上限时，按最近使用时间从旧到新删除条目，返回 (删除条目数, 释放字节数)"""
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for file in files:
+                # 只统计缓存条目，缓存目录中的其他文件（如统计数据）不参与淘汰
+                if not file.endswith(self.suffix) or TEMP_FILE.search(file):
+                    continue
+                path = os.path.join(root, file)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                total += st.st_size
+                entries.append((st.st_mtime, st.st_size, path))
+
+        if total <= self.max_size:
+            return 0, 0
+        # 淘汰到上限的 90%，避免每次运行后都触发清理
+        target = self.max_size * 0.9
+        removed, freed = 0, 0
+        for _, size, path in sorted(entries):
+            if total - freed <= target:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+                freed += size
+            except OSError:
+                pass
+        return removed, freed
+
+
+def _atomic_copy(source: str, dest: str):
+    """先复制到同目录的临时文件再改名，读取方不会看到写了一半的文件"""
+    temp_path = f'{dest}.tmp-{uuid.uuid4().hex[:8]}'
+    try:
+        shutil.copyfile(source, temp_path)
+        os.replace(temp_path, dest)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
@@ -0,0 +1,424 @@
+import io
+import os
+import re
+import time
+import uuid
+from html import unescape
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+import js_minifier
+import asset_minifiers
+
+VERSION = "0.2.1"
+
+# 每次交给解析器的字符数，文件按块读入，内存占用与文件大小无关
+CHUNK_SIZE = 64 * 1024
+
+VOID_ELEMENTS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param', 'source', 'track', 'wbr',
+}
+# 块级元素前后的空白不影响显示，可以删除；其他元素（包括自定义元素）前后保留一个空格
+BLOCK_ELEMENTS = {
+    'address', 'article', 'aside', 'base', 'blockquote', 'body', 'caption', 'col', 'colgroup', 'dd', 'details',
+    'dialog', 'dir', 'div', 'dl', 'dt', 'fieldset', 'figcaption', 'figure', 'footer', 'form', 'frame', 'frameset',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'head', 'header', 'hgroup', 'hr', 'html', 'legend', 'li', 'link', 'main',
+    'menu', 'meta', 'nav', 'ol', 'optgroup', 'option', 'p', 'param', 'pre', 'section', 'source', 'summary', 'table',
+    'tbody', 'td', 'tfoot', 'th', 'thead', 'title', 'tr', 'track', 'ul',
+}
+# 不显示的元素，前后的空白按两侧的内容处理
+TRANSPARENT_ELEMENTS = {'script', 'style', 'noscript', 'template'}
+# 内容中的空白有意义，原样保留
+PREFORMATTED_ELEMENTS = {'pre', 'textarea'}
+# 自闭合写法有意义的外部内容
+FOREIGN_ELEMENTS = {'svg', 'math'}
+
+# 可省略的结束标签：后面紧跟这些开始标签时可以省略
+P_CLOSERS = {
+    'address', 'article', 'aside', 'blockquote', 'details', 'div', 'dl', 'fieldset', 'figcaption', 'figure',
+    'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hgroup', 'hr', 'main', 'menu', 'nav', 'ol',
+    'p', 'pre', 'section', 'table', 'ul',
+}
+OMIT_END_BEFORE_START = {
+    'li': {'li'},
+    'dt': {'dt', 'dd'},
+    'dd': {'dt', 'dd'},
+    'p': P_CLOSERS,
+    'option': {'option', 'optgroup'},
+    'optgroup': {'optgroup'},
+    'tr': {'tr'},
+    'td': {'td', 'th'},
+    'th': {'td', 'th'},
+    'thead': {'tbody', 'tfoot'},
+    'tbody': {'tbody', 'tfoot'},
+    'rt': {'rt', 'rp'},
+    'rp': {'rt', 'rp'},
+    'head': None,  # 后面是任意元素时都可以省略
+}
+# 父元素结束或文档结束时可以省略的结束标签
+OMIT_END_BEFORE_PARENT_END = {
+    'li', 'dt', 'dd', 'p', 'option', 'optgroup', 'tr', 'td', 'th', 'tbody', 'tfoot', 'rt', 'rp', 'body', 'html',
+}
+# 父元素为这些元素时 </p> 不能省略
+P_KEEP_END_PARENTS = {'a', 'audio', 'del', 'ins', 'map', 'noscript', 'video'}
+OMITTABLE_END = OMIT_END_BEFORE_START.keys() | OMIT_END_BEFORE_PARENT_END
+# 没有属性时可以省略的开始标签
+OMIT_START = {'html', 'head', 'body'}
+BODY_KEEP_START_BEFORE = {'meta', 'link', 'script', 'style', 'template'}
+
+# 取默认值的属性 (元素, 属性, 值)，值为 None 表示任意值
+REDUNDANT_ATTRIBUTES = {
+    ('form', 'method', 'get'),
+    ('input', 'type', 'text'),
+    ('area', 'shape', 'rect'),
+    ('script', 'language', None),
+}
+EMPTY_REMOVABLE_ATTRIBUTES = {'class', 'id', 'style', 'title', 'lang', 'dir'}
+SCRIPT_TYPES = {'', 'text/javascript', 'application/javascript', 'text/ecmascript', 'application/ecmascript'}
+
+WHITESPACE_PATTERN = re.compile(r'[ \t\n\f\r]+')
+# 开始标签原文中的标签名和属性名，用于恢复外部内容中区分大小写的名称 (viewBox)
+NAME_PATTERN = re.compile(r'<([^\s/>]+)|([^\s/>=]+)(?:\s*=\s*(?:"[^"]*"|\'[^\']*\'|[^\s>]*))?')
+
+
+class HTMLMinifier(HTMLParser):
+    """边解析边输出的HTML压缩器，只保留尚未确定能否省略的一个标签和打开的元素栈，
+    内存占用与文档大小无关（需要压缩的内联脚本除外）
+
+    options 的键与 [Minifier] 配置相同。
+    """
+
+    def __init__(self, output: TextIO, options: Dict[str, bool]):
+        super().__init__(convert_charrefs=False)
+        self.out = output
+        self.options = options
+        # 每个标签和文本都要判断的选项预先取出
+        self.collapse_whitespace = options.get('collapse_whitespace', False)
+        self.remove_optional_tags = options.get('remove_optional_tags', False)
+        self.stack: List[str] = []
+        # 待定的可省略标签 (类型, 标签名)，由下一个输出的内容决定是否写出
+        self._pending: Optional[Tuple[str, str]] = None
+        self._space = False  # 上次输出之后遇到过空白
+        self._inline = False  # 上次输出的是行内内容，其后的空白需要保留
+        self._spaced = False  # 上次输出的内容以空格结束（中间只隔着行内标签）
+        self._preformatted = 0
+        self._foreign = 0
+        self._raw_tag = None  # 正在读取内容的 script 或 style
+        self._raw_buffer: Optional[List[str]] = None
+        self._position = 0
+        # 外部内容中名称的原始大小写，解析器会把标签名和属性名都转换为小写
+        self._names: Dict[str, str] = {}
+
+    def _option(self, key: str) -> bool:
+        return self.options.get(key, False)
+
+    # 可省略标签的处理
+
+    def _resolve_pending(self, kind: str, tag: str = None):
+        """根据紧随其后的内容决定待定的标签能否省略，不能省略时写出"""
+        if self._pending is None:
+            return
+        pending_kind, name = self._pending
+        self._pending = None
+        if pending_kind == 'end':
+            omit = self._can_omit_end(name, kind, tag)
+        else:
+            # 开始标签后面紧跟元素时可以省略，但 <body> 后面是通常位于 head 中的元素时不能省略
+            omit = kind == 'start' and not (name == 'body' and tag in BODY_KEEP_START_BEFORE)
+        if not omit:
+            self.out.write(f'</{name}>' if pending_kind == 'end' else f'<{name}>')
+
+    def _can_omit_end(self, name: str, kind: str, tag: str) -> bool:
+        if kind == 'start':
+            followers = OMIT_END_BEFORE_START.get(name, set())
+            return followers is None or tag in followers
+        if kind in ('end', 'eof') and name in OMIT_END_BEFORE_PARENT_END:
+            # 结束标签之后紧跟父元素的结束，此时 stack 的栈顶就是父元素
+            parent = self.stack[-1] if self.stack else None
+            if kind == 'end' and tag != parent:
+                return False
+            return name != 'p' or parent not in P_KEEP_END_PARENTS
+        return False
+
+    # 空白的处理
+
+    def _write_text(self, text: str):
+        if self._preformatted or not self.collapse_whitespace:
+            if text:
+                self._resolve_pending('text')
+                self.out.write(text)
+                self._space, self._inline, self._spaced = False, True, False
+            return
+        collapsed = WHITESPACE_PATTERN.sub(' ', text)
+        content = collapsed.strip(' ')
+        if collapsed.startswith(' '):
+            self._space = True
+        if content:
+            self._resolve_pending('text')
+            if self._space and self._inline and not self._spaced:
+                self.out.write(' ')
+            self.out.write(content)
+            self._inline = True
+            self._spaced = False
+            self._space = collapsed.endswith(' ')
+
+    def _before_tag(self, tag: str):
+        if not self.collapse_whitespace or (self._preformatted and tag not in PREFORMATTED_ELEMENTS):
+            return
+        if tag in TRANSPARENT_ELEMENTS:
+            return
+        if tag in BLOCK_ELEMENTS:
+            self._inline = self._spaced = False
+        elif self._space and self._inline and not self._spaced:
+            self._resolve_pending('text')
+            self.out.write(' ')
+            self._spaced = True
+        # 标签之前的空白在这里写出或丢弃，不带到标签之后
+        self._space = False
+
+    def _after_tag(self, tag: str):
+        if tag not in BLOCK_ELEMENTS and tag not in TRANSPARENT_ELEMENTS:
+            self._inline = True
+
+    # 属性
+
+    def _filter_attributes(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> List[Tuple[str, Optional[str]]]:
+        result = []
+        attr_map = dict(attrs)
+        for name, value in attrs:
+            normalized = (value or '').strip().lower()
+            if self._option('remove_redundant_attributes'):
+                if (tag, name, normalized) in REDUNDANT_ATTRIBUTES or (tag, name, None) in REDUNDANT_ATTRIBUTES:
+                    continue
+                if tag == 'script' and name == 'charset' and 'src' not in attr_map:
+                    continue
+                if tag == 'a' and name == 'name' and attr_map.get('id') == value:
+                    continue
+            if self._option('remove_script_type_attributes') and tag == 'script' and name == 'type' \
+                    and normalized in SCRIPT_TYPES:
+                continue
+            if self._option('remove_style_link_type_attributes') and tag in ('style', 'link') and name == 'type' \
+                    and normalized == 'text/css':
+                continue
+            if self._option('remove_empty_attributes') and value is not None and not value.strip() \
+                    and (name in EMPTY_REMOVABLE_ATTRIBUTES or name.startswith('on')):
+                continue
+            result.append((name, value))
+        return result
+
+    def _learn_names(self):
+        for match in NAME_PATTERN.finditer(self.get_starttag_text() or ''):
+            name = match.group(1) or match.group(2)
+            if name != name.lower():
+                self._names[name.lower()] = name
+
+    def _name(self, name: str) -> str:
+        return self._names.get(name, name) if self._foreign else name
+
+    def _format_tag(self, tag: str, attrs: List[Tuple[str, Optional[str]]], self_closing: bool = False) -> str:
+        parts = [self._name(tag)]
+        for name, value in attrs:
+            name = self._name(name)
+            if value is None:
+                parts.append(name)
+            else:
+                # 解析器已经解码了属性值中的字符引用，写出时重新转义
+                parts.append(f'{name}="{value.replace("&", "&amp;").replace(chr(34), "&quot;")}"')
+        return f"<{' '.join(parts)}{'/' if self_closing else ''}>"
+
+    # 解析器回调
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]):
+        self._start_tag(tag, attrs, self_closing=False)
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]):
+        self._start_tag(tag, attrs, self_closing=True)
+
+    def _start_tag(self, tag: str, attrs: List[Tuple[str, Optional[str]]], self_closing: bool):
+        # 未写结束标签而被新元素隐式结束的元素
+        while self.stack and tag in (OMIT_END_BEFORE_START.get(self.stack[-1]) or ()):
+            self._pop()
+        self._before_tag(tag)
+        self._resolve_pending('start', tag)
+        if tag in FOREIGN_ELEMENTS:
+            self._foreign += 1
+        if self._foreign:
+            self._learn_names()
+        if attrs:
+            attrs = self._filter_attributes(tag, attrs)
+        if self.remove_optional_tags and tag in OMIT_START and not attrs and not self_closing:
+            self._pending = ('start', tag)
+        else:
+            self.out.write(self._format_tag(tag, attrs, self_closing and self._foreign > 0))
+        self._after_tag(tag)
+
+        if tag in VOID_ELEMENTS or self_closing:
+            if tag in FOREIGN_ELEMENTS:
+                self._foreign -= 1
+            return
+        self._push(tag)
+        if tag in ('script', 'style'):
+            self._raw_tag = tag
+            script_type = (dict(attrs).get('type') or '').strip().lower()
+            if tag == 'script' and self._option('minify_js') and script_type in SCRIPT_TYPES | {'module'}:
+                self._raw_buffer = []
+            elif tag == 'style' and self._option('minify_css'):
+                self._raw_buffer = []
+
+    def _push(self, tag: str):
+        self.stack.append(tag)
+        if tag in PREFORMATTED_ELEMENTS:
+            self._preformatted += 1
+
+    def _pop(self):
+        tag = self.stack.pop()
+        if tag in PREFORMATTED_ELEMENTS:
+            self._preformatted -= 1
+        elif tag in FOREIGN_ELEMENTS:
+            self._foreign -= 1
+
+    def handle_endtag(self, tag: str):
+        if tag == self._raw_tag:
+            self._flush_raw()
+        if tag not in self.stack:
+            # 没有对应开始标签的结束标签原样保留
+            self._resolve_pending('end', tag)
+            self.out.write(f'</{self._name(tag)}>')
+            return
+
+        self._before_tag(tag)
+        # 待定的结束标签需要在出栈前判断，此时栈顶是其父元素
+        self._resolve_pending('end', tag)
+        # 源码中省略了结束标签的元素随之结束
+        name = self._name(tag)
+        while self.stack[-1] != tag:
+            self._pop()
+        self._pop()
+        if self.remove_optional_tags and tag in OMITTABLE_END:
+            self._pending = ('end', tag)
+        else:
+            self.out.write(f'</{name}>')
+        self._after_tag(tag)
+
+    def _flush_raw(self):
+        if self._raw_buffer is not None:
+            code = ''.join(self._raw_buffer)
+            if self._raw_tag == 'style':
+                try:
+                    code = asset_minifiers.minify_css(code)
+                except ValueError:
+                    pass
+            else:
+                minified = io.StringIO()
+                try:
+                    js_minifier.minify(code, minified)
+                    code = minified.getvalue()
+                except js_minifier.JSSyntaxError:
+                    pass
+            self.out.write(code)
+        self._raw_tag = None
+        self._raw_buffer = None
+
+    def handle_data(self, data: str):
+        if self._raw_tag:
+            if self._raw_buffer is not None:
+                self._raw_buffer.append(data)
+            else:
+                self.out.write(data)
+            return
+        self._write_text(data)
+
+    def goahead(self, end: bool):
+        self._position = 0
+        super().goahead(end)
+
+    def updatepos(self, i: int, j: int) -> int:
+        # 记录当前在 rawdata 中的位置，用于判断字符引用在源码中是否以 ; 结束
+        self._position = j
+        return super().updatepos(i, j)
+
+    def handle_entityref(self, name: str):
+        self._write_reference(f'&{name}')
+
+    def handle_charref(self, name: str):
+        self._write_reference(f'&#{name}')
+
+    def _write_reference(self, reference: str):
+        if not self.rawdata.startswith(';', self._position + len(reference)):
+            # a=1&b=2 中的 & 不是字符引用，原样保留
+            self._write_text(reference)
+            return
+        reference += ';'
+        if self._option('decode_entities'):
+            char = unescape(reference)
+            # 解码后会被当作标记或另一个字符引用的字符保持转义
+            if char not in ('<', '&') and char != reference and not WHITESPACE_PATTERN.fullmatch(char):
+                reference = char
+        self._write_text(reference)
+
+    def handle_comment(self, data: str):
+        # 保留条件注释和以 ! 开头的注释
+        if self._option('remove_comments') and not data.startswith(('[if', '<![endif]', '!')):
+            return
+        self._resolve_pending('comment')
+        self.out.write(f'<!--{data}-->')
+
+    def handle_decl(self, decl: str):
+        self._resolve_pending('decl')
+        self.out.write(f'<!{decl}>')
+
+    def unknown_decl(self, data: str):
+        self._resolve_pending('decl')
+        self.out.write(f'<![{data}]>')
+
+    def handle_pi(self, data: str):
+        self._resolve_pending('decl')
+        self.out.write(f'<?{data}>')
+
+    def close(self):
+        super().close()
+        if self._raw_tag:
+            self._flush_raw()
+        self._resolve_pending('eof')
+
+
+def minify(source: TextIO, output: TextIO, options: Dict[str, bool]):
+    """从 source 逐块读取HTML，压缩后写入 output"""
+    minifier = HTMLMinifier(output, options)
+    for chunk in iter(lambda: source.read(CHUNK_SIZE), ''):
+        minifier.feed(chunk)
+    minifier.close()
+
+
+def minify_file(source_path: str, output_path: str, options: Dict[str, bool]) -> Tuple[int, int]:
+    """压缩单个文件，先写入临时文件再替换目标文件，返回 (输入字节数, 输出字节数)"""
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    temp_path = f'{output_path}.tmp-{uuid.uuid4().hex[:8]}'
+    try:
+        # 不是UTF-8的字节原样写回
+        with open(source_path, 'r', encoding='utf-8', errors='surrogateescape', newline='') as source, \
+                open(temp_path, 'w', encoding='utf-8', errors='surrogateescape', newline='') as output:
+            minify(source, output, options)
+        os.replace(temp_path, output_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return os.path.getsize(source_path), os.path.getsize(output_path)
+
+
+asset_minifiers.register_minifier(('.html', '.htm'), minify_file)
+
+
+def minify_batch(batch: List[Tuple[str, str]], options: Dict[str, bool]) -> List[Dict[str, Any]]:
+    """在工作进程中依次压缩一组 (源文件, 输出文件)，按扩展名选择压缩器，单个文件失败不影响其他文件"""
+    results = []
+    for source_path, output_path in batch:
+        start_time = time.perf_counter()
+        result = {'source': source_path, 'ok': True, 'error': None}
+        try:
+            asset_minifiers.get_minifier(source_path)(source_path, output_path, options)
+        except (OSError, ValueError, AssertionError) as e:
+            result.update(ok=False, error=str(e))
+        result['seconds'] = time.perf_counter() - start_time
+        results.append(result)
+    return results
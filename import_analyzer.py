@@ -0,0 +1,166 @@
+import os
+import sys
+import json
+import shlex
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Set, TextIO
+from nuitka_report import NuitkaReport
+from process_runner import run_process, ProcessTimeout
+
+# 在被分析的程序退出时记录已导入的模块和已加载的动态库；无法列出动态库时 libraries 为 null
+BOOTSTRAP = '''
+import os, sys, json, atexit, runpy
+record_file = sys.argv.pop(1)
+def list_libraries():
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        kernel32.K32EnumProcessModules.argtypes = [wintypes.HANDLE, ctypes.POINTER(wintypes.HMODULE),
+                                                   wintypes.DWORD, ctypes.POINTER(wintypes.DWORD)]
+        kernel32.GetModuleFileNameW.argtypes = [wintypes.HMODULE, wintypes.LPWSTR, wintypes.DWORD]
+        modules = (wintypes.HMODULE * 4096)()
+        needed = wintypes.DWORD()
+        if not kernel32.K32EnumProcessModules(kernel32.GetCurrentProcess(), modules, ctypes.sizeof(modules),
+                                              ctypes.byref(needed)):
+            return None
+        name = ctypes.create_unicode_buffer(32768)
+        libraries = set()
+        for module in modules[:min(needed.value // ctypes.sizeof(wintypes.HMODULE), len(modules))]:
+            if kernel32.GetModuleFileNameW(module, name, len(name)):
+                libraries.add(name.value)
+        return sorted(libraries)
+    if sys.platform == 'darwin':
+        import ctypes
+        libc = ctypes.CDLL(None)
+        libc._dyld_image_count.restype = ctypes.c_uint32
+        libc._dyld_get_image_name.argtypes = [ctypes.c_uint32]
+        libc._dyld_get_image_name.restype = ctypes.c_char_p
+        return sorted({os.fsdecode(libc._dyld_get_image_name(i)) for i in range(libc._dyld_image_count())})
+    with open('/proc/self/maps') as f:
+        return sorted({line.split()[-1] for line in f if '.so' in line.rsplit('/', 1)[-1]})
+def dump():
+    modules = sorted(sys.modules)
+    try:
+        libraries = list_libraries()
+    except Exception:
+        libraries = None
+    with open(record_file, 'w', encoding='utf-8') as f:
+        json.dump({'modules': modules, 'libraries': libraries}, f)
+atexit.register(dump)
+sys.argv = sys.argv[1:]
+sys.path[0] = os.path.dirname(os.path.abspath(sys.argv[0]))
+runpy.run_path(sys.argv[0], run_name='__main__')
+'''
+
+
+class ImportAnalyzer:
+    """对比实际运行时导入的模块与Nuitka编译报告中包含的模块，提出可排除的包和DLL"""
+
+    def __init__(self, project_path: str, main_file: str, report_history_dir: Path, output: TextIO = None):
+        self.project_path = os.path.abspath(project_path)
+        self.main_file = main_file
+        self.report_history_dir = report_history_dir
+        self.output = output
+        self.imported: Set[str] = set()
+        self.libraries: Set[str] = set()
+        # 有一次运行没能列出动态库时，未出现在 libraries 中的DLL也可能被用到
+        self.libraries_recorded = True
+
+    def log(self, *args, **kwargs):
+        print(*args, file=self.output or sys.stdout, **kwargs)
+
+    def record_run(self, run_args: str = '', timeout: float = 300) -> bool:
+        """以给定参数运行一次程序并合并记录到的导入，程序应覆盖有代表性的功能"""
+        fd, record_file = tempfile.mkstemp(prefix='imports-', suffix='.json')
+        os.close(fd)
+        command = [sys.executable, '-c', BOOTSTRAP, record_file,
+                   os.path.join(self.project_path, self.main_file), *shlex.split(run_args)]
+        code = None
+        try:
+            try:
+                code = run_process(command, cwd=self.project_path, output=self.output, timeout=timeout)
+            except ProcessTimeout:
+                self.log(f"警告: 运行超过 {timeout:.0f}秒，已终止")
+            with open(record_file, 'r', encoding='utf-8') as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            self.log(f"警告: 未能记录导入 (参数: {run_args or '无'}，返回码 {code})")
+            return False
+        finally:
+            os.remove(record_file)
+        if code != 0:
+            self.log(f"警告: 程序返回码 {code}，记录到的导入可能不完整")
+        self.imported.update(record['modules'])
+        if record['libraries'] is None:
+            self.libraries_recorded = False
+        else:
+            # Windows 和 macOS 的文件名不区分大小写
+            self.libraries.update(os.path.basename(path).lower() for path in record['libraries'])
+        return True
+
+    def _is_used(self, package: str) -> bool:
+        return any(name == package or name.startswith(package + '.') for name in self.imported)
+
+    def analyze(self) -> Dict[str, Any]:
+        """根据最近一次编译报告给出 nofollow_import_to 和 noinclude_dlls 建议及预计节省"""
+        report = NuitkaReport.load_latest(self.report_history_dir)
+        if report is None:
+            raise RuntimeError("没有编译报告，请先启用 compilation_report 完成一次构建")
+
+        stdlib = set(getattr(sys, 'stdlib_module_names', ()))
+        project_packages = {Path(self.main_file).stem}
+        # 不属于任何包的DLL在报告中按文件名计入，它们由 noinclude_dlls 处理
+        dll_names = {Path(dest_path).name.split('.')[0] for dest_path in report.get('dlls', {})}
+        nofollow = {}
+        for package, values in report['packages'].items():
+            # 只建议排除第三方包；标准库模块之间依赖复杂，排除后容易在运行时缺失
+            if package in stdlib or package in project_packages or package in dll_names \
+                    or package.startswith('_') or self._is_used(package):
+                continue
+            nofollow[package] = values
+
+        noinclude = {}
+        for dest_path, size in report.get('dlls', {}).items() if self.libraries_recorded else ():
+            name = os.path.basename(dest_path).lower()
+            owner = dest_path.replace('\\', '/').split('/')[0]
+            if name in self.libraries or owner in nofollow:
+                continue
+            # Nuitka 用 noinclude_dlls 的模式匹配DLL在发布目录中的目标路径
+            noinclude[dest_path] = size
+
+        totals = report['totals']
+        savings = {metric: sum(v[metric] for v in nofollow.values()) for metric in NuitkaReport.METRICS}
+        savings['size'] += sum(noinclude.values())
+        return {'nofollow': nofollow, 'noinclude': noinclude, 'savings': savings, 'totals': totals}
+
+    def print_proposal(self, result: Dict[str, Any]):
+        self.log(f"\n运行时共导入 {len(self.imported)} 个模块，加载 {len(self.libraries)} 个动态库")
+        if not self.libraries_recorded:
+            self.log("未能列出程序加载的动态库 (当前平台不支持或读取失败)，不建议排除DLL")
+        if not result['nofollow'] and not result['noinclude']:
+            self.log("未发现可排除的包或DLL")
+            return
+        if result['nofollow']:
+            self.log("\n运行时未使用的包 (建议 nofollow_import_to):")
+            for package, values in sorted(result['nofollow'].items(), key=lambda i: i[1]['size'], reverse=True):
+                self.log(f"  {package:<30} {values['modules']:>4} 个模块  "
+                         f"{NuitkaReport.format_value('compile_time', values['compile_time']):>10}  "
+                         f"{NuitkaReport.format_value('size', values['size']):>12}")
+        if result['noinclude']:
+            self.log("\n运行时未加载的DLL (建议 noinclude_dlls):")
+            for name, size in sorted(result['noinclude'].items(), key=lambda i: i[1], reverse=True):
+                self.log(f"  {name:<40} {NuitkaReport.format_value('size', size):>12}")
+
+        self.log("\n预计节省:")
+        for metric, title in NuitkaReport.METRICS.items():
+            total = result['totals'].get(metric) or 0
+            saved = result['savings'][metric]
+            if saved:
+                share = f" ({saved / total:.1%})" if total else ''
+                self.log(f"  {title}: {NuitkaReport.format_value(metric, saved)}{share}")
+        self.log("\n对应配置:")
+        self.log(f"  nofollow_import_to = {','.join(sorted(result['nofollow']))}")
+        self.log(f"  noinclude_dlls = {','.join(sorted(result['noinclude']))}")
@@ -0,0 +1,322 @@
+import os
+import re
+import uuid
+from typing import Iterator, List, NamedTuple, TextIO, Tuple
+
+VERSION = "0.1.1"
+
+
+class JSSyntaxError(ValueError):
+    """源码无法完成词法分析，例如字符串或注释没有结束"""
+
+
+class Token(NamedTuple):
+    type: str  # name/number/string/template/regex/punct/comment/newline
+    value: str
+
+
+# 按最长匹配排列的运算符
+PUNCTUATORS = sorted([
+    '>>>=', '...', '===', '!==', '**=', '<<=', '>>=', '>>>', '&&=', '||=', '??=',
+    '=>', '==', '!=', '<=', '>=', '&&', '||', '??', '?.', '++', '--', '+=', '-=', '*=', '/=', '%=',
+    '&=', '|=', '^=', '**', '<<', '>>',
+    '{', '}', '(', ')', '[', ']', ';', ',', '<', '>', '+', '-', '*', '/', '%', '&', '|', '^',
+    '!', '~', '?', ':', '=', '.', '@',
+], key=len, reverse=True)
+PUNCT_PATTERN = re.compile('|'.join(re.escape(p) for p in PUNCTUATORS))
+NAME_PATTERN = re.compile(r'#?(?:[A-Za-z_$]|[^\x00-\x7f\s\ufeff]|\\u[0-9a-fA-F{])'
+                          r'(?:[\w$]|[^\x00-\x7f\s\ufeff]|\\u[0-9a-fA-F{}]+)*')
+NUMBER_PATTERN = re.compile(
+    r'0[xX][0-9a-fA-F_]+n?|0[bB][01_]+n?|0[oO][0-7_]+n?'
+    r'|(?:\d[\d_]*(?:\.[\d_]*)?|\.\d[\d_]*)(?:[eE][+-]?\d[\d_]*)?n?')
+WHITESPACE_PATTERN = re.compile(r'[ \t\f\v\u00a0\ufeff\u1680\u2000-\u200a\u202f\u205f\u3000]+')
+LINE_TERMINATORS = '\n\r\u2028\u2029'
+
+# 这些关键字之后的 / 开始正则表达式而不是除号
+REGEX_AFTER_KEYWORDS = {
+    'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void', 'throw',
+    'case', 'do', 'else', 'yield', 'await',
+}
+# 以这些标记结束时，后面换行可能触发自动分号插入
+ENDS_EXPRESSION = {')', ']', '}', '++', '--'}
+STARTS_EXPRESSION = {'(', '[', '{', '+', '-', '++', '--', '!', '~', '/', '@'}
+
+
+def tokenize(source: str) -> Iterator[Token]:
+    """逐个产生源码中的标记，正确区分字符串、模板字符串、正则表达式和除号，换行作为单独的标记"""
+    pos = 0
+    length = len(source)
+    previous = None  # 上一个有意义的标记，用于判断 / 的含义
+    # 上一个标记是后缀 ++/-- 或对象字面量结束的 }，其后的 / 是除号
+    operand_ended = False
+    newline_seen = False
+    # 每层花括号是代码块 (block)、对象字面量 (object) 还是模板字符串中的 ${ } (template)
+    braces: List[str] = []
+
+    if source.startswith('#!'):
+        end = _find_line_end(source, 0)
+        yield Token('comment', source[:end])
+        pos = end
+
+    while pos < length:
+        char = source[pos]
+
+        match = WHITESPACE_PATTERN.match(source, pos)
+        if match:
+            pos = match.end()
+            continue
+        if char in LINE_TERMINATORS:
+            pos += 1
+            newline_seen = True
+            yield Token('newline', '\n')
+            continue
+
+        if source.startswith('//', pos):
+            end = _find_line_end(source, pos)
+            yield Token('comment', source[pos:end])
+            pos = end
+            continue
+        if source.startswith('/*', pos):
+            end = source.find('*/', pos + 2)
+            if end < 0:
+                raise JSSyntaxError(f"注释没有结束 (位置 {pos})")
+            comment = source[pos:end + 2]
+            yield Token('comment', comment)
+            if any(c in comment for c in LINE_TERMINATORS):
+                # 包含换行的多行注释与换行等效
+                newline_seen = True
+                yield Token('newline', '\n')
+            pos = end + 2
+            continue
+
+        if char in '\'"':
+            end = _scan_string(source, pos, char)
+            token = Token('string', source[pos:end])
+        elif char == '`':
+            end, closed = _scan_template(source, pos + 1)
+            if not closed:
+                braces.append('template')
+            token = Token('template', source[pos:end])
+        elif char == '}' and braces and braces[-1] == 'template':
+            # 模板字符串中 ${ } 表达式结束，继续读取模板的剩余部分
+            braces.pop()
+            end, closed = _scan_template(source, pos + 1)
+            if not closed:
+                braces.append('template')
+            token = Token('template', source[pos:end])
+        elif char == '/' and not operand_ended and _regex_allowed(previous):
+            end = _scan_regex(source, pos)
+            token = Token('regex', source[pos:end])
+        elif char.isdigit() or (char == '.' and pos + 1 < length and source[pos + 1].isdigit()):
+            end = NUMBER_PATTERN.match(source, pos).end()
+            token = Token('number', source[pos:end])
+        else:
+            match = NAME_PATTERN.match(source, pos)
+            if match:
+                end = match.end()
+                token = Token('name', match.group())
+            else:
+                match = PUNCT_PATTERN.match(source, pos)
+                if not match:
+                    raise JSSyntaxError(f"无法识别的字符 {char!r} (位置 {pos})")
+                value = match.group()
+                # a?.5:b 中的 ?. 不是可选链
+                if value == '?.' and pos + 2 < length and source[pos + 2].isdigit():
+                    value = '?'
+                end = pos + len(value)
+                token = Token('punct', value)
+        closes_object = False
+        if token.type == 'punct':
+            if token.value == '{':
+                braces.append('object' if _starts_object(previous) else 'block')
+            elif token.value == '}' and braces:
+                closes_object = braces.pop() == 'object'
+        # a++ / 2 中的 ++ 紧跟在操作数之后（中间没有换行），是后缀运算符
+        postfix = token.value in ('++', '--') and token.type == 'punct' and not newline_seen \
+            and previous is not None and _ends_operand(previous)
+        operand_ended = postfix or closes_object
+        newline_seen = False
+        pos = end
+        previous = token
+        yield token
+
+
+def _find_line_end(source: str, pos: int) -> int:
+    ends = [i for i in (source.find(c, pos) for c in LINE_TERMINATORS) if i >= 0]
+    return min(ends) if ends else len(source)
+
+
+def _scan_string(source: str, pos: int, quote: str) -> int:
+    i = pos + 1
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == quote:
+            return i + 1
+        if char in '\n\r':
+            break
+        i += 1
+    raise JSSyntaxError(f"字符串没有结束 (位置 {pos})")
+
+
+def _scan_template(source: str, pos: int) -> Tuple[int, bool]:
+    """从模板字符串内容开始读取，返回 (结束位置, 是否到达结尾的反引号)；遇到 ${ 时停在其后"""
+    i = pos
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == '`':
+            return i + 1, True
+        if char == '$' and source.startswith('${', i):
+            return i + 2, False
+        i += 1
+    raise JSSyntaxError(f"模板字符串没有结束 (位置 {pos})")
+
+
+def _scan_regex(source: str, pos: int) -> int:
+    i = pos + 1
+    in_class = False
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char in LINE_TERMINATORS:
+            break
+        if char == '[':
+            in_class = True
+        elif char == ']':
+            in_class = False
+        elif char == '/' and not in_class:
+            i += 1
+            while i < len(source) and (source[i].isalnum() or source[i] in '_$'):
+                i += 1
+            return i
+        i += 1
+    raise JSSyntaxError(f"正则表达式没有结束 (位置 {pos})")
+
+
+def _regex_allowed(previous: Token | None) -> bool:
+    if previous is None:
+        return True
+    if previous.type == 'name':
+        return previous.value in REGEX_AFTER_KEYWORDS
+    if previous.type == 'punct':
+        # a) / 2 和 a] / 2 是除法；代码块结束的 } 之后更常见的是语句开头的正则表达式
+        return previous.value not in (')', ']')
+    if previous.type == 'template':
+        # 模板中 ${ 之后是表达式的开始
+        return previous.value.endswith('${')
+    return False
+
+
+def _starts_object(previous: Token | None) -> bool:
+    """{ 出现在表达式的位置时是对象字面量，否则是代码块"""
+    if previous is None:
+        return False
+    if previous.type == 'punct':
+        return previous.value not in (')', ']', '}', ';', '{', '=>')
+    if previous.type == 'name':
+        return previous.value in REGEX_AFTER_KEYWORDS - {'do', 'else'}
+    if previous.type == 'template':
+        return previous.value.endswith('${')
+    return False
+
+
+def _ends_operand(token: Token) -> bool:
+    if token.type == 'name':
+        return token.value not in REGEX_AFTER_KEYWORDS
+    if token.type in ('number', 'string', 'regex'):
+        return True
+    if token.type == 'template':
+        return token.value.endswith('`')
+    return token.value in (')', ']')
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char in '_$\\' or ord(char) > 0x7f
+
+
+def _ends_expression(token: Token) -> bool:
+    if token.type in ('name', 'number', 'string', 'regex'):
+        return True
+    if token.type == 'template':
+        return token.value.endswith('`')
+    return token.value in ENDS_EXPRESSION
+
+
+def _starts_expression(token: Token) -> bool:
+    if token.type in ('name', 'number', 'string', 'regex'):
+        return True
+    if token.type == 'template':
+        return token.value.startswith('`')
+    return token.value in STARTS_EXPRESSION
+
+
+def _needs_space(previous: Token, token: Token) -> bool:
+    """两个标记直接相连会改变含义时需要空格"""
+    last, first = previous.value[-1], token.value[0]
+    if _is_word_char(last) and _is_word_char(first):
+        return True
+    # 正则表达式的标志与后面的标识符相连会被读成标志
+    if previous.type == 'regex' and _is_word_char(first):
+        return True
+    # 1 .toString() 中的空格不能省略
+    if previous.type == 'number' and first == '.' and not re.search(r'[.eExXn]', previous.value):
+        return True
+    if (last, first) in (('+', '+'), ('-', '-'), ('/', '/'), ('/', '*')):
+        return True
+    # 避免拼出HTML注释 <!-- 和 -->
+    return (last == '<' and token.value.startswith('!')) or (previous.value.endswith('--') and first == '>')
+
+
+def _is_preserved_comment(comment: str) -> bool:
+    return comment.startswith(('/*!', '#!')) or '@license' in comment or '@preserve' in comment
+
+
+def minify(source: str, output: TextIO):
+    """删除注释和多余空白，把结果写入 output；只在可能影响自动分号插入的位置保留换行"""
+    previous = None
+    newline_pending = False
+    for token in tokenize(source):
+        if token.type == 'newline':
+            newline_pending = previous is not None
+            continue
+        if token.type == 'comment':
+            if _is_preserved_comment(token.value):
+                if previous is not None:
+                    output.write('\n')
+                output.write(token.value + '\n')
+                previous = None
+                newline_pending = False
+            continue
+
+        if previous is not None:
+            if newline_pending and _ends_expression(previous) and _starts_expression(token):
+                output.write('\n')
+            elif _needs_space(previous, token):
+                output.write(' ')
+        output.write(token.value)
+        previous = token
+        newline_pending = False
+
+
+def minify_file(source_path: str, output_path: str) -> Tuple[int, int]:
+    """压缩单个文件，先写入临时文件再替换目标文件，返回 (输入字节数, 输出字节数)"""
+    with open(source_path, 'r', encoding='utf-8') as f:
+        source = f.read()
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    temp_path = f'{output_path}.tmp-{uuid.uuid4().hex[:8]}'
+    try:
+        with open(temp_path, 'w', encoding='utf-8', newline='') as f:
+            minify(source, f)
+        os.replace(temp_path, output_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return os.path.getsize(source_path), os.path.getsize(output_path)
@@ -0,0 +1,373 @@
+import io
+import os
+import json
+import shutil
+import statistics
+import tempfile
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+from process_runner import run_process
+from node_pool import find_node
+
+# 通过 node -r 预加载，退出时记录基准脚本通过 require 加载的文件
+RECORDER_SCRIPT = '''
+process.on('exit', () => {
+  require('fs').writeFileSync(process.env.PROJECTCOMPILER_REQUIRE_LOG, JSON.stringify(Object.keys(require.cache)));
+});
+'''
+
+
+class ObfuscationProfiler:
+    """在本地Node中对原始代码和混淆后的代码运行用户提供的基准脚本，测量混淆带来的减速，
+    并在减速预算内搜索最强的阈值设置
+
+    基准脚本是项目中的JS文件，用相对路径加载被测代码；每次测量时组装一份项目副本，
+    其中基准脚本保持原样，被测的JS文件取自原始项目或混淆输出。
+    """
+
+    THRESHOLD_GRID = [0.0, 0.1, 0.25, 0.5, 0.75, 1.0]
+    # 可调的选项，按对保护强度的贡献从大到小排列，自动调整时依次确定
+    TUNABLE = ['control-flow-flattening', 'dead-code-injection', 'string-array']
+
+    def __init__(self, obfuscator):
+        self.obfuscator = obfuscator
+        self.project_path = obfuscator.project_path
+        profile_config = obfuscator.config.config['Profile']
+        self.benchmarks = [b.strip() for b in profile_config['benchmarks'].split(',') if b.strip()]
+        if not self.benchmarks:
+            raise ValueError("请在 [Profile] benchmarks 中指定基准脚本")
+        for benchmark in self.benchmarks:
+            if not os.path.isfile(os.path.join(self.project_path, benchmark)):
+                raise ValueError(f"基准脚本不存在: {benchmark}")
+        if obfuscator.config.config['General'].get('engine') == 'python':
+            raise ValueError("性能分析需要 javascript-obfuscator 引擎 (engine 为 pool 或 cli)")
+        self.runs = max(1, int(profile_config['runs']))
+        self.budget = float(profile_config['slowdown_budget'])
+        self.timeout = float(profile_config['timeout']) or None
+        self.node = find_node()
+        self.work_dir = tempfile.mkdtemp(prefix='jsprofile-')
+        self._builds: Dict[str, str] = {}
+        self._baseline: Optional[float] = None
+        self._slowdowns: Dict[Any, float] = {}
+
+    def log(self, *args, **kwargs):
+        self.obfuscator.log(*args, **kwargs)
+
+    def close(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def __enter__(self) -> 'ObfuscationProfiler':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _build(self, overrides: Dict[str, str], hot_path: bool = True) -> str:
+        """用覆盖后的混淆选项处理整个项目并返回输出目录，相同的选项只处理一次
+
+        hot_path 为 False 时忽略 [HotPath] 的性能数据，所有文件使用同一配置。
+        """
+        section = self.obfuscator.config.config['Obfuscator']
+        hot_path_section = self.obfuscator.config.config['HotPath']
+        options = {**dict(section), **overrides}
+        hot_profile = hot_path_section['profile'] if hot_path else ''
+        key = json.dumps([options, hot_profile], sort_keys=True)
+        if key in self._builds:
+            return self._builds[key]
+
+        original = dict(section), self.obfuscator.output_dir, self.obfuscator.output
+        general = self.obfuscator.config.config['General']
+        confirm, original_profile = general['confirm_before_process'], hot_path_section['profile']
+        captured = io.StringIO()
+        output_dir = os.path.join(self.work_dir, f'build-{len(self._builds) + 1}')
+        try:
+            section.update(options)
+            hot_path_section['profile'] = hot_profile
+            general['confirm_before_process'] = 'false'
+            self.obfuscator.output_dir = output_dir
+            # 各个变体的处理过程只在失败时输出
+            self.obfuscator.output = captured
+            stats = self.obfuscator.process_project()
+        finally:
+            section.clear()
+            section.update(original[0])
+            general['confirm_before_process'], hot_path_section['profile'] = confirm, original_profile
+            self.obfuscator.output_dir, self.obfuscator.output = original[1], original[2]
+        if not stats or stats['succeeded'] < stats['files']:
+            self.log(captured.getvalue()[-2000:])
+            raise RuntimeError("混淆变体处理失败")
+        self._builds[key] = output_dir
+        return output_dir
+
+    def _make_tree(self, obfuscated_dir: str = None, only: List[str] = None) -> str:
+        """组装可运行的项目副本：被测JS文件取自混淆输出（only 限定其中的部分文件），其他文件链接到原始项目"""
+        root = tempfile.mkdtemp(prefix='tree-', dir=self.work_dir)
+        benchmarks = {os.path.normpath(b) for b in self.benchmarks}
+        for dirpath, dirs, files in os.walk(self.project_path):
+            rel_dir = os.path.relpath(dirpath, self.project_path)
+            dirs[:] = [d for d in dirs if d not in ('dist', '.git', '.svn')]
+            target_dir = os.path.normpath(os.path.join(root, rel_dir))
+            os.makedirs(target_dir, exist_ok=True)
+            if 'node_modules' in dirs:
+                dirs.remove('node_modules')
+                _link(os.path.join(dirpath, 'node_modules'), os.path.join(target_dir, 'node_modules'))
+            for file in files:
+                rel_path = os.path.normpath(os.path.join(rel_dir, file))
+                source = os.path.join(dirpath, file)
+                use_obfuscated = (obfuscated_dir and file.endswith('.js') and rel_path not in benchmarks
+                                  and (only is None or rel_path in only))
+                if use_obfuscated:
+                    shutil.copyfile(os.path.join(obfuscated_dir, rel_path), os.path.join(target_dir, file))
+                elif file.endswith('.js'):
+                    # JS文件必须是真实文件，Node 会按链接目标的位置解析其中的相对路径
+                    shutil.copyfile(source, os.path.join(target_dir, file))
+                else:
+                    _link(source, os.path.join(target_dir, file))
+        return root
+
+    def _run_benchmarks(self, root: str, require_log: str = None) -> float:
+        """依次运行全部基准脚本一次，返回总耗时（秒）"""
+        env = None
+        command_prefix = [self.node]
+        if require_log:
+            recorder = os.path.join(self.work_dir, 'recorder.js')
+            with open(recorder, 'w', encoding='utf-8') as f:
+                f.write(RECORDER_SCRIPT)
+            command_prefix += ['-r', recorder]
+            env = {**os.environ, 'PROJECTCOMPILER_REQUIRE_LOG': require_log}
+        total = 0.0
+        for benchmark in self.benchmarks:
+            captured = io.StringIO()
+            start_time = time.perf_counter()
+            code = run_process([*command_prefix, os.path.join(root, benchmark)], cwd=root, env=env,
+                               output=captured, cancel_event=self.obfuscator.cancel_event, timeout=self.timeout)
+            total += time.perf_counter() - start_time
+            if code != 0:
+                self.log(captured.getvalue()[-2000:])
+                raise RuntimeError(f"基准脚本 {benchmark} 返回码 {code}")
+        return total
+
+    def _measure(self, root: str) -> float:
+        """预热一次后多次运行，返回总耗时的中位数"""
+        self._run_benchmarks(root)
+        return statistics.median(self._run_benchmarks(root) for _ in range(self.runs))
+
+    def _measure_tree(self, obfuscated_dir: str = None, only: List[str] = None) -> float:
+        root = self._make_tree(obfuscated_dir, only)
+        try:
+            return self._measure(root)
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+    def baseline(self) -> float:
+        if self._baseline is None:
+            self._baseline = self._measure_tree()
+            self.log(f"原始代码: {self._baseline * 1000:.1f}ms")
+        return self._baseline
+
+    def slowdown(self, overrides: Dict[str, str] = None, only: List[str] = None, hot_path: bool = True) -> float:
+        """混淆后的运行时间与原始代码之比；同一变体只测量一次，报告中的数值前后一致"""
+        build = self._build(overrides or {}, hot_path)
+        key = build, tuple(only or ())
+        if key not in self._slowdowns:
+            self._slowdowns[key] = self._measure_tree(build, only) / self.baseline()
+        return self._slowdowns[key]
+
+    def loaded_files(self) -> List[str]:
+        """基准脚本实际加载的项目JS文件（相对路径），没有记录到时返回全部JS文件"""
+        root = self._make_tree()
+        real_root = os.path.realpath(root)
+        require_log = os.path.join(self.work_dir, 'require-log.json')
+        try:
+            self._run_benchmarks(root, require_log)
+            with open(require_log, 'r', encoding='utf-8') as f:
+                loaded = json.load(f)
+        except (OSError, ValueError):
+            loaded = []
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+        benchmarks = {os.path.normpath(b) for b in self.benchmarks}
+        files = sorted({os.path.relpath(path, real_root) for path in loaded
+                        if path.startswith(real_root + os.sep) and path.endswith('.js')} - benchmarks)
+        files = [f for f in files if not f.split(os.sep)[0] == 'node_modules']
+        if not files:
+            self.log("警告: 未记录到基准脚本通过 require 加载的文件，逐个测量全部JS文件")
+            files = sorted(os.path.relpath(f, self.project_path) for f in self.obfuscator.collect_js_files())
+            files = [f for f in files if f not in benchmarks]
+        return files
+
+    def _feature_options(self) -> List[str]:
+        """当前配置中启用的混淆功能（取值为 true 的选项，compact 除外）"""
+        section = self.obfuscator.config.config['Obfuscator']
+        return [key for key, value in section.items() if value.lower() == 'true' and key != 'compact']
+
+    def profile_options(self) -> Dict[str, float]:
+        """分别只启用一个混淆功能，测量各自造成的减速"""
+        features = self._feature_options()
+        disabled = dict.fromkeys(features, 'false')
+        # 分别衡量各选项的代价，不区分热点文件
+        results = {'全部选项': self.slowdown(hot_path=False)}
+        for feature in features:
+            results[feature] = self.slowdown({**disabled, feature: 'true'}, hot_path=False)
+        self.log("\n各混淆选项单独启用时的减速:")
+        for name, value in sorted(results.items(), key=lambda item: item[1], reverse=True):
+            self.log(f"  {name:<36}{value:>8.2f}x{'  超出预算' if value > self.budget else ''}")
+        return results
+
+    def profile_files(self) -> Dict[str, float]:
+        """按当前配置混淆，每次只替换一个文件，测量各文件混淆后造成的减速"""
+        files = self.loaded_files()
+        self.log(f"\n逐个测量 {len(files)} 个被加载的文件...")
+        results = {file: self.slowdown(only=[file], hot_path=False) for file in files}
+        self.log("\n各文件混淆后的减速:")
+        for file, value in sorted(results.items(), key=lambda item: item[1], reverse=True):
+            self.log(f"  {file:<50}{value:>8.2f}x")
+        return results
+
+    def profile_hot_path(self) -> Optional[Dict[str, float]]:
+        """比较所有文件使用完整配置和热点文件使用轻量配置时的减速，报告避免的额外开销"""
+        if not self.obfuscator.config.config['HotPath']['profile']:
+            return None
+        uniform = self.slowdown(hot_path=False)
+        hot_path = self.slowdown()
+        avoided = (uniform - hot_path) / (uniform - 1) if uniform > 1 else 0.0
+        self.log(f"\n统一使用完整配置: 减速 {uniform:.2f}x")
+        self.log(f"热点文件使用轻量配置: 减速 {hot_path:.2f}x，避免了 {avoided:.0%} 的混淆运行开销")
+        return {'uniform': uniform, 'hot_path': hot_path, 'avoided': avoided}
+
+    @classmethod
+    def threshold_options(cls, thresholds: Dict[str, float]) -> Dict[str, str]:
+        options = {}
+        for feature, value in thresholds.items():
+            options[feature] = 'true' if value > 0 else 'false'
+            if value > 0:
+                options[f'{feature}-threshold'] = str(value)
+        return options
+
+    def autotune(self) -> Dict[str, Any]:
+        """依次为每个可调选项二分查找不超出减速预算的最大阈值，假设减速随阈值单调增加"""
+        section = self.obfuscator.config.config['Obfuscator']
+        tunable = [f for f in self.TUNABLE if f in section and f'{f}-threshold' in section]
+        thresholds = dict.fromkeys(tunable, 0.0)
+        self.log(f"\n在减速预算 {self.budget:.2f}x 内搜索阈值...")
+        for feature in tunable:
+            low, high, best = 1, len(self.THRESHOLD_GRID) - 1, 0
+            while low <= high:
+                middle = (low + high) // 2
+                candidate = {**thresholds, feature: self.THRESHOLD_GRID[middle]}
+                value = self.slowdown(self.threshold_options(candidate))
+                self.log(f"  {feature} = {self.THRESHOLD_GRID[middle]:<5} 减速 {value:.2f}x")
+                if value <= self.budget:
+                    best, low = middle, middle + 1
+                else:
+                    high = middle - 1
+            thresholds[feature] = self.THRESHOLD_GRID[best]
+
+        options = self.threshold_options(thresholds)
+        value = self.slowdown(options)
+        self.log(f"\n推荐设置 (减速 {value:.2f}x，预算 {self.budget:.2f}x):")
+        for key, option_value in options.items():
+            self.log(f"  {key} = {option_value}")
+        return {'options': options, 'slowdown': value}
+
+
+def load_execution_profile(path: str, roots: List[str]) -> Dict[str, Counter]:
+    """读取 V8 CPU profile (.cpuprofile) 或 NODE_V8_COVERAGE 生成的覆盖率文件（或其所在目录），
+    返回 相对路径 -> {函数: 权重}，只包含位于 roots 中某个目录下的文件
+
+    CPU profile 的权重为采样次数；覆盖率的权重为每个字符所在最内层代码块的执行次数之和，近似执行的代码量。
+    """
+    if os.path.isdir(path):
+        files = [os.path.join(path, f) for f in sorted(os.listdir(path)) if f.endswith('.json')]
+    else:
+        files = [path]
+    weights: Dict[str, Counter] = {}
+
+    def add(url: str, function: str, weight: float):
+        file = _url_to_relpath(url, roots)
+        if file is not None and weight > 0:
+            weights.setdefault(file, Counter())[function] += weight
+
+    for file in files:
+        with open(file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if 'nodes' in data:
+            samples = Counter(data.get('samples', []))
+            for node in data['nodes']:
+                frame = node['callFrame']
+                name = f"{frame.get('functionName') or '(匿名)'}:{frame.get('lineNumber', -1) + 1}"
+                add(frame.get('url', ''), name, samples.get(node['id'], node.get('hitCount', 0)))
+        elif 'result' in data:
+            for script in data['result']:
+                for function, weight in _coverage_weights(script).items():
+                    add(script.get('url', ''), function, weight)
+        else:
+            raise ValueError(f"无法识别的性能数据文件: {file}")
+    return weights
+
+
+def _coverage_weights(script: Dict[str, Any]) -> Counter:
+    """覆盖率中的代码块相互嵌套（函数范围包含其中的代码块和内层函数），
+    每个范围只计入未被内层范围覆盖的部分，按其执行次数加权"""
+    ranges = []
+    for function in script.get('functions', []):
+        name = function.get('functionName') or '(顶层)'
+        for r in function['ranges']:
+            ranges.append((r['startOffset'], -r['endOffset'], len(ranges), r['count'], name))
+    ranges.sort()
+    own = [-end_negated - start for start, end_negated, *_ in ranges]
+    stack: List[int] = []
+    for i, (start, end_negated, *_) in enumerate(ranges):
+        while stack and -ranges[stack[-1]][1] <= start:
+            stack.pop()
+        if stack:
+            # 只从直接包含它的范围中扣除，更外层的范围已经扣除了这个父范围
+            own[stack[-1]] -= -end_negated - start
+        stack.append(i)
+    weights = Counter()
+    for (_, _, _, count, name), length in zip(ranges, own):
+        weights[name] += count * max(length, 0)
+    return weights
+
+
+def _url_to_relpath(url: str, roots: List[str]) -> Optional[str]:
+    if url.startswith('file://'):
+        path = url2pathname(urlparse(url).path)
+    elif os.path.isabs(url):
+        path = url
+    else:
+        # node:internal 等内置模块
+        return None
+    path = os.path.normpath(path)
+    for root in roots:
+        if path.startswith(os.path.normpath(root) + os.sep):
+            return os.path.relpath(path, root)
+    return None
+
+
+def classify_hot_files(weights: Dict[str, Counter], hot_fraction: float) -> Set[str]:
+    """按权重从大到小选出热点文件，直到覆盖总权重的 hot_fraction"""
+    totals = {file: sum(functions.values()) for file, functions in weights.items()}
+    total = sum(totals.values())
+    hot = set()
+    covered = 0.0
+    for file, weight in sorted(totals.items(), key=lambda item: item[1], reverse=True):
+        if covered >= total * hot_fraction:
+            break
+        hot.add(file)
+        covered += weight
+    return hot
+
+
+def _link(source: str, target: str):
+    try:
+        os.symlink(source, target, target_is_directory=os.path.isdir(source))
+    except OSError:
+        # Windows 上没有创建符号链接的权限时复制
+        if os.path.isdir(source):
+            shutil.copytree(source, target)
+        else:
+            shutil.copyfile(source, target)
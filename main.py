@@ -7,7 +7,7 @@ from PyQt6.QtGui import *
 import importlib.util
 import queue
 import io
-import contextlib
+import threading
 
 # 修改导入工具模块的函数
 def import_tool(name):
@@ -148,6 +148,8 @@ class ToolDescriptionWidget(QWidget):
    - console: 是否显示控制台
    - one_file: 是否生成单文件
    - icon_path: 程序图标路径
+   - multi_entry_mode: 多入口打包方式 (collect/separate)
+   - parallel_builds: separate 模式下的并行打包数
 
 <h3>最佳实践</h3>
 • 将核心逻辑放在子模块中
@@ -245,6 +247,7 @@ HTML文件压缩工具
 主要功能:
 - HTML文件压缩
 - CSS/JS内联代码压缩
+- CSS/SVG/JSON 静态资源压缩，与HTML一起输出到 dist
 - 自动优化HTML结构
 
 参数说明:
@@ -296,6 +299,8 @@ class ToolTab(QWidget):
         self.tool_name = tool_name
         self.tool_module = tool_module
         self.console_queue = queue.Queue()
+        # 停止按钮设置此事件，工具随即终止正在运行的子进程树
+        self.cancel_event = threading.Event()
         
         # 初始化配置对象 (除了pyinstxtractor)
         if tool_name != "pyinstxtractor":
@@ -331,6 +336,13 @@ class ToolTab(QWidget):
         self.run_button = QPushButton("运行")
         self.run_button.clicked.connect(self.runTool)
         button_layout.addWidget(self.run_button)
+
+        # pyinstxtractor 在进程内完成提取，没有可以终止的子进程
+        if self.tool_name != "pyinstxtractor":
+            self.stop_button = QPushButton("停止")
+            self.stop_button.setEnabled(False)
+            self.stop_button.clicked.connect(self.stopTool)
+            button_layout.addWidget(self.stop_button)
         
         # 仅为非pyinstxtractor工具添加配置按钮
         if self.tool_name != "pyinstxtractor":
@@ -403,6 +415,7 @@ class ToolTab(QWidget):
         path_layout.addWidget(self.browse_project)
 
         self.form_layout.addRow("项目路径:", path_layout)
+        self.main_file.setPlaceholderText("多个入口以逗号分隔")
         self.form_layout.addRow("主文件:", self.main_file)
 
         # 编译选项
@@ -425,6 +438,9 @@ class ToolTab(QWidget):
         path_layout.addWidget(self.browse_project)
 
         self.form_layout.addRow("项目路径:", path_layout)
+
+        self.main_file = QLineEdit()
+        self.form_layout.addRow("主文件:", self.main_file)
         
         self.standalone = QCheckBox("独立可执行文件")
         self.onefile = QCheckBox("单文件模式")
@@ -504,25 +520,40 @@ class ToolTab(QWidget):
         except queue.Empty:
             pass
 
+    def stopTool(self):
+        print("正在停止...", file=self.console_output)
+        self.stop_button.setEnabled(False)
+        self.cancel_event.set()
+
+    def onToolFinished(self):
+        self.run_button.setEnabled(True)
+        if hasattr(self, 'stop_button'):
+            self.stop_button.setEnabled(False)
+
     def runTool(self):
         # 清空控制台
         self.console.clear()
+        # 每次运行使用新的事件，上次的停止请求不影响本次运行
+        self.cancel_event = threading.Event()
+        self.run_button.setEnabled(False)
+        if hasattr(self, 'stop_button'):
+            self.stop_button.setEnabled(True)
         
-        # 重定向stdout到我们的队列
-        redirector = ConsoleRedirector(self.console_queue)
+        # 工具输出写入本标签页自己的队列，不替换进程全局的 sys.stdout，
+        # 多个标签页可以同时运行构建
+        self.console_output = ConsoleRedirector(self.console_queue)
         
         # 创建工作线程
         self.worker_thread = QThread()
         
         # 创建工作类
         class Worker(QObject):
-            def __init__(self, tool, redirector):
+            def __init__(self, tool):
                 super().__init__()
                 self.tool = tool
-                self.redirector = redirector
             
             def run(self):
-                with contextlib.redirect_stdout(self.redirector):
+                try:
                     if self.tool.tool_name == "Comp-Package_py":
                         self.tool.runPythonCompiler()
                     elif self.tool.tool_name == "Nuitka_py":
@@ -533,14 +564,20 @@ class ToolTab(QWidget):
                         self.tool.runHTMLCompressor()
                     elif self.tool.tool_name == "pyinstxtractor":
                         self.tool.runPyInstExtractor()
+                except Exception as e:
+                    if self.tool.cancel_event.is_set():
+                        print("已停止", file=self.tool.console_output)
+                    else:
+                        print(f"运行出错: {str(e)}", file=self.tool.console_output)
                 self.tool.worker_thread.quit()
 
         # 创建工作对象
-        self.worker = Worker(self, redirector)
+        self.worker = Worker(self)
         self.worker.moveToThread(self.worker_thread)
         
         # 连接信号
         self.worker_thread.started.connect(self.worker.run)
+        self.worker_thread.finished.connect(self.onToolFinished)
         self.worker_thread.finished.connect(self.worker_thread.deleteLater)
         self.worker_thread.finished.connect(self.worker.deleteLater)
         
@@ -549,9 +586,12 @@ class ToolTab(QWidget):
 
     def runPythonCompiler(self):
         # 实现Python编译器的运行逻辑
+        main_files = [f.strip() for f in self.main_file.text().split(',') if f.strip()]
         compiler = self.tool_module.ProjectCompiler(
             self.project_path.text(),
-            self.main_file.text()
+            main_files,
+            output=self.console_output,
+            cancel_event=self.cancel_event
         )
         compiler.config.config['General']['clean_temp'] = str(self.clean_temp.isChecked())
         compiler.config.config['PyInstaller']['console'] = str(self.show_console.isChecked())
@@ -562,7 +602,9 @@ class ToolTab(QWidget):
         # 实现Nuitka编译器的运行逻辑
         compiler = self.tool_module.NuitkaCompiler(
             self.project_path.text(),
-            self.main_file.text()
+            self.main_file.text(),
+            output=self.console_output,
+            cancel_event=self.cancel_event
         )
         compiler.config.config['General']['confirm_before_compile'] = 'false'  # 禁用确认
         compiler.config.config['Nuitka']['standalone'] = str(self.standalone.isChecked())
@@ -572,7 +614,9 @@ class ToolTab(QWidget):
     def runJSObfuscator(self):
         # 实现JavaScript混淆器的运行逻辑
         obfuscator = self.tool_module.JSObfuscator(
-            self.project_path.text()
+            self.project_path.text(),
+            output=self.console_output,
+            cancel_event=self.cancel_event
         )
         obfuscator.config.config['General']['confirm_before_process'] = 'false'  # 禁用确认
         obfuscator.process_project()
@@ -580,7 +624,9 @@ class ToolTab(QWidget):
     def runHTMLCompressor(self):
         # 实现HTML压缩器的运行逻辑
         compressor = self.tool_module.HTMLObfuscator(
-            self.project_path.text()
+            self.project_path.text(),
+            output=self.console_output,
+            cancel_event=self.cancel_event
         )
         compressor.config.config['General']['confirm_before_process'] = 'false'  # 禁用确认
         compressor.process_project()
@@ -588,20 +634,21 @@ class ToolTab(QWidget):
     def runPyInstExtractor(self):
         # 实现PyInstaller提取器的运行逻辑
         if not self.file_path.text():
-            print("请选择要提取的EXE文件")
+            print("请选择要提取的EXE文件", file=self.console_output)
             return
             
-        arch = self.tool_module.PyInstArchive(self.file_path.text())
+        arch = self.tool_module.PyInstArchive(self.file_path.text(), output=self.console_output)
         if arch.open():
             if arch.checkFile():
                 if arch.getCArchiveInfo():
                     arch.parseTOC()
-                    arch.extractFiles()
+                    # 解包到EXE所在目录，不依赖进程的当前工作目录
+                    arch.extractFiles(os.path.dirname(os.path.abspath(self.file_path.text())))
                     arch.close()
-                    print("提取完成")
+                    print("提取完成", file=self.console_output)
                     return
             arch.close()
-        print("提取失败")
+        print("提取失败", file=self.console_output)
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -0,0 +1,316 @@
+import os
+import io
+import json
+import queue
+import shutil
+import struct
+import threading
+import subprocess
+from typing import Any, Callable, Dict, List, Optional, TextIO
+from process_runner import (run_process, kill_process_tree, wait_process, build_env, PrefixedOutput,
+                            ProcessCancelled)
+
+# 常驻的Node工作进程：启动时加载一次库，之后循环处理请求。
+# 每条消息为4字节大端长度加UTF-8编码的JSON，文件内容不经过管道，由工作进程直接读写。
+WORKER_SCRIPT = r'''
+const fs = require('fs');
+const path = require('path');
+const [libraryName, transformBody] = process.argv.slice(-2);
+// 标准输出只用于传输消息，库打印的内容改写到标准错误
+console.log = console.info = console.warn = console.error;
+
+function send(message) {
+  const body = Buffer.from(JSON.stringify(message), 'utf8');
+  const header = Buffer.alloc(4);
+  header.writeUInt32BE(body.length, 0);
+  process.stdout.write(Buffer.concat([header, body]));
+}
+
+let lib = null;
+let version = null;
+try {
+  lib = require(libraryName);
+  try { version = require(libraryName + '/package.json').version; } catch (e) {}
+} catch (e) {
+  send({type: 'error', error: String((e && e.message) || e)});
+  process.exitCode = 1;
+}
+
+if (lib) {
+  const transform = new Function('lib', 'code', 'options',
+    'return (async () => ' + transformBody + ')();');
+  let buffer = Buffer.alloc(0);
+  let chain = Promise.resolve();
+  process.stdin.on('data', chunk => {
+    buffer = Buffer.concat([buffer, chunk]);
+    while (buffer.length >= 4) {
+      const length = buffer.readUInt32BE(0);
+      if (buffer.length < 4 + length) break;
+      const request = JSON.parse(buffer.subarray(4, 4 + length).toString('utf8'));
+      buffer = buffer.subarray(4 + length);
+      chain = chain.then(() => handle(request));
+    }
+  });
+  process.stdin.on('end', () => chain.then(() => process.exit(0)));
+  send({type: 'ready', version});
+
+  async function handle(request) {
+    const start = process.hrtime.bigint();
+    try {
+      const code = fs.readFileSync(request.source, 'utf8');
+      const result = await transform(lib, code, request.options);
+      fs.mkdirSync(path.dirname(request.output), {recursive: true});
+      // 先写临时文件再改名，中断时不会留下不完整的输出
+      const temp = request.output + '.tmp-' + process.pid;
+      fs.writeFileSync(temp, result);
+      fs.renameSync(temp, request.output);
+      send({type: 'result', id: request.id, ok: true, input_bytes: Buffer.byteLength(code),
+            output_bytes: Buffer.byteLength(result),
+            seconds: Number(process.hrtime.bigint() - start) / 1e9});
+    } catch (e) {
+      send({type: 'result', id: request.id, ok: false, error: String((e && e.message) || e)});
+    }
+  }
+}
+'''
+
+
+def find_node() -> str:
+    node = shutil.which('node')
+    if not node:
+        raise RuntimeError("未找到 node，请先安装 Node.js")
+    return node
+
+
+def get_node_path(project_path: str = None) -> str:
+    """返回工作进程的 NODE_PATH：已有设置、项目的 node_modules 和 npm 全局模块目录"""
+    paths = [p for p in os.environ.get('NODE_PATH', '').split(os.pathsep) if p]
+    if project_path:
+        paths.append(os.path.join(project_path, 'node_modules'))
+    npm = shutil.which('npm')
+    if npm:
+        captured = io.StringIO()
+        try:
+            if run_process([npm, 'root', '-g'], output=captured, timeout=30) == 0:
+                paths.append(captured.getvalue().strip().splitlines()[-1])
+        except (OSError, RuntimeError, IndexError):
+            pass
+    return os.pathsep.join(paths)
+
+
+def find_package_version(library: str, node_path: str) -> Optional[str]:
+    """在 NODE_PATH 的各目录中查找已安装库的版本，不需要启动Node"""
+    for directory in node_path.split(os.pathsep):
+        try:
+            with open(os.path.join(directory, library, 'package.json'), 'r', encoding='utf-8') as f:
+                return json.load(f).get('version')
+        except (OSError, ValueError):
+            continue
+    return None
+
+
+class NodeWorkerPool:
+    """在若干个常驻Node进程中批量处理文件，避免为每个文件启动一次Node
+
+    transform 为一个JS表达式，可使用 lib（已加载的库）、code（文件内容）和 options，
+    其值（或Promise的结果）为输出内容。
+    """
+
+    READY_TIMEOUT = 60
+
+    def __init__(self, library: str, transform: str, size: int, options: Dict[str, Any] = None,
+                 project_path: str = None, output: TextIO = None, cancel_event: threading.Event = None,
+                 timeout: float = None, node_path: str = None):
+        self.library = library
+        self.transform = transform
+        self.size = max(1, size)
+        self.options = options or {}
+        self.project_path = project_path
+        self.output = output
+        self.cancel_event = cancel_event
+        self.timeout = timeout
+        self.node_path = node_path
+        self.version = None
+        # 所有工作进程的CPU时间合计和最大峰值内存
+        self.usage = {'cpu_time': 0.0, 'peak_rss': 0}
+        self._node = None
+        self._env = None
+        self._workers: List[Optional[subprocess.Popen]] = []
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+
+    def __enter__(self) -> 'NodeWorkerPool':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def start(self):
+        self._node = find_node()
+        self._env = build_env({'NODE_PATH': self.node_path or get_node_path(self.project_path)})
+        try:
+            self._workers = [self._spawn(index) for index in range(self.size)]
+        except Exception:
+            self.close()
+            raise
+        if self.cancel_event is not None:
+            threading.Thread(target=self._watch_cancel, daemon=True).start()
+
+    def _spawn(self, index: int) -> subprocess.Popen:
+        group_kwargs = ({'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP} if os.name == 'nt'
+                        else {'start_new_session': True})
+        process = subprocess.Popen(
+            [self._node, '-e', WORKER_SCRIPT, self.library, self.transform],
+            cwd=self.project_path, env=self._env,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            **group_kwargs,
+        )
+        threading.Thread(target=self._forward_stderr, args=(process, index), daemon=True).start()
+
+        timer = threading.Timer(self.READY_TIMEOUT, kill_process_tree, [process])
+        timer.start()
+        try:
+            message = self._read(process)
+        finally:
+            timer.cancel()
+        if not message or message.get('type') != 'ready':
+            error = message.get('error') if message else '工作进程启动超时或异常退出'
+            kill_process_tree(process)
+            self._reap(process)
+            raise RuntimeError(f"无法加载 {self.library}: {error}")
+        self.version = message.get('version')
+        return process
+
+    def _forward_stderr(self, process: subprocess.Popen, index: int):
+        output = PrefixedOutput(f'node{index + 1}', self.output)
+        for line in io.TextIOWrapper(process.stderr, encoding='utf-8', errors='replace'):
+            output.write(line)
+        output.flush()
+
+    @staticmethod
+    def _send(process: subprocess.Popen, message: Dict[str, Any]):
+        body = json.dumps(message).encode('utf-8')
+        process.stdin.write(struct.pack('>I', len(body)) + body)
+        process.stdin.flush()
+
+    @staticmethod
+    def _read(process: subprocess.Popen) -> Optional[Dict[str, Any]]:
+        header = process.stdout.read(4)
+        if len(header) < 4:
+            return None
+        (length,) = struct.unpack('>I', header)
+        body = process.stdout.read(length)
+        if len(body) < length:
+            return None
+        return json.loads(body.decode('utf-8'))
+
+    def run(self, tasks: List[Dict[str, str]], on_result: Callable[[Dict[str, Any]], None] = None
+            ) -> List[Dict[str, Any]]:
+        """处理任务列表，按完成顺序对每个结果调用 on_result
+
+        每项包含 source 和 output，可选的 options 覆盖该文件的公共选项。
+        """
+        pending = queue.Queue()
+        for task_id, task in enumerate(tasks):
+            pending.put((task_id, task))
+        results = []
+
+        def handle(result: Dict[str, Any]):
+            with self._lock:
+                results.append(result)
+                if on_result:
+                    on_result(result)
+
+        threads = [threading.Thread(target=self._serve, args=(index, pending, handle), daemon=True)
+                   for index in range(len(self._workers))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if self.cancel_event and self.cancel_event.is_set():
+            raise ProcessCancelled("操作已取消")
+        return results
+
+    def _serve(self, index: int, pending: queue.Queue, handle: Callable[[Dict[str, Any]], None]):
+        while not (self.cancel_event and self.cancel_event.is_set()):
+            try:
+                task_id, task = pending.get_nowait()
+            except queue.Empty:
+                return
+            result = {'source': task['source'], 'output': task['output'], 'ok': False}
+            process = self._workers[index]
+            if process is None or process.poll() is not None:
+                # 上一个请求超时或工作进程崩溃，重新启动
+                try:
+                    process = self._workers[index] = self._spawn(index)
+                except RuntimeError as e:
+                    self._workers[index] = None
+                    result['error'] = str(e)
+                    handle(result)
+                    continue
+            response = self._request(process, task_id, task)
+            if response is None:
+                kill_process_tree(process)
+                self._reap(process)
+                timed_out = getattr(process, 'timed_out', False)
+                result['error'] = '处理超时，已终止工作进程' if timed_out else '工作进程异常退出'
+            else:
+                result.update({k: v for k, v in response.items() if k not in ('type', 'id')})
+            handle(result)
+
+    def _request(self, process: subprocess.Popen, task_id: int, task: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        def on_timeout():
+            process.timed_out = True
+            kill_process_tree(process)
+
+        timer = threading.Timer(self.timeout, on_timeout) if self.timeout else None
+        if timer:
+            timer.start()
+        try:
+            self._send(process, {'id': task_id, 'source': task['source'], 'output': task['output'],
+                                 'options': {**self.options, **task.get('options', {})}})
+            return self._read(process)
+        except (OSError, ValueError):
+            return None
+        finally:
+            if timer:
+                timer.cancel()
+
+    def _reap(self, process: subprocess.Popen):
+        """等待工作进程结束并累计其资源占用"""
+        usage = {}
+        try:
+            wait_process(process, usage)
+        except OSError:
+            return
+        if usage:
+            with self._lock:
+                self.usage['cpu_time'] += usage['cpu_time']
+                self.usage['peak_rss'] = max(self.usage['peak_rss'], usage['peak_rss'])
+
+    def _watch_cancel(self):
+        while not self._closed.is_set():
+            if self.cancel_event.wait(0.2):
+                for process in self._workers:
+                    if process is not None:
+                        kill_process_tree(process)
+                return
+
+    def close(self):
+        """关闭标准输入让工作进程处理完已收到的请求后退出"""
+        self._closed.set()
+        for process in self._workers:
+            if process is None:
+                continue
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+            timer = threading.Timer(10, kill_process_tree, [process])
+            timer.start()
+            try:
+                self._reap(process)
+            finally:
+                timer.cancel()
+        self._workers = []
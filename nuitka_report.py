@@ -0,0 +1,149 @@
+import os
+import sys
+import json
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Any, Dict, List, TextIO
+
+
+class NuitkaReport:
+    """解析Nuitka编译报告 (--report)，按模块和顶层包统计生成的C代码大小、编译耗时和打包体积"""
+
+    METRICS = {
+        'c_size': '生成的C代码',
+        'compile_time': '编译耗时',
+        'size': '打包体积',
+    }
+    MAX_HISTORY = 20
+
+    def __init__(self, report_file: str, build_dir: str = None, dist_dir: str = None):
+        self.report_file = report_file
+        self.build_dir = build_dir
+        self.dist_dir = dist_dir
+        self.modules: Dict[str, Dict[str, float]] = {}
+        # 随程序分发的DLL: 目标路径 -> 大小
+        self.dlls: Dict[str, int] = {}
+        self.totals: Dict[str, float] = {}
+
+    def parse(self) -> Dict[str, Dict[str, float]]:
+        root = ET.parse(self.report_file).getroot()
+        for node in root.iter('module'):
+            name = node.get('name')
+            entry = self._entry(name)
+            for timing in node.findall('optimization-time'):
+                entry['compile_time'] += float(timing.get('time', 0))
+            for timing in node.findall('code-generation-time'):
+                entry['compile_time'] += float(timing.get('time', 0))
+            resources = node.find('c-compilation-resources')
+            if resources is not None:
+                cpu = resources.find('cpu')
+                if cpu is not None:
+                    entry['compile_time'] += float(cpu.get('user-cpu-time', 0)) + float(cpu.get('system-cpu-time', 0))
+                object_file = resources.find('object-file')
+                if object_file is not None:
+                    entry['size'] += int(object_file.get('size', 0))
+            entry['c_size'] += self._get_c_size(name)
+
+        # standalone 模式下随程序分发的扩展模块和DLL，计入所属包
+        for node in root:
+            if not node.tag.startswith('included_') or node.get('ignored') == 'yes':
+                continue
+            dest_path = node.get('dest_path', '')
+            name = node.get('package') or Path(dest_path).name.split('.')[0]
+            size = self._get_file_size(dest_path)
+            self._entry(name)['size'] += size
+            if node.tag == 'included_dll':
+                self.dlls[dest_path] = size
+
+        self.totals = {metric: sum(m[metric] for m in self.modules.values()) for metric in self.METRICS}
+        return self.modules
+
+    def _entry(self, name: str) -> Dict[str, float]:
+        return self.modules.setdefault(name, {'c_size': 0, 'compile_time': 0.0, 'size': 0})
+
+    def _get_c_size(self, module_name: str) -> int:
+        # Nuitka 在构建目录中为每个模块生成 module.<模块名>.c，使用 --remove-output 时无法统计
+        if not self.build_dir:
+            return 0
+        path = os.path.join(self.build_dir, f'module.{module_name}.c')
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    def _get_file_size(self, dest_path: str) -> int:
+        if not self.dist_dir or not dest_path:
+            return 0
+        path = os.path.join(self.dist_dir, dest_path)
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    def by_package(self) -> Dict[str, Dict[str, float]]:
+        """按顶层包汇总各模块的统计"""
+        packages: Dict[str, Dict[str, float]] = {}
+        for name, values in self.modules.items():
+            package = packages.setdefault(name.split('.')[0], {'c_size': 0, 'compile_time': 0.0, 'size': 0,
+                                                               'modules': 0})
+            for metric in self.METRICS:
+                package[metric] += values[metric]
+            package['modules'] += 1
+        return packages
+
+    @staticmethod
+    def top(entries: Dict[str, Dict[str, float]], metric: str, count: int) -> List[tuple]:
+        ranked = sorted(entries.items(), key=lambda item: item[1][metric], reverse=True)
+        return [(name, values) for name, values in ranked[:count] if values[metric]]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'time': time.time(),
+            'totals': self.totals,
+            'packages': self.by_package(),
+            'modules': self.modules,
+            'dlls': self.dlls,
+        }
+
+    @staticmethod
+    def format_value(metric: str, value: float) -> str:
+        if metric == 'compile_time':
+            return f'{value:.2f}秒'
+        return f'{value / 1024:.1f}KB'
+
+    def print_summary(self, count: int = 10, previous: Dict[str, Any] = None, output: TextIO = None):
+        """打印各指标排名靠前的包，有上次构建的数据时附带变化量"""
+        output = output or sys.stdout
+        packages = self.by_package()
+        previous_packages = (previous or {}).get('packages', {})
+        for metric, title in self.METRICS.items():
+            ranking = self.top(packages, metric, count)
+            if not ranking:
+                continue
+            total = self.totals[metric] or 1
+            print(f"\n{title}排名 (合计 {self.format_value(metric, self.totals[metric])}):", file=output)
+            for position, (name, values) in enumerate(ranking, 1):
+                line = (f"  {position:>2}. {name:<30} {self.format_value(metric, values[metric]):>12} "
+                        f"{values[metric] / total:>6.1%}  ({values['modules']} 个模块)")
+                if name in previous_packages:
+                    delta = values[metric] - previous_packages[name].get(metric, 0)
+                    if delta:
+                        sign = '+' if delta > 0 else '-'
+                        line += f"  较上次 {sign}{self.format_value(metric, abs(delta))}"
+                print(line, file=output)
+
+    @classmethod
+    def load_latest(cls, history_dir: Path) -> Dict[str, Any] | None:
+        files = sorted(history_dir.glob('*.json')) if history_dir.is_dir() else []
+        if not files:
+            return None
+        try:
+            with open(files[-1], 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, history_dir: Path) -> Path:
+        """保存本次统计，只保留最近的若干次记录"""
+        history_dir.mkdir(parents=True, exist_ok=True)
+        path = history_dir / f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.json"
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        for old in sorted(history_dir.glob('*.json'))[:-self.MAX_HISTORY]:
+            old.unlink()
+        return path
@@ -0,0 +1,182 @@
+import io
+import os
+import sys
+import shlex
+import signal
+import time
+import threading
+import subprocess
+from typing import Any, Callable, Dict, List, Optional, Sequence, TextIO
+
+
+class ProcessCancelled(RuntimeError):
+    """进程因取消请求被终止"""
+
+
+class ProcessTimeout(RuntimeError):
+    """进程运行超过时限被终止"""
+
+
+class PrefixedOutput(io.TextIOBase):
+    """给每行输出加上前缀后写入目标流，用于区分并行构建的日志"""
+
+    def __init__(self, prefix: str, target: TextIO = None):
+        super().__init__()
+        self.prefix = prefix
+        self.target = target
+        self.buffer = ''
+        self.lock = threading.Lock()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        with self.lock:
+            self.buffer += text
+            while '\n' in self.buffer:
+                line, self.buffer = self.buffer.split('\n', 1)
+                # 整行一次写入，避免与其他线程的输出交错
+                (self.target or sys.stdout).write(f'[{self.prefix}] {line}\n')
+        return len(text)
+
+    def flush(self):
+        with self.lock:
+            if self.buffer:
+                (self.target or sys.stdout).write(f'[{self.prefix}] {self.buffer}\n')
+                self.buffer = ''
+
+
+def kill_process_tree(process: subprocess.Popen):
+    """终止进程及其创建的所有子进程"""
+    if process.poll() is not None:
+        return
+    if os.name == 'nt':
+        subprocess.run(['taskkill', '/T', '/F', '/PID', str(process.pid)],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    else:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+def format_command(command: str | List[str]) -> str:
+    """把参数列表格式化为可复制到终端执行的命令行，用于日志"""
+    if isinstance(command, str):
+        return command
+    return subprocess.list2cmdline(command) if os.name == 'nt' else shlex.join(command)
+
+
+def format_usage(usage: Dict[str, Any]) -> str:
+    if not usage:
+        return '无资源统计'
+    return f"CPU {usage['cpu_time']:.1f}秒，峰值内存 {usage['peak_rss'] / 1024 / 1024:.0f}MB"
+
+
+def run_process(command: str | List[str], cwd: str = None, env: Dict[str, str] = None,
+                output: TextIO = None, line_callback: Callable[[str], None] = None,
+                cancel_event: threading.Event | Sequence[threading.Event] = None,
+                resource_usage: Dict[str, Any] = None, timeout: float = None) -> int:
+    """运行外部进程，使用显式的工作目录和环境变量，并把输出逐行写入指定的输出流
+
+    不修改当前进程的工作目录、环境变量和 sys.stdout，多个构建可以在同一进程中并发运行。
+    command 应为参数列表；字符串会通过 shell 执行，仅用于用户提供的命令。
+    cancel_event（可以是多个事件）任一被设置时终止整个进程树并抛出 ProcessCancelled；
+    超过 timeout 秒时同样终止进程树并抛出 ProcessTimeout。
+    传入 resource_usage 字典时填入 cpu_time（秒）和 peak_rss（字节），包含已结束的子孙进程（仅POSIX）。
+    """
+    if isinstance(cancel_event, threading.Event):
+        cancel_events = [cancel_event]
+    else:
+        cancel_events = [event for event in (cancel_event or []) if event is not None]
+
+    # 子进程放入独立的进程组，取消时可以连同编译器子进程一起终止
+    group_kwargs = {}
+    if cancel_events or timeout:
+        if os.name == 'nt':
+            group_kwargs['creationflags'] = subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            group_kwargs['start_new_session'] = True
+
+    process = subprocess.Popen(
+        command,
+        cwd=cwd,
+        env=env,
+        shell=isinstance(command, str),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        stdin=subprocess.DEVNULL,
+        text=True,
+        encoding='utf-8',
+        errors='replace',
+        bufsize=1,
+        **group_kwargs,
+    )
+
+    finished = threading.Event()
+    stop_reason = []
+    if cancel_events or timeout:
+        deadline = time.monotonic() + timeout if timeout else None
+
+        def watch():
+            while not finished.wait(0.2):
+                if any(event.is_set() for event in cancel_events):
+                    stop_reason.append('cancel')
+                elif deadline and time.monotonic() > deadline:
+                    stop_reason.append('timeout')
+                else:
+                    continue
+                kill_process_tree(process)
+                return
+        threading.Thread(target=watch, daemon=True).start()
+
+    sink = output or sys.stdout
+    try:
+        for line in process.stdout:
+            line = line.rstrip('\n')
+            print(line, file=sink)
+            if line_callback:
+                line_callback(line)
+    except BaseException:
+        # 输出处理出错或被中断时不留下孤儿进程
+        kill_process_tree(process)
+        finished.set()
+        raise
+    process.stdout.close()
+    try:
+        code = wait_process(process, resource_usage)
+    finally:
+        finished.set()
+    if stop_reason == ['cancel']:
+        raise ProcessCancelled("操作已取消")
+    if stop_reason == ['timeout']:
+        raise ProcessTimeout(f"运行超过 {timeout:g} 秒，已终止: {format_command(command)[:200]}")
+    return code
+
+
+def wait_process(process: subprocess.Popen, resource_usage: Dict[str, Any] = None) -> int:
+    """等待进程结束并返回退出码，传入 resource_usage 时填入资源占用（同 run_process）"""
+    try:
+        if resource_usage is not None and hasattr(os, 'wait4'):
+            try:
+                _, status, usage = os.wait4(process.pid, 0)
+            except ChildProcessError:
+                # 已被取消线程中的 poll() 回收
+                return process.wait()
+            process.returncode = os.waitstatus_to_exitcode(status)
+            # Linux 的 ru_maxrss 以KB为单位，macOS 以字节为单位
+            peak_rss = usage.ru_maxrss if sys.platform == 'darwin' else usage.ru_maxrss * 1024
+            resource_usage.update(cpu_time=usage.ru_utime + usage.ru_stime, peak_rss=peak_rss)
+            return process.returncode
+        return process.wait()
+    except BaseException:
+        kill_process_tree(process)
+        raise
+
+
+def build_env(overrides: Optional[Dict[str, str]] = None, base: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """复制当前环境变量（或给定的 base）并应用覆盖项，返回给子进程使用的独立环境"""
+    env = dict(base) if base is not None else os.environ.copy()
+    if overrides:
+        env.update(overrides)
+    return env
@@ -22,10 +22,22 @@ class PyInstArchive:
     PYINST21_COOKIE_SIZE = 24 + 64      # For pyinstaller 2.1+
     MAGIC = b'MEI\014\013\012\013\016'  # Magic number which identifies pyinstaller
 
-    def __init__(self, path):
+    def __init__(self, path, output=None):
         self.filePath = path
         self.pycMagic = b'\0' * 4
         self.barePycList = [] # List of pyc's whose headers have to be fixed
+        self.output = output # Output stream, defaults to sys.stdout at call time
+        self.extractionDir = None
+
+
+    def _print(self, *args, **kwargs):
+        print(*args, file=self.output or sys.stdout, **kwargs)
+
+
+    def _outPath(self, name):
+        # All extracted paths are resolved against the extraction directory
+        # instead of changing the process-wide working directory
+        return os.path.join(self.extractionDir, name)
 
 
     def open(self):
@@ -33,7 +45,7 @@ class PyInstArchive:
             self.fPtr = open(self.filePath, 'rb')
             self.fileSize = os.stat(self.filePath).st_size
         except:
-            print('[!] Error: Could not open {0}'.format(self.filePath))
+            self._print('[!] Error: Could not open {0}'.format(self.filePath))
             return False
         return True
 
@@ -46,14 +58,14 @@ class PyInstArchive:
 
 
     def checkFile(self):
-        print('[+] Processing {0}'.format(self.filePath))
+        self._print('[+] Processing {0}'.format(self.filePath))
 
         searchChunkSize = 8192
         endPos = self.fileSize
         self.cookiePos = -1
 
         if endPos < len(self.MAGIC):
-            print('[!] Error : File is too short or truncated')
+            self._print('[!] Error : File is too short or truncated')
             return False
 
         while True:
@@ -78,17 +90,17 @@ class PyInstArchive:
                 break
 
         if self.cookiePos == -1:
-            print('[!] Error : Missing cookie, unsupported pyinstaller version or not a pyinstaller archive')
+            self._print('[!] Error : Missing cookie, unsupported pyinstaller version or not a pyinstaller archive')
             return False
 
         self.fPtr.seek(self.cookiePos + self.PYINST20_COOKIE_SIZE, os.SEEK_SET)
 
         if b'python' in self.fPtr.read(64).lower():
-            print('[+] Pyinstaller version: 2.1+')
+            self._print('[+] Pyinstaller version: 2.1+')
             self.pyinstVer = 21     # pyinstaller 2.1+
         else:
             self.pyinstVer = 20     # pyinstaller 2.0
-            print('[+] Pyinstaller version: 2.0')
+            self._print('[+] Pyinstaller version: 2.0')
 
         return True
 
@@ -110,11 +122,11 @@ class PyInstArchive:
                 struct.unpack('!8sIIii64s', self.fPtr.read(self.PYINST21_COOKIE_SIZE))
 
         except:
-            print('[!] Error : The file is not a pyinstaller archive')
+            self._print('[!] Error : The file is not a pyinstaller archive')
             return False
 
         self.pymaj, self.pymin = (pyver//100, pyver%100) if pyver >= 100 else (pyver//10, pyver%10)
-        print('[+] Python version: {0}.{1}'.format(self.pymaj, self.pymin))
+        self._print('[+] Python version: {0}.{1}'.format(self.pymaj, self.pymin))
 
         # Additional data after the cookie
         tailBytes = self.fileSize - self.cookiePos - (self.PYINST20_COOKIE_SIZE if self.pyinstVer == 20 else self.PYINST21_COOKIE_SIZE)
@@ -125,7 +137,7 @@ class PyInstArchive:
         self.tableOfContentsPos = self.overlayPos + toc
         self.tableOfContentsSize = tocLen
 
-        print('[+] Length of package: {0} bytes'.format(lengthofPackage))
+        self._print('[+] Length of package: {0} bytes'.format(lengthofPackage))
         return True
 
 
@@ -150,7 +162,7 @@ class PyInstArchive:
                 name = name.decode("utf-8").rstrip("\0")
             except UnicodeDecodeError:
                 newName = str(uniquename())
-                print('[!] Warning: File name {0} contains invalid bytes. Using random name {1}'.format(name, newName))
+                self._print('[!] Warning: File name {0} contains invalid bytes. Using random name {1}'.format(name, newName))
                 name = newName
             
             # Prevent writing outside the extraction directory
@@ -159,7 +171,7 @@ class PyInstArchive:
 
             if len(name) == 0:
                 name = str(uniquename())
-                print('[!] Warning: Found an unamed file in CArchive. Using random name {0}'.format(name))
+                self._print('[!] Warning: Found an unamed file in CArchive. Using random name {0}'.format(name))
 
             self.tocList.append( \
                                 CTOCEntry(                      \
@@ -172,11 +184,12 @@ class PyInstArchive:
                                 ))
 
             parsedLen += entrySize
-        print('[+] Found {0} files in CArchive'.format(len(self.tocList)))
+        self._print('[+] Found {0} files in CArchive'.format(len(self.tocList)))
 
 
     def _writeRawData(self, filepath, data):
         nm = filepath.replace('\\', os.path.sep).replace('/', os.path.sep).replace('..', '__')
+        nm = self._outPath(nm)
         nmDir = os.path.dirname(nm)
         if nmDir != '' and not os.path.exists(nmDir): # Check if path exists, create if not
             os.makedirs(nmDir)
@@ -185,14 +198,13 @@ class PyInstArchive:
             f.write(data)
 
 
-    def extractFiles(self):
-        print('[+] Beginning extraction...please standby')
-        extractionDir = os.path.join(os.getcwd(), os.path.basename(self.filePath) + '_extracted')
-
-        if not os.path.exists(extractionDir):
-            os.mkdir(extractionDir)
+    def extractFiles(self, outputDir=None):
+        self._print('[+] Beginning extraction...please standby')
+        baseDir = outputDir if outputDir is not None else os.getcwd()
+        self.extractionDir = os.path.join(os.path.abspath(baseDir), os.path.basename(self.filePath) + '_extracted')
 
-        os.chdir(extractionDir)
+        if not os.path.exists(self.extractionDir):
+            os.mkdir(self.extractionDir)
 
         for entry in self.tocList:
             self.fPtr.seek(entry.position, os.SEEK_SET)
@@ -202,7 +214,7 @@ class PyInstArchive:
                 try:
                     data = zlib.decompress(data)
                 except zlib.error:
-                    print('[!] Error : Failed to decompress {0}'.format(entry.name))
+                    self._print('[!] Error : Failed to decompress {0}'.format(entry.name))
                     continue
                 # Malware may tamper with the uncompressed size
                 # Comment out the assertion in such a case
@@ -217,13 +229,14 @@ class PyInstArchive:
             basePath = os.path.dirname(entry.name)
             if basePath != '':
                 # Check if path exists, create if not
+                basePath = self._outPath(basePath)
                 if not os.path.exists(basePath):
                     os.makedirs(basePath)
 
             if entry.typeCmprsData == b's':
                 # s -> ARCHIVE_ITEM_PYSOURCE
                 # Entry point are expected to be python scripts
-                print('[+] Possible entry point: {0}.pyc'.format(entry.name))
+                self._print('[+] Possible entry point: {0}.pyc'.format(entry.name))
 
                 if self.pycMagic == b'\0' * 4:
                     # if we don't have the pyc header yet, fix them in a later pass
@@ -263,13 +276,13 @@ class PyInstArchive:
 
     def _fixBarePycs(self):
         for pycFile in self.barePycList:
-            with open(pycFile, 'r+b') as pycFile:
+            with open(self._outPath(pycFile), 'r+b') as pycFile:
                 # Overwrite the first four bytes
                 pycFile.write(self.pycMagic)
 
 
     def _writePyc(self, filename, data):
-        with open(filename, 'wb') as pycFile:
+        with open(self._outPath(filename), 'wb') as pycFile:
             pycFile.write(self.pycMagic)            # pyc magic
 
             if self.pymaj >= 3 and self.pymin >= 7:                # PEP 552 -- Deterministic pycs
@@ -287,10 +300,10 @@ class PyInstArchive:
     def _extractPyz(self, name):
         dirName =  name + '_extracted'
         # Create a directory for the contents of the pyz
-        if not os.path.exists(dirName):
-            os.mkdir(dirName)
+        if not os.path.exists(self._outPath(dirName)):
+            os.mkdir(self._outPath(dirName))
 
-        with open(name, 'rb') as f:
+        with open(self._outPath(name), 'rb') as f:
             pyzMagic = f.read(4)
             assert pyzMagic == b'PYZ\0' # Sanity Check
 
@@ -301,13 +314,13 @@ class PyInstArchive:
 
             elif self.pycMagic != pyzPycMagic:
                 self.pycMagic = pyzPycMagic
-                print('[!] Warning: pyc magic of files inside PYZ archive are different from those in CArchive')
+                self._print('[!] Warning: pyc magic of files inside PYZ archive are different from those in CArchive')
 
             # Skip PYZ extraction if not running under the same python version
             if self.pymaj != sys.version_info.major or self.pymin != sys.version_info.minor:
-                print('[!] Warning: This script is running in a different Python version than the one used to build the executable.')
-                print('[!] Please run this script in Python {0}.{1} to prevent extraction errors during unmarshalling'.format(self.pymaj, self.pymin))
-                print('[!] Skipping pyz extraction')
+                self._print('[!] Warning: This script is running in a different Python version than the one used to build the executable.')
+                self._print('[!] Please run this script in Python {0}.{1} to prevent extraction errors during unmarshalling'.format(self.pymaj, self.pymin))
+                self._print('[!] Skipping pyz extraction')
                 return
 
             (tocPosition, ) = struct.unpack('!i', f.read(4))
@@ -316,10 +329,10 @@ class PyInstArchive:
             try:
                 toc = marshal.load(f)
             except:
-                print('[!] Unmarshalling FAILED. Cannot extract {0}. Extracting remaining files.'.format(name))
+                self._print('[!] Unmarshalling FAILED. Cannot extract {0}. Extracting remaining files.'.format(name))
                 return
 
-            print('[+] Found {0} files in PYZ archive'.format(len(toc)))
+            self._print('[+] Found {0} files in PYZ archive'.format(len(toc)))
 
             # From pyinstaller 3.1+ toc is a list of tuples
             if type(toc) == list:
@@ -345,7 +358,7 @@ class PyInstArchive:
                 else:
                     filePath = os.path.join(dirName, fileName + '.pyc')
 
-                fileDir = os.path.dirname(filePath)
+                fileDir = os.path.dirname(self._outPath(filePath))
                 if not os.path.exists(fileDir):
                     os.makedirs(fileDir)
 
@@ -353,8 +366,8 @@ class PyInstArchive:
                     data = f.read(length)
                     data = zlib.decompress(data)
                 except:
-                    print('[!] Error: Failed to decompress {0}, probably encrypted. Extracting as is.'.format(filePath))
-                    open(filePath + '.encrypted', 'wb').write(data)
+                    self._print('[!] Error: Failed to decompress {0}, probably encrypted. Extracting as is.'.format(filePath))
+                    open(self._outPath(filePath + '.encrypted'), 'wb').write(data)
                 else:
                     self._writePyc(filePath, data)
 
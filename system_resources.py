@@ -0,0 +1,97 @@
+import os
+import sys
+import threading
+from typing import Callable, Optional
+
+
+def get_available_memory() -> Optional[int]:
+    """返回当前可用物理内存字节数，无法获取时返回 None"""
+    try:
+        import psutil
+        return psutil.virtual_memory().available
+    except ImportError:
+        pass
+
+    if sys.platform.startswith('linux'):
+        try:
+            with open('/proc/meminfo', 'r') as f:
+                for line in f:
+                    if line.startswith('MemAvailable:'):
+                        return int(line.split()[1]) * 1024
+        except (OSError, ValueError):
+            return None
+
+    if hasattr(os, 'sysconf'):
+        try:
+            return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+        except (ValueError, OSError):
+            return None
+    return None
+
+
+def get_mount_fstype(path: str) -> Optional[str]:
+    """返回路径所在挂载点的文件系统类型（仅Linux），用于识别 tmpfs"""
+    if not sys.platform.startswith('linux'):
+        return None
+    path = os.path.realpath(path)
+    best_mount, best_type = '', None
+    try:
+        with open('/proc/mounts', 'r') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) < 3:
+                    continue
+                mount_point, fstype = parts[1], parts[2]
+                if (path == mount_point or path.startswith(mount_point.rstrip('/') + '/')) \
+                        and len(mount_point) > len(best_mount):
+                    best_mount, best_type = mount_point, fstype
+    except OSError:
+        return None
+    return best_type
+
+
+class MemoryMonitor:
+    """在后台线程中采样系统可用内存，记录峰值占用，并在可用内存低于阈值时触发回调"""
+
+    def __init__(self, low_memory_threshold: int, on_low_memory: Callable[[int], None] = None,
+                 interval: float = 1.0):
+        self.low_memory_threshold = low_memory_threshold
+        self.on_low_memory = on_low_memory
+        self.interval = interval
+        self.baseline = None
+        self.min_available = None
+        self.triggered = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def peak_usage(self) -> int:
+        """监控期间相对于开始时增加的内存占用字节数"""
+        if self.baseline is None or self.min_available is None:
+            return 0
+        return max(0, self.baseline - self.min_available)
+
+    def start(self) -> bool:
+        self.baseline = get_available_memory()
+        if self.baseline is None:
+            return False
+        self.min_available = self.baseline
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            available = get_available_memory()
+            if available is None:
+                continue
+            self.min_available = min(self.min_available, available)
+            if available < self.low_memory_threshold and not self.triggered:
+                self.triggered = True
+                if self.on_low_memory:
+                    self.on_low_memory(available)
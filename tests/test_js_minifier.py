@@ -0,0 +1,50 @@
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import js_minifier
+
+NODE = shutil.which('node')
+
+# 每段代码压缩前后在 node 中的输出必须相同
+CASES = {
+    'postfix_increment_division': 'var b = 5;\nvar a = b++ / 2; // note\nconsole.log(a, b);',
+    'postfix_decrement_division': 'var b = 5;\nvar a = b-- / 2 / 1;\nconsole.log(a, b);',
+    'member_postfix_division': 'var o = {n: 4};\nconsole.log(o.n++ / 2, o["n"]-- / 2);',
+    'prefix_after_newline': 'var b = 1\nvar d = b\n++b\nconsole.log(d, b);',
+    'object_literal_division': 'var o = {x: 1} / 2;\nconsole.log(o, ({a: 4}).a / 2);',
+    'block_then_regex': 'if (true) {}\n/ab+c/.test("abbc") && console.log("regex");',
+    'arrow_block_division': 'console.log([2, 4].map(x => { return x / 2 }));',
+    'template_object_division': 'console.log(`${ {a: 4}.a / 2 }`);',
+    'regex_after_keyword': 'function f(s) { return /a\\/b/.test(s) }\nconsole.log(f("a/b"), typeof /x/);',
+    'comments_and_asi': 'var a = 1 /* c */\nvar b = a\n/* multi\nline */\nb++\nconsole.log(a + b)',
+}
+
+
+@unittest.skipUnless(NODE, '需要 node')
+class MinifyDifferentialTest(unittest.TestCase):
+    def run_node(self, code: str) -> str:
+        with tempfile.NamedTemporaryFile('w', suffix='.js', delete=False, encoding='utf-8') as f:
+            f.write(code)
+        try:
+            result = subprocess.run([NODE, f.name], capture_output=True, text=True, timeout=30)
+        finally:
+            os.remove(f.name)
+        self.assertEqual(result.returncode, 0, f"{result.stderr}\n--- 代码 ---\n{code}")
+        return result.stdout
+
+    def test_cases(self):
+        for name, code in CASES.items():
+            with self.subTest(name):
+                output = io.StringIO()
+                js_minifier.minify(code, output)
+                self.assertEqual(self.run_node(output.getvalue()), self.run_node(code), output.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()